@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+대용량 이벤트 로그 일괄 추론 (오프라인 스코어링)
+- CSV/Parquet 입력을 청크 단위로 읽어 프로세스 풀에서 병렬 생성
+- 청크 안에서는 입력 길이순으로 정렬해 배치 패딩 낭비를 줄이고 원래 순서로 복원
+- 청크별 결과를 part 파일로 원자적으로 기록하므로 중단 후 재실행하면 완료된 청크는 건너뜀
+  (출력 디렉토리의 manifest.json에 입력 경로/크기, 청크 크기, 생성 설정을 기록하고 다르면 재개 거부)
+- 도메인 컬럼이 없으면 도메인 분류기로 추정 (PredictedDomain, DomainConfidence 컬럼 추가)
+- 심각도 사전 분류 (Severity, Triaged 컬럼 추가, --triage canned/suppress면 기준보다 낮은 양호 이벤트는 생성 없이 정형 응답/빈 값)
+- Parquet 입력은 pyarrow 필요 (requirement.txt)
+사용 예: python batch_score_pko_t5.py events_2025-01-01.parquet --output-dir scored/ --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+from triage import TRIAGE_MODE, TRIAGE_MODES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2048   # part 파일 하나에 들어가는 행 수 (재시작 단위)
+BATCH_SIZE = 16     # generate 한 번에 넣는 행 수
+PART_PREFIX = "part-"
+MANIFEST_FILE = "manifest.json"
+
+# 워커 프로세스별 모델 상태 (initializer에서 한 번만 로드)
+_worker = {}
+
+def iter_input_chunks(paths, chunk_size=CHUNK_SIZE):
+    """입력 파일들을 (청크 번호, DataFrame) 단위로 순차 로드 (전체를 메모리에 올리지 않음)"""
+    chunk_index = 0
+    for path in paths:
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                yield chunk_index, batch.to_pandas()
+                chunk_index += 1
+        else:
+            for chunk in pd.read_csv(path, encoding='utf-8', chunksize=chunk_size):
+                yield chunk_index, chunk
+                chunk_index += 1
+
+def part_path(output_dir, chunk_index):
+    return os.path.join(output_dir, f"{PART_PREFIX}{chunk_index:06d}.csv")
+
+def build_manifest(args):
+    """part 파일의 청크 번호가 같은 행을 가리키는 조건 (입력 파일/크기, 청크 크기) + 결과에 영향을 주는 설정"""
+    return {
+        "inputs": [{"path": os.path.abspath(path), "bytes": os.path.getsize(path)} for path in args.inputs],
+        "chunk_size": args.chunk_size,
+        "settings": {
+            "domain_column": args.domain_column,
+            "input_column": args.input_column,
+            "num_beams": args.num_beams,
+            "max_length": args.max_length,
+            "triage": args.triage,
+        },
+    }
+
+def check_manifest(output_dir, manifest):
+    """처음이면 manifest 기록, 재개면 기존 manifest와 비교 (반환: 재개 가능 여부)"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        if any(name.startswith(PART_PREFIX) for name in os.listdir(output_dir)):
+            logger.error(f"manifest 없이 part 파일이 있어 어떤 입력의 결과인지 알 수 없습니다: {output_dir}")
+            return False
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    with open(path, encoding='utf-8') as f:
+        previous = json.load(f)
+    if previous != manifest:
+        logger.error(
+            f"이전 실행과 입력/설정이 달라 재개할 수 없습니다 ({path}). 새 출력 디렉토리를 사용하세요.\n"
+            f"  이전: {json.dumps(previous, ensure_ascii=False)}\n"
+            f"  현재: {json.dumps(manifest, ensure_ascii=False)}"
+        )
+        return False
+    return True
+
+def init_worker(threads_per_worker, max_length, num_beams):
+    """프로세스 풀 initializer: 모델 로드 + 스레드 수 제한 (워커끼리 코어를 나눠 씀)"""
+    import torch
+    from test_pko_t5 import load_model_safe
+
+    torch.set_num_threads(threads_per_worker)
+    model, tokenizer, device = load_model_safe()
+    if model is None:
+        raise RuntimeError("워커 모델 로드 실패")
+    model.eval()
+    _worker.update(
+        model=model, tokenizer=tokenizer, device=device,
+        max_length=max_length, num_beams=num_beams
+    )
+
+def generate_batch(texts):
+    """워커 모델로 입력 문장 배치 생성"""
+    import torch
+
+    model, tokenizer = _worker["model"], _worker["tokenizer"]
+    inputs = tokenizer(
+        ["분석: " + text for text in texts],
+        return_tensors="pt",
+        max_length=256,
+        truncation=True,
+        padding=True
+    )
+    inputs = {k: v.to(_worker["device"]) for k, v in inputs.items()}
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_length=_worker["max_length"],
+            num_beams=_worker["num_beams"],
+            no_repeat_ngram_size=2,
+            do_sample=False,
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+    return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+def score_chunk(chunk_index, chunk, output_dir, batch_size, domain_column, input_column, triage_mode=TRIAGE_MODE):
+    """청크 하나를 생성하고 part 파일로 원자적 기록 (반환: 청크 번호, 행 수, 생성한 행 수, 소요 시간)"""
+    from test_pko_t5 import format_input, DEFAULT_DOMAIN
+    from domain_classifier import load_domain_classifier, resolve_domain
+    from triage import triage
+
+    start_time = time.perf_counter()
+    result = chunk.copy()
+    if domain_column in chunk:
+        domains = chunk[domain_column].tolist()
+    else:
+        classifier = load_domain_classifier()
+        resolutions = [resolve_domain(classifier, text, default=DEFAULT_DOMAIN) for text in chunk[input_column]]
+        domains = [r["domain"] for r in resolutions]
+        result['PredictedDomain'] = domains
+        result['DomainConfidence'] = [r["confidence"] for r in resolutions]
+    decisions = [triage(domain, input_text, triage_mode) for domain, input_text in zip(domains, chunk[input_column])]
+    result['Severity'] = [d["severity"] for d in decisions]
+    result['Triaged'] = [not d["generate"] for d in decisions]
+    texts = [format_input(domain, input_text, _worker["model"]) for domain, input_text in zip(domains, chunk[input_column])]
+
+    # 생성이 필요한 행만 길이순 정렬 후 배치 생성, 결과는 원래 행 순서로 복원
+    order = sorted((i for i, d in enumerate(decisions) if d["generate"]), key=lambda i: len(texts[i]))
+    generated = [d["text"] for d in decisions]
+    for batch_start in range(0, len(order), batch_size):
+        batch_ids = order[batch_start:batch_start + batch_size]
+        for i, text in zip(batch_ids, generate_batch([texts[i] for i in batch_ids])):
+            generated[i] = text
+
+    result['Generated'] = generated
+    path = part_path(output_dir, chunk_index)
+    tmp_path = path + ".tmp"
+    result.to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, path)
+    return chunk_index, len(result), len(order), time.perf_counter() - start_time
+
+def merge_parts(output_dir, output_path):
+    """part 파일들을 청크 순서대로 하나의 CSV로 이어 붙임"""
+    parts = sorted(name for name in os.listdir(output_dir) if name.startswith(PART_PREFIX) and name.endswith(".csv"))
+    with open(output_path, "w", encoding='utf-8') as out:
+        for n, name in enumerate(parts):
+            with open(os.path.join(output_dir, name), encoding='utf-8') as f:
+                header = f.readline()
+                if n == 0:
+                    out.write(header)
+                for line in f:
+                    out.write(line)
+    logger.info(f"병합 완료: {output_path} ({len(parts)}개 part)")
+
+def main():
+    parser = argparse.ArgumentParser(description="PKO-T5 대용량 일괄 추론")
+    parser.add_argument("inputs", nargs="+", help="입력 CSV/Parquet 파일 (Domain, Input 컬럼, Domain이 없으면 분류기로 추정)")
+    parser.add_argument("--output-dir", required=True, help="청크별 part 파일 저장 디렉토리 (재시작 체크포인트)")
+    parser.add_argument("--merge", help="완료 후 part 파일을 합칠 CSV 경로")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--num-beams", type=int, default=1, help="처리량 우선이므로 기본은 탐욕적 디코딩")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--domain-column", default="Domain")
+    parser.add_argument("--input-column", default="Input")
+    parser.add_argument(
+        "--triage", choices=TRIAGE_MODES, default=TRIAGE_MODE,
+        help="양호 이벤트 처리 (off: 모두 생성, canned: 정형 응답, suppress: 빈 값)"
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if not check_manifest(args.output_dir, build_manifest(args)):
+        return 1
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+    logger.info(f"워커 {args.workers}개 x 스레드 {threads}개, 청크 {args.chunk_size}행, 배치 {args.batch_size}")
+
+    start_time = time.perf_counter()
+    total_rows = generated_rows = skipped_chunks = 0
+    pending = set()
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=init_worker,
+        initargs=(threads, args.max_length, args.num_beams)
+    ) as executor:
+
+        def collect(return_when):
+            nonlocal pending, total_rows, generated_rows
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                chunk_index, rows, generated, elapsed = future.result()
+                total_rows += rows
+                generated_rows += generated
+                overall = time.perf_counter() - start_time
+                logger.info(
+                    f"청크 {chunk_index} 완료: {rows}행, {rows / elapsed:.1f} rows/sec "
+                    f"(누적 {total_rows}행, {total_rows / overall:.1f} rows/sec)"
+                )
+
+        for chunk_index, chunk in iter_input_chunks(args.inputs, args.chunk_size):
+            if os.path.exists(part_path(args.output_dir, chunk_index)):
+                skipped_chunks += 1
+                continue
+            # 제출 대기 청크 수를 워커 수의 2배로 제한해 입력을 스트리밍으로 읽음
+            while len(pending) >= args.workers * 2:
+                collect(FIRST_COMPLETED)
+            pending.add(executor.submit(
+                score_chunk, chunk_index, chunk, args.output_dir,
+                args.batch_size, args.domain_column, args.input_column, args.triage
+            ))
+        while pending:
+            collect(FIRST_COMPLETED)
+
+    total_time = time.perf_counter() - start_time
+    logger.info(
+        f"완료: {total_rows}행, {total_time:.1f}초, {total_rows / max(total_time, 1e-9):.1f} rows/sec "
+        f"(이미 완료되어 건너뛴 청크 {skipped_chunks}개)"
+    )
+    if total_rows:
+        logger.info(
+            f"사전 분류로 생략한 생성: {total_rows - generated_rows}행 ({(total_rows - generated_rows) / total_rows:.1%})"
+        )
+    if args.merge:
+        merge_parts(args.output_dir, args.merge)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+수치 제약 디코딩
+입력에서 미리 계산한 수치(측정값, 기준값, 차이 등)와 학습 타겟에서 산출한 도메인별 파생 수치
+(number_rules.json)만 출력에 쓰이도록 model.generate 위에서 숫자 토큰 로짓을 보정/강제하고,
+타겟 대부분에 등장하는 필수 수치가 아직 나오지 않았으면 그 수치의 시작 토큰을 올리고 종료(EOS)를 감점하는 LogitsProcessor
+(종료 차단은 force 모드에서 타겟 전부에 등장하는 강제 수치에만 적용)
+빔 서치(num_beams=3~4) 대신 탐욕적 디코딩(num_beams=1)으로도 정확한 계산 수치를 얻는 것이 목적
+"""
+
+import re
+import logging
+import torch
+from transformers import LogitsProcessor, LogitsProcessorList
+
+from input_parser import NUMBER
+from number_rules import allowed_numbers, must_include_numbers, forced_numbers
+from encoder_cache import generate_with_encoder_cache
+from length_budget import apply_length_budget
+
+logger = logging.getLogger(__name__)
+
+# 유효한 숫자 이어쓰기에 더하는 가산점 / 잘못된 숫자에 주는 감점 (force 모드에서는 -inf)
+NUMBER_BOOST = 5.0
+NUMBER_PENALTY = 10.0
+# 아직 나오지 않은 필수 수치의 시작 토큰 가산점
+REQUIRED_BOOST = 2.0
+
+NUMBER_PATTERN = re.compile(NUMBER)
+TRAILING_NUMBER = re.compile(r'(\d+(?:\.\d*)?)$')
+LEADING_NUMBER = re.compile(r'^(\d+(?:\.\d*)?|\.\d+)')
+
+# 토크나이저별 숫자 토큰 표 캐시 (vocab 전체 디코딩은 한 번만)
+_NUMERIC_TOKEN_TABLES = {}
+
+def build_numeric_token_table(tokenizer):
+    """숫자로 시작하는 토큰 목록과 비숫자 토큰 마스크 생성
+
+    반환: (entries, non_numeric_mask)
+        entries: [(token_id, 숫자 부분, 새 단어로 시작하는지, 숫자 뒤에 다른 문자가 오는지)]
+    """
+    key = (tokenizer.name_or_path, len(tokenizer))
+    if key in _NUMERIC_TOKEN_TABLES:
+        return _NUMERIC_TOKEN_TABLES[key]
+
+    vocab_size = len(tokenizer)
+    tokens = tokenizer.convert_ids_to_tokens(list(range(vocab_size)))
+    entries = []
+    non_numeric_mask = torch.ones(vocab_size, dtype=torch.bool)
+
+    for token_id, token in enumerate(tokens):
+        if token is None:
+            continue
+        text = tokenizer.decode([token_id]).strip()
+        match = LEADING_NUMBER.match(text)
+        if not match:
+            continue
+        starts_new = token.startswith(("▁", "Ġ"))
+        terminates = len(match.group(1)) < len(text)
+        entries.append((token_id, match.group(1), starts_new, terminates))
+        non_numeric_mask[token_id] = False
+
+    logger.info(f"숫자 토큰 표 생성: {len(entries)}개 / {vocab_size}")
+    _NUMERIC_TOKEN_TABLES[key] = (entries, non_numeric_mask)
+    return entries, non_numeric_mask
+
+class NumericSpanLogitsProcessor(LogitsProcessor):
+    """생성 중인 숫자가 허용 수치의 접두어가 되도록 숫자 토큰 로짓을 조정
+
+    - 이어쓰는 숫자가 허용 수치와 맞으면 가산점, 어긋나면 감점
+    - 허용 수치 중간에서 숫자가 끝나려 하면 비숫자 토큰 감점
+    - 필수 수치(required) 중 아직 생성되지 않은 것이 있으면 숫자가 시작될 자리에서 그 수치의 시작 토큰 가산점,
+      종료 토큰(EOS) 감점 (force 모드에서도 감점만)
+    - force=True면 잘못된 숫자 토큰은 완전히 차단하고, 강제 수치(forced)가 모두 나오기 전까지 EOS 차단
+    """
+
+    def __init__(self, tokenizer, allowed_numbers, required_numbers=(), forced_numbers=(), force=False,
+                 boost=NUMBER_BOOST, penalty=NUMBER_PENALTY, required_boost=REQUIRED_BOOST):
+        self.tokenizer = tokenizer
+        self.allowed = set(allowed_numbers) | set(required_numbers) | set(forced_numbers)
+        self.required = set(required_numbers) | set(forced_numbers)
+        self.forced = set(forced_numbers)
+        self.soft_penalty = penalty
+        self.prefixes = {number[:i] for number in self.allowed for i in range(1, len(number) + 1)}
+        self.entries, self.non_numeric_mask = build_numeric_token_table(tokenizer)
+        self.force = force
+        self.boost = boost
+        self.required_boost = required_boost
+        self.penalty = float("inf") if force else penalty
+        self._plans = {}
+        self._start_plans = {}
+
+    def _plan(self, partial):
+        """현재 작성 중인 숫자(partial)에 대한 가산/감점 토큰 계획 (partial 별로 캐시)"""
+        if partial not in self._plans:
+            boost_ids, penalize_ids = [], []
+            for token_id, digits, starts_new, terminates in self.entries:
+                if digits.startswith(".") and not partial:
+                    continue  # 숫자 뒤가 아닌 마침표는 문장 부호
+                candidate = digits if (starts_new or not partial) else partial + digits
+                valid = candidate in self.allowed if terminates else candidate in self.prefixes
+                if not valid:
+                    penalize_ids.append(token_id)
+                elif partial and not starts_new:
+                    boost_ids.append(token_id)
+
+            # 허용 수치의 접두어에서 멈추면 잘못된 수치가 되므로 숫자를 끝내는 토큰 감점
+            block_termination = bool(partial) and partial in self.prefixes and partial not in self.allowed
+            self._plans[partial] = (
+                torch.tensor(boost_ids, dtype=torch.long),
+                torch.tensor(penalize_ids, dtype=torch.long),
+                block_termination,
+            )
+        return self._plans[partial]
+
+    def _start_plan(self, pending):
+        """아직 나오지 않은 필수 수치(pending)를 시작하는 토큰 (pending 집합별로 캐시)"""
+        if pending not in self._start_plans:
+            start_ids = [
+                token_id for token_id, digits, _, terminates in self.entries
+                if not digits.startswith(".")
+                and (digits in pending if terminates else any(number.startswith(digits) for number in pending))
+            ]
+            self._start_plans[pending] = torch.tensor(start_ids, dtype=torch.long)
+        return self._start_plans[pending]
+
+    def __call__(self, input_ids, scores):
+        for row in range(input_ids.shape[0]):
+            tail = self.tokenizer.decode(input_ids[row, -6:], skip_special_tokens=True)
+            match = TRAILING_NUMBER.search(tail)
+            partial = match.group(1) if match else ""
+
+            boost_ids, penalize_ids, block_termination = self._plan(partial)
+            if len(boost_ids):
+                scores[row, boost_ids.to(scores.device)] += self.boost
+            if len(penalize_ids):
+                scores[row, penalize_ids.to(scores.device)] -= self.penalty
+            if block_termination:
+                scores[row, self.non_numeric_mask.to(scores.device)] -= self.penalty
+
+            if self.required:
+                generated = self.tokenizer.decode(input_ids[row], skip_special_tokens=True)
+                pending = frozenset(self.required - set(NUMBER_PATTERN.findall(generated)))
+                if pending:
+                    if not partial:
+                        start_ids = self._start_plan(pending)
+                        if len(start_ids):
+                            scores[row, start_ids.to(scores.device)] += self.required_boost
+                    if self.tokenizer.eos_token_id is not None:
+                        hard = self.force and not pending.isdisjoint(self.forced)
+                        scores[row, self.tokenizer.eos_token_id] -= self.penalty if hard else self.soft_penalty
+        return scores
+
+def generate_constrained(model, tokenizer, device, input_text, force=False, max_length=512,
+                         encoder_cache=None, length_budgets=None):
+    """수치 제약 + 탐욕적 디코딩으로 생성 (input_text는 "도메인, 입력" 형식)"""
+    processor = NumericSpanLogitsProcessor(
+        tokenizer, allowed_numbers(input_text), must_include_numbers(input_text), forced_numbers(input_text),
+        force=force
+    )
+
+    inputs = tokenizer(
+        "분석: " + input_text,
+        return_tensors="pt",
+        max_length=256,
+        truncation=True,
+        padding=True
+    )
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+
+    gen_kwargs = dict(
+        max_length=max_length,
+        num_beams=1,
+        no_repeat_ngram_size=2,
+        do_sample=False,
+        logits_processor=LogitsProcessorList([processor]),
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id
+    )
+    apply_length_budget(gen_kwargs, tokenizer, length_budgets, input_text)
+
+    model.eval()
+    if encoder_cache is not None:
+        outputs = generate_with_encoder_cache(model, inputs, encoder_cache, **gen_kwargs)
+    else:
+        with torch.no_grad():
+            outputs = model.generate(**inputs, **gen_kwargs)
+
+    return tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PKO-T5-large 교사 모델 -> 경량 학생 모델 지식 증류 스크립트
+1단계: 교사 모델을 도메인 코퍼스 전체에 한 번만 배치 실행하여 출력 시퀀스와 top-k 로짓을 디스크에 캐시
+2단계: 층 수와 d_model을 줄인 학생 모델을 캐시된 교사 출력으로 학습
+3단계: 도메인별 교사/학생 지연시간과 정확도 비교 보고
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import datetime
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from transformers import (
+    AutoTokenizer,
+    AutoModelForSeq2SeqLM,
+    Seq2SeqTrainingArguments,
+    Seq2SeqTrainer,
+    set_seed
+)
+from sklearn.model_selection import train_test_split
+from slm_training.config import default_csv_files
+
+# 교사: train_pko_t5_large.py 결과물, 학생: 더 작은 d_model을 가진 pko-t5-small 기반
+TEACHER_PATH = "/Volumes/Data/slm_model_large"
+STUDENT_INIT_MODEL = "paust/pko-t5-small"
+
+CACHE_DIR = "/Volumes/Data/slm_teacher_cache"
+OUTPUT_DIR = "/Volumes/Data/slm_model_student"
+REPORT_PATH = os.path.join(OUTPUT_DIR, "distillation_report.json")
+SEED = 42
+
+# 교사/학생 입력 prefix (교사는 train_pko_t5_large.py, 학생은 test_pko_t5.py 서빙 포맷)
+TEACHER_PREFIX = "수학 분석: "
+STUDENT_PREFIX = "분석: "
+
+# 교사 캐시 설정
+TEACHER_BATCH_SIZE = 16
+TEACHER_MAX_NEW_TOKENS = 128
+TOP_K = 8  # 전체 vocab 로짓 대신 상위 k개만 저장 (디스크/메모리 절약)
+SHARD_SIZE = 2048
+
+# 학생 구조 (pko-t5-small: 8층/d_model 512 -> 인코더 4층, 디코더 2층)
+STUDENT_NUM_LAYERS = 4
+STUDENT_NUM_DECODER_LAYERS = 2
+
+# 증류 손실 설정
+DISTILL_ALPHA = 0.5        # KD 손실 비중 (나머지는 교사 시퀀스에 대한 CE)
+DISTILL_TEMPERATURE = 2.0
+
+# 도메인별 평가 샘플 수
+EVAL_SAMPLES_PER_DOMAIN = 50
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(f'pko_t5_distill_log_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def load_corpus(csv_files):
+    """도메인 CSV 로드 후 학습/평가 분할 (도메인 비율 유지)"""
+    all_data = []
+    for csv_file in csv_files:
+        if os.path.exists(csv_file):
+            df = pd.read_csv(csv_file, encoding='utf-8')
+            all_data.append(df)
+            logger.info(f"로드된 파일: {csv_file}, 데이터 수: {len(df)}")
+        else:
+            logger.warning(f"파일을 찾을 수 없음: {csv_file}")
+
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+
+    df = pd.concat(all_data, ignore_index=True)
+    df = df.dropna(subset=['Domain', 'Input', 'Output']).reset_index(drop=True)
+    df['row_id'] = df.index
+    df['input_text'] = df['Domain'] + ", " + df['Input']
+    logger.info(f"정제된 데이터 수: {len(df)}")
+
+    train_df, eval_df = train_test_split(df, test_size=0.2, random_state=SEED, stratify=df['Domain'])
+    return train_df.reset_index(drop=True), eval_df.reset_index(drop=True)
+
+def cache_teacher_outputs(teacher, tokenizer, df, cache_dir, device):
+    """교사 모델을 코퍼스에 한 번만 실행하여 시퀀스와 top-k 로짓을 샤드 단위로 캐시"""
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+
+    # 같은 교사/설정으로 만든 캐시가 있으면 완료된 샤드는 건너뜀
+    manifest = {"teacher": TEACHER_PATH, "top_k": TOP_K, "max_new_tokens": TEACHER_MAX_NEW_TOKENS, "shards": []}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        if all(previous.get(k) == manifest[k] for k in ("teacher", "top_k", "max_new_tokens")):
+            manifest = previous
+        else:
+            logger.warning("교사 캐시 설정이 달라 캐시를 새로 생성합니다.")
+    done_shards = set(manifest["shards"])
+
+    # 길이순 정렬로 배치 내 패딩 최소화
+    df = df.assign(_len=df['input_text'].str.len()).sort_values('_len').reset_index(drop=True)
+
+    teacher.eval()
+    start_time = time.perf_counter()
+    for shard_idx, shard_start in enumerate(range(0, len(df), SHARD_SIZE)):
+        shard_name = f"teacher_shard_{shard_idx:05d}.pt"
+        if shard_name in done_shards:
+            continue
+
+        shard_df = df.iloc[shard_start:shard_start + SHARD_SIZE]
+        shard = {"row_ids": [], "sequences": [], "topk_values": [], "topk_indices": []}
+
+        for batch_start in range(0, len(shard_df), TEACHER_BATCH_SIZE):
+            batch_df = shard_df.iloc[batch_start:batch_start + TEACHER_BATCH_SIZE]
+            inputs = tokenizer(
+                [TEACHER_PREFIX + text for text in batch_df['input_text']],
+                return_tensors="pt",
+                max_length=256,
+                truncation=True,
+                padding=True
+            )
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+
+            with torch.no_grad():
+                sequences = teacher.generate(
+                    **inputs,
+                    max_new_tokens=TEACHER_MAX_NEW_TOKENS,
+                    num_beams=1,
+                    do_sample=False,
+                    pad_token_id=tokenizer.pad_token_id,
+                    eos_token_id=tokenizer.eos_token_id
+                )
+                # 생성 결과의 첫 토큰은 decoder_start 토큰이므로 제외하고 라벨로 사용
+                labels = sequences[:, 1:].clone()
+                labels[labels == tokenizer.pad_token_id] = -100
+                logits = teacher(**inputs, labels=labels).logits
+                topk_values, topk_indices = logits.topk(TOP_K, dim=-1)
+
+            for i, row_id in enumerate(batch_df['row_id'].tolist()):
+                length = int((labels[i] != -100).sum())
+                shard["row_ids"].append(row_id)
+                shard["sequences"].append(labels[i, :length].tolist())
+                shard["topk_values"].append(topk_values[i, :length].to(torch.float16).cpu())
+                shard["topk_indices"].append(topk_indices[i, :length].to(torch.int32).cpu())
+
+        # 임시 파일에 쓴 뒤 이름 변경 (중단 시 반쯤 쓰인 샤드 방지)
+        shard_path = os.path.join(cache_dir, shard_name)
+        torch.save(shard, shard_path + ".tmp")
+        os.replace(shard_path + ".tmp", shard_path)
+        manifest["shards"].append(shard_name)
+        with open(manifest_path, "w", encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        processed = min(shard_start + SHARD_SIZE, len(df))
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"교사 캐시 샤드 {shard_name} 저장 ({processed}/{len(df)}, {elapsed:.1f}초)")
+
+    return manifest
+
+def load_teacher_cache(cache_dir):
+    """캐시된 교사 출력을 row_id 기준 딕셔너리로 로드"""
+    with open(os.path.join(cache_dir, "manifest.json"), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    cache = {}
+    for shard_name in manifest["shards"]:
+        shard = torch.load(os.path.join(cache_dir, shard_name))
+        for row_id, seq, values, indices in zip(
+            shard["row_ids"], shard["sequences"], shard["topk_values"], shard["topk_indices"]
+        ):
+            cache[row_id] = (seq, values, indices)
+    logger.info(f"교사 캐시 로드 완료: {len(cache)}개")
+    return cache
+
+def build_student(init_model_name, num_layers, num_decoder_layers):
+    """사전학습 모델에서 층을 균등 간격으로 골라 얕은 학생 모델 생성"""
+    student = AutoModelForSeq2SeqLM.from_pretrained(init_model_name)
+
+    def select_blocks(blocks, keep):
+        if keep >= len(blocks):
+            return blocks
+        # 0번 블록은 relative attention bias를 가지므로 항상 유지
+        step = (len(blocks) - 1) / max(1, keep - 1)
+        indices = sorted({round(i * step) for i in range(keep)})
+        return torch.nn.ModuleList([blocks[i] for i in indices])
+
+    student.encoder.block = select_blocks(student.encoder.block, num_layers)
+    student.decoder.block = select_blocks(student.decoder.block, num_decoder_layers)
+    student.config.num_layers = len(student.encoder.block)
+    student.config.num_decoder_layers = len(student.decoder.block)
+
+    logger.info(
+        f"학생 모델: 인코더 {student.config.num_layers}층, 디코더 {student.config.num_decoder_layers}층, "
+        f"d_model {student.config.d_model}, 파라미터 수 {sum(p.numel() for p in student.parameters()):,}"
+    )
+    return student
+
+class DistillationDataset(torch.utils.data.Dataset):
+    """학생 입력 토큰과 캐시된 교사 타겟을 묶은 데이터셋"""
+
+    def __init__(self, df, tokenizer, teacher_cache):
+        rows = df[df['row_id'].isin(teacher_cache.keys())]
+        encodings = tokenizer(
+            [STUDENT_PREFIX + text for text in rows['input_text']],
+            max_length=256,
+            truncation=True
+        )
+        self.examples = []
+        for i, row_id in enumerate(rows['row_id'].tolist()):
+            seq, values, indices = teacher_cache[row_id]
+            self.examples.append({
+                "input_ids": encodings["input_ids"][i],
+                "labels": seq,
+                "teacher_topk_values": values,
+                "teacher_topk_indices": indices,
+            })
+
+    def __len__(self):
+        return len(self.examples)
+
+    def __getitem__(self, idx):
+        return self.examples[idx]
+
+class DistillationCollator:
+    """입력/라벨/교사 top-k 텐서를 배치 최대 길이로 패딩"""
+
+    def __init__(self, pad_token_id):
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, features):
+        batch_size = len(features)
+        max_input = max(len(f["input_ids"]) for f in features)
+        max_label = max(len(f["labels"]) for f in features)
+
+        input_ids = torch.full((batch_size, max_input), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((batch_size, max_input), dtype=torch.long)
+        labels = torch.full((batch_size, max_label), -100, dtype=torch.long)
+        topk_values = torch.zeros((batch_size, max_label, TOP_K), dtype=torch.float32)
+        topk_indices = torch.zeros((batch_size, max_label, TOP_K), dtype=torch.long)
+
+        for i, f in enumerate(features):
+            n_in, n_label = len(f["input_ids"]), len(f["labels"])
+            input_ids[i, :n_in] = torch.tensor(f["input_ids"])
+            attention_mask[i, :n_in] = 1
+            labels[i, :n_label] = torch.tensor(f["labels"])
+            topk_values[i, :n_label] = f["teacher_topk_values"].float()
+            topk_indices[i, :n_label] = f["teacher_topk_indices"].long()
+
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": labels,
+            "teacher_topk_values": topk_values,
+            "teacher_topk_indices": topk_indices,
+        }
+
+class DistillationTrainer(Seq2SeqTrainer):
+    """교사 시퀀스 CE + 교사 top-k 분포 KL 손실로 학생 학습"""
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        topk_values = inputs.pop("teacher_topk_values")
+        topk_indices = inputs.pop("teacher_topk_indices")
+        outputs = model(**inputs)
+        ce_loss = outputs.loss
+
+        # 교사 분포는 top-k 안에서 재정규화, 학생은 전체 vocab 기준 로그 확률을 top-k 위치에서 추출
+        mask = inputs["labels"] != -100
+        teacher_probs = F.softmax(topk_values / DISTILL_TEMPERATURE, dim=-1)
+        student_log_probs = F.log_softmax(outputs.logits / DISTILL_TEMPERATURE, dim=-1).gather(-1, topk_indices)
+        kd_per_token = (teacher_probs * (torch.log(teacher_probs + 1e-9) - student_log_probs)).sum(-1)
+        kd_loss = (kd_per_token * mask).sum() / mask.sum().clamp(min=1)
+
+        loss = DISTILL_ALPHA * kd_loss * DISTILL_TEMPERATURE ** 2 + (1 - DISTILL_ALPHA) * ce_loss
+        return (loss, outputs) if return_outputs else loss
+
+def extract_numbers(text):
+    """문장에서 수치(정수/소수) 추출"""
+    return re.findall(r'\d+(?:\.\d+)?', text)
+
+def evaluate_per_domain(model, tokenizer, device, eval_df, prefix, label):
+    """도메인별 지연시간(샘플당 ms)과 정확도(완전 일치, 수치 일치) 측정"""
+    model.eval()
+    results = {}
+
+    for domain, domain_df in eval_df.groupby('Domain'):
+        samples = domain_df.head(EVAL_SAMPLES_PER_DOMAIN)
+        latencies, exact, numeric = [], 0, 0
+
+        for _, row in samples.iterrows():
+            inputs = tokenizer(prefix + row['input_text'], return_tensors="pt", max_length=256, truncation=True)
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+
+            start = time.perf_counter()
+            with torch.no_grad():
+                outputs = model.generate(
+                    **inputs,
+                    max_new_tokens=TEACHER_MAX_NEW_TOKENS,
+                    num_beams=1,
+                    do_sample=False,
+                    pad_token_id=tokenizer.pad_token_id,
+                    eos_token_id=tokenizer.eos_token_id
+                )
+            latencies.append(time.perf_counter() - start)
+
+            prediction = tokenizer.decode(outputs[0], skip_special_tokens=True).strip()
+            reference = row['Output'].strip()
+            exact += int(prediction == reference)
+            # 정답에 등장하는 모든 수치가 예측에 포함되면 수치 일치로 판단
+            numeric += int(set(extract_numbers(reference)) <= set(extract_numbers(prediction)))
+
+        n = len(samples)
+        results[domain] = {
+            "samples": n,
+            "latency_ms": 1000 * sum(latencies) / n,
+            "exact_match": exact / n,
+            "numeric_accuracy": numeric / n,
+        }
+        logger.info(
+            f"[{label}] {domain}: 지연 {results[domain]['latency_ms']:.1f}ms, "
+            f"완전 일치 {results[domain]['exact_match']:.1%}, 수치 일치 {results[domain]['numeric_accuracy']:.1%}"
+        )
+
+    return results
+
+def report_tradeoff(teacher_results, student_results, teacher, student):
+    """교사 대비 학생의 속도/정확도 트레이드오프 보고서 작성"""
+    report = {
+        "teacher_params": sum(p.numel() for p in teacher.parameters()),
+        "student_params": sum(p.numel() for p in student.parameters()),
+        "domains": {},
+    }
+
+    logger.info("=" * 80)
+    logger.info(f"{'도메인':<24}{'속도 향상':>10}{'수치 정확도(교사→학생)':>28}")
+    for domain, teacher_metrics in teacher_results.items():
+        student_metrics = student_results[domain]
+        speedup = teacher_metrics["latency_ms"] / max(student_metrics["latency_ms"], 1e-6)
+        report["domains"][domain] = {
+            "teacher": teacher_metrics,
+            "student": student_metrics,
+            "speedup": speedup,
+            "numeric_accuracy_delta": student_metrics["numeric_accuracy"] - teacher_metrics["numeric_accuracy"],
+        }
+        logger.info(
+            f"{domain:<24}{speedup:>9.2f}x"
+            f"{teacher_metrics['numeric_accuracy']:>18.1%} → {student_metrics['numeric_accuracy']:.1%}"
+        )
+    logger.info("=" * 80)
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w", encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"증류 보고서 저장: {REPORT_PATH}")
+    return report
+
+def main():
+    """메인 실행 함수 (교사 캐시 -> 학생 학습 -> 도메인별 비교)"""
+    set_seed(SEED)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    logger.info(f"사용 디바이스: {device}")
+
+    train_df, eval_df = load_corpus(default_csv_files())
+
+    # 1단계: 교사 출력 캐시 (이미 캐시된 샤드는 건너뜀)
+    logger.info(f"🧑‍🏫 교사 모델 로드: {TEACHER_PATH}")
+    tokenizer = AutoTokenizer.from_pretrained(TEACHER_PATH)
+    teacher = AutoModelForSeq2SeqLM.from_pretrained(TEACHER_PATH).to(device)
+    cache_teacher_outputs(teacher, tokenizer, train_df, CACHE_DIR, device)
+    teacher_cache = load_teacher_cache(CACHE_DIR)
+
+    # 2단계: 학생 학습
+    student = build_student(STUDENT_INIT_MODEL, STUDENT_NUM_LAYERS, STUDENT_NUM_DECODER_LAYERS).to(device)
+    train_dataset = DistillationDataset(train_df, tokenizer, teacher_cache)
+    logger.info(f"증류 학습 데이터 수: {len(train_dataset)}")
+
+    training_args = Seq2SeqTrainingArguments(
+        output_dir=OUTPUT_DIR,
+        learning_rate=5e-4,
+        per_device_train_batch_size=16,
+        num_train_epochs=3,
+        weight_decay=0.01,
+        warmup_steps=200,
+        logging_steps=50,
+        save_steps=500,
+        save_total_limit=2,
+        remove_unused_columns=False,  # 교사 top-k 컬럼 유지
+        dataloader_num_workers=0,
+        report_to=[],
+        optim="adafactor",
+        seed=SEED
+    )
+
+    trainer = DistillationTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=train_dataset,
+        tokenizer=tokenizer,
+        data_collator=DistillationCollator(tokenizer.pad_token_id)
+    )
+
+    logger.info("🚀 학생 모델 증류 학습 시작")
+    start_time = datetime.datetime.now()
+    trainer.train()
+    trainer.save_model()
+    tokenizer.save_pretrained(OUTPUT_DIR)
+    logger.info(f"학생 모델 저장: {OUTPUT_DIR} (학습 시간: {datetime.datetime.now() - start_time})")
+
+    # 3단계: 도메인별 지연시간/정확도 비교
+    teacher_results = evaluate_per_domain(teacher, tokenizer, device, eval_df, TEACHER_PREFIX, "교사")
+    student_results = evaluate_per_domain(student, tokenizer, device, eval_df, STUDENT_PREFIX, "학생")
+    report_tradeoff(teacher_results, student_results, teacher, student)
+    return True
+
+if __name__ == "__main__":
+    logger.info("="*80)
+    logger.info("🚀 PKO-T5 지식 증류 (Large 교사 -> 경량 학생) 시작")
+    logger.info("="*80)
+
+    success = main()
+
+    if success:
+        logger.info("="*80)
+        logger.info("✅ 지식 증류가 성공적으로 완료되었습니다!")
+        logger.info("="*80)
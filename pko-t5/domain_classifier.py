@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+경량 도메인 분류기 (입력 문장 -> 도메인, 신뢰도)
+- 문자 1~3-gram을 crc32로 해시한 특징 + 로지스틱 회귀 (학습: scikit-learn, 추론: numpy 가중치 조회만)
+- 숫자는 0으로 바꿔 수치가 아닌 표현("밀집", "화염", "미착용" 등)으로 분류
+- 신뢰도 = 최대 확률 x 학습 때 본 n-gram 비율 (학습 데이터와 무관한 문장은 확률이 높아도 신뢰도가 낮음)
+- 요청에 도메인이 없을 때 분류 결과를 모델 입력/길이 예산/심각도 규칙 선택에 그대로 사용 (추가 모델 호출 없음)
+  python domain_classifier.py                       # CSV Input 컬럼으로 학습 후 domain_classifier.npz 저장
+  python domain_classifier.py "13:13 클리닉에서 71명 밀집, 기준 수용인원 49명"
+"""
+
+import os
+import re
+import sys
+import time
+import zlib
+import logging
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "domain_classifier.npz")
+
+NGRAM_SIZES = (1, 2, 3)
+NUM_FEATURES = 2 ** 18
+# 이 신뢰도 미만이면 예측 대신 기본 도메인 사용
+MIN_CONFIDENCE = 0.6
+HOLDOUT_RATIO = 0.1
+
+DIGITS = re.compile(r'\d')
+
+# 프로세스당 한 번만 로드
+_CLASSIFIERS = {}
+# n-gram -> crc32 캐시 (도메인 문장의 n-gram 종류는 한정적이라 해시 계산을 대부분 사전 조회로 대체)
+# 임의 입력으로 계속 커지지 않도록 상한을 넘으면 비움
+NGRAM_HASH_CACHE_SIZE = 200_000
+_NGRAM_HASHES = {}
+
+def _ngram_hash(ngram):
+    if len(_NGRAM_HASHES) >= NGRAM_HASH_CACHE_SIZE:
+        _NGRAM_HASHES.clear()
+    value = _NGRAM_HASHES[ngram] = zlib.crc32(ngram.encode("utf-8"))
+    return value
+
+def featurize(text, num_features=NUM_FEATURES, ngram_sizes=NGRAM_SIZES):
+    """문자 n-gram 해시 특징 (반환: 특징 인덱스 배열, L2 정규화된 빈도 배열)"""
+    padded = f" {DIGITS.sub('0', text.lower())} "
+    counts = Counter(padded[i:i + n] for n in ngram_sizes for i in range(len(padded) - n + 1))
+    hashes = _NGRAM_HASHES
+    indices = np.fromiter(
+        (hashes.get(ngram) or _ngram_hash(ngram) for ngram in counts),
+        dtype=np.int64, count=len(counts)
+    ) & (num_features - 1)
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, values / np.sqrt(np.dot(values, values))
+
+class DomainClassifier:
+    """해시 특징 x 가중치 행렬 (NUM_FEATURES, 도메인 수) 조회로 도메인 확률 계산"""
+
+    def __init__(self, weights, bias, domains, num_features=NUM_FEATURES, ngram_sizes=NGRAM_SIZES):
+        self.weights = weights
+        self.bias = bias
+        # 학습 데이터에 한 번이라도 나온 특징 (나오지 않은 특징의 가중치는 0)
+        self.known = np.any(weights != 0, axis=1)
+        self.domains = list(domains)
+        self.num_features = num_features
+        self.ngram_sizes = tuple(ngram_sizes)
+
+    @classmethod
+    def load(cls, path=CLASSIFIER_PATH):
+        with np.load(path) as data:
+            return cls(
+                data["weights"], data["bias"], data["domains"].tolist(),
+                int(data["num_features"]), data["ngram_sizes"].tolist()
+            )
+
+    def save(self, path=CLASSIFIER_PATH):
+        np.savez_compressed(
+            path, weights=self.weights, bias=self.bias, domains=np.array(self.domains),
+            num_features=self.num_features, ngram_sizes=np.array(self.ngram_sizes)
+        )
+        logger.info(f"도메인 분류기 저장: {path}")
+
+    def predict_proba(self, text):
+        """(도메인별 확률, 학습 때 본 특징 비율)"""
+        indices, values = featurize(text, self.num_features, self.ngram_sizes)
+        scores = values @ self.weights[indices] + self.bias
+        scores = np.exp(scores - scores.max())
+        coverage = float(np.dot(values * values, self.known[indices]))
+        return scores / scores.sum(), coverage
+
+    def predict(self, text):
+        """(도메인, 신뢰도)"""
+        probabilities, coverage = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.domains[best], float(probabilities[best]) * coverage
+
+    def predict_batch(self, texts):
+        return [self.predict(text) for text in texts]
+
+def load_domain_classifier(path=CLASSIFIER_PATH):
+    """저장된 분류기 로드 (없으면 None, 한 번 로드하면 재사용)"""
+    if path not in _CLASSIFIERS:
+        if not os.path.exists(path):
+            logger.info(f"도메인 분류기가 없습니다 ({path}). python domain_classifier.py로 학습하세요.")
+            _CLASSIFIERS[path] = None
+        else:
+            _CLASSIFIERS[path] = DomainClassifier.load(path)
+    return _CLASSIFIERS[path]
+
+def resolve_domain(classifier, input_text, domain=None, default=None, min_confidence=MIN_CONFIDENCE):
+    """명시된 도메인 > 분류기 예측(신뢰도 이상) > 기본 도메인 순으로 결정
+
+    반환: {"domain", "confidence"(분류기 예측 시), "source": "request" | "classifier" | "default"}
+    """
+    if domain:
+        return {"domain": domain, "confidence": None, "source": "request"}
+    if classifier is not None:
+        predicted, confidence = classifier.predict(input_text)
+        if confidence >= min_confidence:
+            return {"domain": predicted, "confidence": confidence, "source": "classifier"}
+        return {"domain": default, "confidence": confidence, "source": "default"}
+    return {"domain": default, "confidence": None, "source": "default"}
+
+def train_classifier(df, seed=42):
+    """DataFrame(Domain, Input)으로 학습 (반환: 분류기, 검증 정확도)"""
+    from scipy.sparse import csr_matrix
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+
+    features = [featurize(text) for text in df['Input']]
+    indptr = np.cumsum([0] + [len(indices) for indices, _ in features])
+    matrix = csr_matrix(
+        (np.concatenate([values for _, values in features]), np.concatenate([indices for indices, _ in features]), indptr),
+        shape=(len(features), NUM_FEATURES)
+    )
+    labels = df['Domain'].to_numpy()
+    train_x, eval_x, train_y, eval_y = train_test_split(
+        matrix, labels, test_size=HOLDOUT_RATIO, random_state=seed, stratify=labels
+    )
+
+    model = LogisticRegression(C=10.0, max_iter=1000)
+    model.fit(train_x, train_y)
+    accuracy = model.score(eval_x, eval_y)
+
+    classifier = DomainClassifier(
+        model.coef_.T.astype(np.float32), model.intercept_.astype(np.float32), model.classes_.tolist()
+    )
+    # 추론과 같은 신뢰도(최대 확률 x 학습 때 본 특징 비율)로 MIN_CONFIDENCE 구간 평가
+    probabilities = model.predict_proba(eval_x)
+    coverage = eval_x.multiply(eval_x) @ classifier.known.astype(np.float32)
+    confidence = probabilities.max(axis=1) * coverage
+    confident = confidence >= MIN_CONFIDENCE
+    confident_accuracy = (model.classes_[probabilities.argmax(axis=1)] == eval_y)[confident].mean()
+    logger.info(
+        f"검증 정확도 {accuracy:.4f}, 신뢰도 {MIN_CONFIDENCE} 이상 {confident.mean():.1%} 구간 정확도 {confident_accuracy:.4f}"
+    )
+    return classifier, accuracy
+
+def main():
+    if len(sys.argv) > 1:
+        classifier = load_domain_classifier()
+        if classifier is None:
+            return
+        for text in sys.argv[1:]:
+            start_time = time.perf_counter()
+            domain, confidence = classifier.predict(text)
+            print(f"{text}\n -> {domain} (신뢰도 {confidence:.3f}, {(time.perf_counter() - start_time) * 1e6:.0f}µs)")
+        return
+
+    import pandas as pd
+    from slm_training.config import default_csv_files
+
+    all_data = [pd.read_csv(f, encoding='utf-8') for f in default_csv_files() if os.path.exists(f)]
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+    df = pd.concat(all_data, ignore_index=True).dropna(subset=['Domain', 'Input'])
+    classifier, _ = train_classifier(df)
+    classifier.save()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+인코더 출력 캐시
+최근 입력 문장의 인코더 hidden state를 LRU로 보관하여,
+같은 입력을 다른 생성 설정(빔 수 변경 등)으로 다시 실행하거나 재시도할 때 인코더 계산을 건너뜀
+"""
+
+import threading
+import logging
+import itertools
+import weakref
+from collections import OrderedDict
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+
+logger = logging.getLogger(__name__)
+
+# 캐시 최대 항목 수 / 최대 메모리 (hidden state 텐서 기준)
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+class EncoderOutputCache:
+    """(모델, 토큰화된 입력) -> 인코더 출력 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # 모델 객체별 세대 번호 (id(model)은 GC 후 새 모델에 재사용될 수 있어 키로 쓰지 않음)
+        self._model_generations = weakref.WeakKeyDictionary()
+        self._generation_counter = itertools.count()
+
+    def model_generation(self, model):
+        """모델 객체에 처음 본 순서대로 세대 번호 부여 (핫 리로드된 모델은 항상 새 번호)"""
+        with self._lock:
+            generation = self._model_generations.get(model)
+            if generation is None:
+                generation = next(self._generation_counter)
+                self._model_generations[model] = generation
+            return generation
+
+    def make_key(self, model, input_ids):
+        return (self.model_generation(model), tuple(input_ids[0].tolist()))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, hidden_states, attention_mask):
+        size = hidden_states.element_size() * hidden_states.nelement()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (hidden_states, attention_mask)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.element_size() * evicted.nelement()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def encode(self, model, inputs):
+        """토큰화된 입력의 인코더 출력을 캐시에서 찾거나 계산 (배치 크기 1)
+
+        반환: (BaseModelOutput, attention_mask)
+        """
+        key = self.make_key(model, inputs["input_ids"])
+        entry = self.get(key)
+        if entry is None:
+            with torch.no_grad():
+                hidden_states = model.get_encoder()(
+                    input_ids=inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"]
+                ).last_hidden_state
+            entry = (hidden_states, inputs["attention_mask"])
+            self.put(key, *entry)
+        hidden_states, attention_mask = entry
+        # generate가 빔 수에 맞춰 새 텐서로 확장하므로 캐시 텐서 자체는 변경되지 않음
+        return BaseModelOutput(last_hidden_state=hidden_states), attention_mask
+
+def generate_with_encoder_cache(model, inputs, cache, **generate_kwargs):
+    """인코더 출력 캐시를 사용해 model.generate 실행"""
+    encoder_outputs, attention_mask = cache.encode(model, inputs)
+    with torch.no_grad():
+        return model.generate(
+            encoder_outputs=encoder_outputs,
+            attention_mask=attention_mask,
+            **generate_kwargs
+        )
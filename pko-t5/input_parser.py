@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+도메인 입력 문장 수치 파서
+"13:13 클리닉에서 71명 밀집, 기준 수용인원 49명" 같은 입력에서
+장소, 측정값, 기준값, 단위, 차이를 추출하고 출력에 들어가야 할 수치를 미리 계산
+"""
+
+import re
+
+# 측정 단위 (인원/대수, 시간, 거리)
+UNITS = r'명|대|분|초|m'
+NUMBER = r'\d+(?:\.\d+)?'
+
+# 시각 표현: "13:13", "오후 6시 45분", "14시 21분", "정오 12시 34분" ("12시간"은 제외)
+TIME_PATTERN = re.compile(
+    r'(?:(?:오전|오후|아침|저녁|밤|새벽|정오|낮)\s*)?\d{1,2}시(?!간)(?:\s*\d{1,2}분)?'
+    r'|(?<![\d.])\d{1,2}:\d{2}(?!\d)'
+)
+
+# 기준값: "기준 수용인원 49명", "운영 기준은 9명", "허용 값 2분", "평상시 42초", "기준: 1.5m"
+BASELINE_PATTERN = re.compile(
+    rf'(?:기준|허용|표준|평상시|임계값)[^,\d]{{0,10}}?({NUMBER})\s*({UNITS})'
+)
+
+# 기준 미설정: "기준 없음", "허용치 미설정", "임계값 없음", "규정 미설정"
+NO_BASELINE_PATTERN = re.compile(r'(?:기준|허용|임계값|규정)[^,.\d]{0,6}?(?:없음|미설정)')
+
+VALUE_PATTERN = re.compile(rf'({NUMBER})\s*({UNITS})')
+COUNT_UNITS = ("명", "대")
+
+# 보호구 (안전장비 도메인에서 보호구 뒤는 "미착용 절단" 같은 행위 표현)
+EQUIPMENT_WORDS = {"헬멧", "안전모", "장갑", "보안경", "마스크", "안전화", "안전복", "안전대", "귀마개"}
+
+# 장소가 아닌 단어 (감지 대상, 감지 유형, 집계 표현)
+NON_LOCATION_WORDS = {
+    "현재", "인원", "감지", "파악", "계측", "밀집", "수용인원", "동시", "구간", "오늘", "자정",
+    "방문자", "방문객", "환자", "학생", "승객", "신원미상자", "의심", "미확인", "인물", "외부인",
+    "작업자", "행인", "직원", "고객", "기술자", "근로자", "관리자", "무단침입자", "침입자", "보행자",
+    "지게차", "트럭", "승용차", "기사", "시민", "이용자", "관람객", "검사원", "간병인", "엔지니어",
+    "조립공", "보호자", "포장공", "정비원", "점검원", "철근공", "보수공", "청소원", "타일공", "목수",
+    "설치원", "용접공", "배관공", "의료진", "시공자", "기능공", "도장공", "운반원", "교직원", "청소년",
+    "아동", "군집", "건설", "화학", "연기", "화염", "불꽃", "연기·불꽃", "불꽃·연기", "화염·연기", "연기·화염",
+} | EQUIPMENT_WORDS
+
+# 장소 추출 전에 지우는 기준 절: "기준 수용인원 49명", "허용 값 1초", "기준: 헬멧", "기준 미설정"
+BASELINE_CLAUSE = re.compile(
+    rf'\S*(?:기준|허용|표준|평상시|임계값|경보설정)\S*(?:\s*:|[^,\d]{{0,10}}?{NUMBER}\s*\S*|\s*(?:없음|미설정))'
+)
+VALUE_TOKEN = re.compile(rf'^{NUMBER}\s*(?:{UNITS})')
+LOCATION_PARTICLE = re.compile(r'(?:에서는|에서도|에서|에)$')
+SUBJECT_PARTICLE = re.compile(r'(?<=..)(?:은|는|이|가|을|를|으로)$')
+PREDICATE_END = re.compile(r'(?:다|며|고|어요)$')
+
+# 도메인 출력에 관용적으로 등장하는 입력 외 수치 (신고 번호, 감시 시간 등)
+ALWAYS_ALLOWED_NUMBERS = {"112", "119", "12", "24"}
+
+def to_number(text):
+    """수치 문자열을 int 또는 float로 변환"""
+    return float(text) if "." in text else int(text)
+
+def format_number(value, decimals=0):
+    """입력과 같은 소수 자릿수로 수치 문자열 생성 ("22", "0.3")"""
+    if decimals:
+        return f"{value:.{decimals}f}"
+    return str(int(round(value)))
+
+def _decimals(text):
+    return len(text.split(".")[1]) if "." in text else 0
+
+def _overlaps(span, spans):
+    return any(span[0] < end and start < span[1] for start, end in spans)
+
+def _is_location_word(token):
+    word = LOCATION_PARTICLE.sub('', token)
+    return (
+        bool(word)
+        and re.match(r'[가-힣A-Za-z]|\d+[가-힣A-Za-z]', word) is not None
+        and not VALUE_TOKEN.match(word)
+        and word not in NON_LOCATION_WORDS
+    )
+
+def extract_location(text):
+    """입력 문장에서 장소/구역명 추출 ("공장 B구역", "병원 응급실 로비", 없으면 None)"""
+    masked = text.replace('"', ' ')
+    masked = TIME_PATTERN.sub(',', masked)
+    masked = NO_BASELINE_PATTERN.sub(',', masked)
+    masked = BASELINE_CLAUSE.sub(',', masked)
+    segments = [segment.split() for segment in re.split(r',|(?<!\d)\.(?!\d)', masked)]
+
+    # 1) "~에서" 조사가 붙은 장소 우선 (바로 앞의 장소 단어 최대 2개 포함)
+    for tokens in segments:
+        for i, token in enumerate(tokens):
+            if re.search(r'에서(?:는|도)?$', token) and _is_location_word(token):
+                words = [LOCATION_PARTICLE.sub('', token)]
+                for prev in reversed(tokens[max(0, i - 2):i]):
+                    if not _is_location_word(prev) or LOCATION_PARTICLE.search(prev) or SUBJECT_PARTICLE.search(prev):
+                        break
+                    words.insert(0, prev)
+                return " ".join(words)
+
+    # 2) 서술어가 없는 나열형 구간("창고 입구 작업자 2명 ...")에서 처음 나오는 장소 단어 묶음
+    for tokens in segments:
+        if any(PREDICATE_END.search(token) for token in tokens):
+            continue
+        words = []
+        for token in tokens:
+            if token in EQUIPMENT_WORDS:
+                break
+            if not _is_location_word(token) or SUBJECT_PARTICLE.search(token):
+                if words:
+                    break
+                continue
+            words.append(LOCATION_PARTICLE.sub('', token))
+            if LOCATION_PARTICLE.search(token):
+                break
+        if words:
+            return " ".join(words)
+    return None
+
+def parse_input(text):
+    """입력 문장에서 장소/측정값/기준값/차이 추출
+
+    반환 딕셔너리 키:
+        location: 장소/구역명 (없으면 None)
+        measured, baseline: 수치 문자열 (없으면 None)
+        unit: 측정 단위 ("명", "초", "m" ...)
+        count: 감지 대상 수 ("4명" 등 측정값과 별개인 인원/대수)
+        difference: 측정값 - 기준값 (부호 포함 수치, 기준 없으면 None)
+        difference_text: 출력에 쓰일 차이 절댓값 문자열 ("22")
+        has_baseline: 기준값 존재 여부 (False면 기준 미설정 입력)
+        times: 시각 표현 목록
+    """
+    time_spans = [m.span() for m in TIME_PATTERN.finditer(text)]
+    times = [m.group(0) for m in TIME_PATTERN.finditer(text)]
+
+    baseline_match = None
+    for m in BASELINE_PATTERN.finditer(text):
+        if not _overlaps(m.span(1), time_spans):
+            baseline_match = m
+            break
+
+    values = [
+        m for m in VALUE_PATTERN.finditer(text)
+        if not _overlaps(m.span(), time_spans)
+        and not (baseline_match and _overlaps(m.span(), [baseline_match.span(1)]))
+    ]
+
+    baseline = baseline_match.group(1) if baseline_match else None
+    unit = baseline_match.group(2) if baseline_match else None
+
+    # 측정값: 기준과 같은 단위의 수치, 기준이 없으면 시간/거리 수치를 인원 수보다 우선
+    measured_match = None
+    if unit:
+        measured_match = next((m for m in values if m.group(2) == unit), None)
+    if measured_match is None:
+        measured_match = next((m for m in values if m.group(2) not in COUNT_UNITS), None)
+    if measured_match is None and values:
+        measured_match = values[0]
+
+    measured = measured_match.group(1) if measured_match else None
+    if unit is None and measured_match is not None:
+        unit = measured_match.group(2)
+
+    count_match = next(
+        (m for m in values if m.group(2) in COUNT_UNITS and m is not measured_match), None
+    )
+
+    difference = difference_text = None
+    if measured is not None and baseline is not None:
+        decimals = max(_decimals(measured), _decimals(baseline))
+        difference = round(to_number(measured) - to_number(baseline), decimals)
+        difference_text = format_number(abs(difference), decimals)
+
+    return {
+        "location": extract_location(text),
+        "measured": measured,
+        "baseline": baseline,
+        "unit": unit,
+        "count": count_match.group(0) if count_match else None,
+        "difference": difference,
+        "difference_text": difference_text,
+        "has_baseline": baseline is not None and not NO_BASELINE_PATTERN.search(text),
+        "times": times,
+    }
+
+def candidate_numbers(text):
+    """출력에 등장할 수 있는 수치 집합 (입력 수치 + 계산된 차이 + 관용 수치)"""
+    parsed = parse_input(text)
+    numbers = set(re.findall(NUMBER, text)) | ALWAYS_ALLOWED_NUMBERS
+    if parsed["difference_text"] is not None:
+        numbers.add(parsed["difference_text"])
+    return numbers
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+학습/추론 계측
+구간별 시간(CSV 로드, 증강, 토큰화, collate, forward, backward, optimizer, generate),
+토큰 처리량(tokens/sec), 최대 RSS를 수집하여 로그, JSON 요약, TensorBoard로 내보냄
+선택적으로 torch.profiler 트레이스를 TensorBoard 형식으로 저장
+"""
+
+import os
+import json
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import psutil
+from transformers import TrainerCallback
+
+logger = logging.getLogger(__name__)
+
+# torch.profiler 스케줄 (wait 후 warmup, 이후 active 스텝만 기록)
+PROFILER_WAIT_STEPS = 5
+PROFILER_WARMUP_STEPS = 2
+PROFILER_ACTIVE_STEPS = 5
+
+# collate 시간을 배치에 실어 보내는 키 (데이터로더 워커 프로세스에서 잰 시간을 메인 프로세스에서 기록)
+COLLATE_TIME_KEY = "_collate_s"
+
+class Instrumentation:
+    """구간별 누적 시간/호출 수/토큰 수와 최대 RSS 수집기"""
+
+    def __init__(self, name="pko_t5"):
+        self.name = name
+        self.process = psutil.Process(os.getpid())
+        self.peak_rss = 0
+        self.phases = defaultdict(lambda: {"total_s": 0.0, "count": 0, "tokens": 0})
+
+    def update_peak_rss(self):
+        self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+
+    def record(self, name, elapsed, tokens=0):
+        phase = self.phases[name]
+        phase["total_s"] += elapsed
+        phase["count"] += 1
+        phase["tokens"] += tokens
+
+    def add_tokens(self, name, tokens):
+        self.phases[name]["tokens"] += tokens
+
+    @contextmanager
+    def phase(self, name, tokens=0):
+        """with instrumentation.phase("tokenization"): ... 구간 시간 측정"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start_time, tokens)
+            self.update_peak_rss()
+
+    def summary(self):
+        self.update_peak_rss()
+        phases = {}
+        for name, phase in self.phases.items():
+            phases[name] = dict(phase)
+            phases[name]["mean_s"] = phase["total_s"] / phase["count"] if phase["count"] else 0.0
+            if phase["tokens"] and phase["total_s"] > 0:
+                phases[name]["tokens_per_s"] = phase["tokens"] / phase["total_s"]
+        return {"name": self.name, "peak_rss_mb": self.peak_rss / 1024 ** 2, "phases": phases}
+
+    def log_summary(self):
+        summary = self.summary()
+        logger.info("=" * 50)
+        logger.info(f"[계측] {self.name} 구간별 시간 요약")
+        for name, phase in sorted(summary["phases"].items(), key=lambda item: -item[1]["total_s"]):
+            throughput = f", {phase['tokens_per_s']:.1f} tokens/sec" if "tokens_per_s" in phase else ""
+            logger.info(
+                f"  {name}: 총 {phase['total_s']:.2f}초, {phase['count']}회, "
+                f"평균 {phase['mean_s'] * 1000:.1f}ms{throughput}"
+            )
+        logger.info(f"  최대 RSS: {summary['peak_rss_mb']:.1f}MB")
+        logger.info("=" * 50)
+
+    def export(self, output_dir, step=0):
+        """JSON 요약(instrumentation_summary.json)과 TensorBoard 스칼라 저장"""
+        os.makedirs(output_dir, exist_ok=True)
+        summary = self.summary()
+        summary_path = os.path.join(output_dir, "instrumentation_summary.json")
+        with open(summary_path, "w", encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        try:
+            from torch.utils.tensorboard import SummaryWriter
+            writer = SummaryWriter(log_dir=output_dir)
+            for name, phase in summary["phases"].items():
+                writer.add_scalar(f"{self.name}/time_s/{name}", phase["total_s"], step)
+                writer.add_scalar(f"{self.name}/mean_ms/{name}", phase["mean_s"] * 1000, step)
+                if "tokens_per_s" in phase:
+                    writer.add_scalar(f"{self.name}/tokens_per_s/{name}", phase["tokens_per_s"], step)
+            writer.add_scalar(f"{self.name}/peak_rss_mb", summary["peak_rss_mb"], step)
+            writer.close()
+        except Exception as e:
+            logger.warning(f"TensorBoard 기록 실패: {e}")
+
+        logger.info(f"계측 결과 저장: {summary_path}")
+        return summary_path
+
+def maybe_phase(instrumentation, name, tokens=0):
+    """instrumentation이 None이면 아무것도 하지 않는 컨텍스트"""
+    return instrumentation.phase(name, tokens) if instrumentation is not None else nullcontext()
+
+def count_batch_tokens(batch):
+    """배치의 실제(비패딩) 입력 토큰 + 레이블 토큰 수"""
+    tokens = 0
+    if batch.get("attention_mask") is not None:
+        tokens += int(batch["attention_mask"].sum())
+    elif batch.get("input_ids") is not None:
+        tokens += batch["input_ids"].numel()
+    if batch.get("labels") is not None:
+        tokens += int((batch["labels"] != -100).sum())
+    return tokens
+
+class InstrumentedCollator:
+    """데이터 콜레이터 호출 시간을 배치의 COLLATE_TIME_KEY로 함께 반환하는 래퍼
+
+    dataloader_num_workers > 0이면 콜레이터가 워커 프로세스에서 돌아 그쪽 Instrumentation에 기록해도 사라지므로
+    시간은 배치에 실어 보내고, 모델 입력 직전에 pop_collate_time으로 꺼내 기록
+    """
+
+    def __init__(self, collator, instrumentation):
+        self.collator = collator
+        self.instrumentation = instrumentation
+
+    def __call__(self, features):
+        start_time = time.perf_counter()
+        batch = self.collator(features)
+        batch[COLLATE_TIME_KEY] = time.perf_counter() - start_time
+        return batch
+
+def pop_collate_time(inputs, instrumentation):
+    """배치에서 collate 시간을 꺼내 기록 (모델에 넘기기 전에 호출)"""
+    elapsed = inputs.pop(COLLATE_TIME_KEY, None)
+    if elapsed is not None and instrumentation is not None:
+        instrumentation.record("collate", float(elapsed))
+    return inputs
+
+def instrument_backward(accelerator, instrumentation):
+    """accelerator.backward 호출 시간을 backward 구간으로 직접 측정 (그래디언트 누적 시 마이크로 배치마다 기록)"""
+    backward = accelerator.backward
+
+    def timed_backward(loss, **kwargs):
+        with instrumentation.phase("backward"):
+            return backward(loss, **kwargs)
+
+    accelerator.backward = timed_backward
+
+class InstrumentationCallback(TrainerCallback):
+    """forward/backward/optimizer 구간 시간, 학습 tokens/sec, 최대 RSS 측정 콜백
+
+    - forward: 학습 모드 모델의 forward hook으로 측정 (평가/생성 forward는 제외)
+    - backward: instrument_backward로 accelerator.backward 호출을 직접 측정 (Trainer 쪽에서 연결)
+    - optimizer: on_pre_optimizer_step ~ on_optimizer_step
+    - profile_dir를 주면 torch.profiler 트레이스를 TensorBoard 형식으로 저장
+    - 요약 로그/내보내기는 학습 후 생성 측정까지 끝난 뒤 호출하는 쪽에서 한 번만 수행
+    """
+
+    def __init__(self, instrumentation, model, profile_dir=None):
+        self.instrumentation = instrumentation
+        self.profile_dir = profile_dir
+        self.profiler = None
+        self._step_start = None
+        self._optimizer_start = None
+        self._forward_start = None
+        self._hooks = [
+            model.register_forward_pre_hook(self._forward_pre_hook, with_kwargs=True),
+            model.register_forward_hook(self._forward_hook),
+        ]
+
+    def _forward_pre_hook(self, module, args, kwargs):
+        if module.training:
+            self._forward_start = time.perf_counter()
+            self.instrumentation.add_tokens("train", count_batch_tokens(kwargs))
+
+    def _forward_hook(self, module, args, output):
+        if module.training and self._forward_start is not None:
+            elapsed = time.perf_counter() - self._forward_start
+            self.instrumentation.record("forward", elapsed)
+            self._forward_start = None
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        if self.profile_dir:
+            import torch
+            self.profiler = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU],
+                schedule=torch.profiler.schedule(
+                    wait=PROFILER_WAIT_STEPS, warmup=PROFILER_WARMUP_STEPS, active=PROFILER_ACTIVE_STEPS, repeat=1
+                ),
+                on_trace_ready=torch.profiler.tensorboard_trace_handler(self.profile_dir),
+                record_shapes=True,
+                profile_memory=True
+            )
+            self.profiler.start()
+            logger.info(f"torch.profiler 활성화: {self.profile_dir}")
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        self._step_start = time.perf_counter()
+
+    def on_pre_optimizer_step(self, args, state, control, **kwargs):
+        self._optimizer_start = time.perf_counter()
+
+    def on_optimizer_step(self, args, state, control, **kwargs):
+        if self._optimizer_start is not None:
+            self.instrumentation.record("optimizer", time.perf_counter() - self._optimizer_start)
+            self._optimizer_start = None
+
+    def on_step_end(self, args, state, control, **kwargs):
+        if self._step_start is not None:
+            self.instrumentation.record("train", time.perf_counter() - self._step_start)
+            self._step_start = None
+        self.instrumentation.update_peak_rss()
+        if self.profiler is not None:
+            self.profiler.step()
+
+        if state.global_step % args.logging_steps == 0:
+            train = self.instrumentation.phases["train"]
+            if train["count"]:
+                logger.info(
+                    f"[계측] 스텝 {state.global_step}: 평균 스텝 시간 {train['total_s'] / train['count']:.3f}초, "
+                    f"{train['tokens'] / train['total_s']:.1f} tokens/sec, "
+                    f"최대 RSS {self.instrumentation.peak_rss / 1024 ** 2:.1f}MB"
+                )
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+        for hook in self._hooks:
+            hook.remove()
+        self._hooks = []
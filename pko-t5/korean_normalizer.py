@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+한국어 시각/수치 정규화 (학습 데이터와 추론 입력 공용)
+- 시각 표현을 24시간 "HH:MM"으로 통일: "오후 6시 45분" -> "18:45", "새벽 5시 36분" -> "05:36", "3:17" -> "03:17"
+- 수치 표기 정리: 전각 숫자 -> 반각, 천 단위 쉼표 제거("1,200명" -> "1200명"), 수치와 단위 사이 공백 제거("1.5 m" -> "1.5m")
+- 선택: 기준값이 있는 입력 끝에 계산된 차이를 명시 ("... 기준 수용인원 49명 (차이 +22명)")
+문장이 짧아지고(토큰 수 감소) 모델이 차이를 직접 계산하지 않아도 되도록 하는 것이 목적
+
+정규화는 입력과 타겟에 같이 적용해야 함 (타겟은 입력의 시각 표현을 그대로 옮겨 적으므로)
+학습 설정(data.normalize_text, data.annotate_difference)은 모델 config.json의 "input_normalization"에 저장되고
+추론 시 input_normalization(model)로 읽어 같은 정규화를 적용
+  normalize_text(text)               : 요청 1건 (추론, 결과 캐시)
+  normalize_series(series)           : pandas Series 전체 (학습 데이터)
+  python korean_normalizer.py "오후 6시 45분 로비에 71명, 기준 49명"
+"""
+
+import re
+import sys
+from functools import lru_cache
+
+from input_parser import parse_input, NUMBER, UNITS
+
+# 시각 표현 ("12시간"은 제외), 콜론 표기 ("13:13")
+TIME_EXPRESSION = re.compile(
+    r'(?:(?P<period>오전|오후|아침|저녁|밤|새벽|정오|낮|자정)\s*)?(?P<hour>\d{1,2})시(?!간)(?:\s*(?P<minute>\d{1,2})분)?'
+    r'|(?<![\d.])(?P<clock_hour>\d{1,2}):(?P<clock_minute>\d{2})(?!\d)'
+)
+THOUSANDS_SEPARATOR = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+UNIT_SPACING = re.compile(rf'({NUMBER})\s+({UNITS})(?![A-Za-z])')
+FULLWIDTH_DIGITS = str.maketrans("０１２３４５６７８９．：", "0123456789.:")
+
+# 모델 config.json에 학습 시 정규화 설정을 기록하는 키
+NORMALIZATION_CONFIG_KEY = "input_normalization"
+DEFAULT_NORMALIZATION = {"normalize_text": False, "annotate_difference": False}
+
+# 오후로 보는 시간대 (12시 미만이면 12를 더함)
+AFTERNOON_PERIODS = {"오후", "저녁"}
+# 오전으로 보는 시간대 (12시는 0시)
+MORNING_PERIODS = {"오전", "아침", "새벽", "자정"}
+
+def to_24_hour(period, hour):
+    """시간대 표현 + 12시간제 시 -> 24시간제 시"""
+    if period in AFTERNOON_PERIODS:
+        return hour + 12 if hour < 12 else hour
+    if period in MORNING_PERIODS:
+        return 0 if hour == 12 else hour
+    if period == "밤":
+        # "밤 11시" -> 23시, "밤 12시" -> 0시, "밤 1시" -> 1시
+        if hour == 12:
+            return 0
+        return hour + 12 if hour >= 6 else hour
+    if period in ("낮", "정오"):
+        return hour + 12 if hour <= 6 else hour
+    return hour
+
+def _time_replacement(match):
+    if match.group("clock_hour") is not None:
+        hour, minute = int(match.group("clock_hour")), int(match.group("clock_minute"))
+    else:
+        hour = to_24_hour(match.group("period"), int(match.group("hour")))
+        minute = int(match.group("minute") or 0)
+    if hour > 23 or minute > 59:
+        return match.group(0)
+    return f"{hour:02d}:{minute:02d}"
+
+def annotate_difference(text):
+    """기준값이 있으면 문장 끝에 "(차이 +22명)" 추가 (부호: 측정값 - 기준값)"""
+    parsed = parse_input(text)
+    if parsed["difference"] is None or not parsed["has_baseline"]:
+        return text
+    sign = "+" if parsed["difference"] > 0 else "-" if parsed["difference"] < 0 else ""
+    return f"{text} (차이 {sign}{parsed['difference_text']}{parsed['unit'] or ''})"
+
+def normalize_numbers(text):
+    text = text.translate(FULLWIDTH_DIGITS)
+    text = THOUSANDS_SEPARATOR.sub('', text)
+    return UNIT_SPACING.sub(r'\1\2', text)
+
+@lru_cache(maxsize=4096)
+def normalize_text(text, with_difference=False):
+    """문장 하나 정규화 (추론 요청용, 같은 입력은 캐시)"""
+    text = TIME_EXPRESSION.sub(_time_replacement, normalize_numbers(text))
+    return annotate_difference(text) if with_difference else text
+
+def normalize_series(series, with_difference=False):
+    """pandas Series 정규화 (str 접근자로 Series 단위 일괄 치환)"""
+    series = (
+        series.str.translate(FULLWIDTH_DIGITS)
+        .str.replace(THOUSANDS_SEPARATOR, '', regex=True)
+        .str.replace(UNIT_SPACING, r'\1\2', regex=True)
+        .str.replace(TIME_EXPRESSION, _time_replacement, regex=True)
+    )
+    return series.map(annotate_difference, na_action="ignore") if with_difference else series
+
+def input_normalization(model):
+    """모델 config에 기록된 입력 정규화 설정 (기록이 없는 모델은 정규화하지 않음)"""
+    settings = getattr(getattr(model, "config", None), NORMALIZATION_CONFIG_KEY, None)
+    return {**DEFAULT_NORMALIZATION, **(settings or {})}
+
+def normalize_input(text, normalization):
+    """input_normalization 설정대로 입력 정규화 (설정이 꺼져 있으면 그대로)"""
+    if not normalization or not normalization["normalize_text"]:
+        return text
+    return normalize_text(text, with_difference=normalization["annotate_difference"])
+
+def main():
+    texts = sys.argv[1:] or ["오후 6시 45분 로비에 71명 밀집, 기준 수용인원 49명", "새벽 5시 36분 공장에서 화염 2초, 기준치 1초"]
+    for text in texts:
+        print(f"{text}\n -> {normalize_text(text, with_difference=True)}")
+
+if __name__ == "__main__":
+    main()
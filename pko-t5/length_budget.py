@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+도메인별 생성 길이 예산과 문장 수 기반 조기 종료
+학습 타겟(Output) 길이 분포에서 도메인별 max_new_tokens와 최대 문장 수를 산출하고,
+생성 중 문장 종결 부호가 그 수에 도달하면 멈추는 StoppingCriteria 제공
+(max_length=512 전체를 소모하는 폭주 출력의 최악 지연 시간 제한)
+"""
+
+import os
+import re
+import json
+import math
+import logging
+from functools import lru_cache
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+from slm_training.config import default_csv_files
+
+logger = logging.getLogger(__name__)
+
+LENGTH_BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "length_budgets.json")
+MODEL_PATH = "BBoDDoGood/SLM_pko-t5"
+
+# 타겟 토큰 길이의 상위 분위수에 여유 배율을 곱해 예산으로 사용
+TOKEN_QUANTILE = 0.99
+TOKEN_MARGIN = 1.2
+
+# 문장 종결 부호 (소수점 "1.9m"처럼 숫자 뒤의 마침표는 제외)
+SENTENCE_END = re.compile(r'(?<!\d)[.!?]')
+
+def count_sentences(text):
+    """문장 종결 부호 개수"""
+    return len(SENTENCE_END.findall(text))
+
+def compute_length_budgets(df, tokenizer):
+    """도메인별 {max_new_tokens, max_sentences} 계산"""
+    budgets = {}
+    for domain, domain_df in df.groupby('Domain'):
+        outputs = domain_df['Output'].tolist()
+        token_lengths = [len(ids) for ids in tokenizer(outputs)["input_ids"]]
+        token_lengths.sort()
+        quantile_index = min(len(token_lengths) - 1, int(TOKEN_QUANTILE * len(token_lengths)))
+        sentence_counts = [count_sentences(text) for text in outputs]
+
+        budgets[domain] = {
+            "max_new_tokens": math.ceil(token_lengths[quantile_index] * TOKEN_MARGIN),
+            "max_sentences": max(sentence_counts),
+        }
+        logger.info(
+            f"{domain}: 토큰 p{int(TOKEN_QUANTILE * 100)} {token_lengths[quantile_index]} -> "
+            f"예산 {budgets[domain]['max_new_tokens']}, 최대 문장 수 {budgets[domain]['max_sentences']}"
+        )
+    return budgets
+
+def save_length_budgets(budgets, path=LENGTH_BUDGET_PATH):
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump(budgets, f, ensure_ascii=False, indent=2)
+    logger.info(f"길이 예산 저장: {path}")
+
+def load_length_budgets(path=LENGTH_BUDGET_PATH):
+    """저장된 길이 예산 로드 (없으면 빈 딕셔너리)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+@lru_cache(maxsize=4)
+def sentence_end_tables(tokenizer):
+    """토큰 id별 (문장 종결 부호 수, 부호로 시작 여부, 숫자로 끝남 여부) 테이블
+
+    마지막 칸은 토크나이저 범위를 벗어난 id용 0 (모델 vocab이 더 클 수 있음)
+    """
+    pieces = tokenizer.batch_decode([[i] for i in range(len(tokenizer))], skip_special_tokens=True)
+    pieces.append("")
+    counts = torch.tensor([count_sentences(piece) for piece in pieces], dtype=torch.long)
+    leading = torch.tensor([bool(SENTENCE_END.match(piece)) for piece in pieces], dtype=torch.bool)
+    digit_end = torch.tensor([bool(re.search(r'\d$', piece)) for piece in pieces], dtype=torch.bool)
+    return counts, leading, digit_end
+
+class SentenceCountStoppingCriteria(StoppingCriteria):
+    """생성된 문장 종결 부호 수가 max_sentences에 도달한 시퀀스를 종료
+
+    매 스텝 전체 시퀀스를 디코딩하지 않고 토큰 id 테이블 조회로 센다.
+    빔 서치는 스텝마다 행을 재배열하므로 행별 누적값 대신 테이블 합으로 다시 센다.
+    """
+
+    def __init__(self, tokenizer, max_sentences, prompt_length=1):
+        self.max_sentences = max_sentences
+        self.prompt_length = prompt_length  # 인코더-디코더는 decoder start 토큰 1개
+        self.counts, self.leading, self.digit_end = sentence_end_tables(tokenizer)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.counts.device != input_ids.device:
+            self.counts = self.counts.to(input_ids.device)
+            self.leading = self.leading.to(input_ids.device)
+            self.digit_end = self.digit_end.to(input_ids.device)
+        ids = input_ids[:, self.prompt_length:].clamp(min=0, max=len(self.counts) - 1)
+        sentences = self.counts[ids].sum(dim=1)
+        # "1" + ".9"처럼 토큰 경계에서 숫자 뒤에 오는 마침표는 제외
+        sentences -= (self.leading[ids[:, 1:]] & self.digit_end[ids[:, :-1]]).sum(dim=1)
+        return sentences >= self.max_sentences
+
+def budget_generation_kwargs(tokenizer, length_budgets, input_text):
+    """"도메인, 입력" 문장의 도메인 예산에 맞는 generate 인자 (예산 없으면 빈 딕셔너리)"""
+    domain = input_text.split(", ", 1)[0]
+    budget = (length_budgets or {}).get(domain)
+    if budget is None:
+        return {}
+    return {
+        "max_new_tokens": budget["max_new_tokens"],
+        "stopping_criteria": StoppingCriteriaList([
+            SentenceCountStoppingCriteria(tokenizer, budget["max_sentences"])
+        ]),
+    }
+
+def apply_length_budget(gen_kwargs, tokenizer, length_budgets, input_text):
+    """generate 인자에 도메인 예산 적용 (예산이 있으면 max_length 대신 max_new_tokens 사용)"""
+    overrides = budget_generation_kwargs(tokenizer, length_budgets, input_text)
+    if overrides:
+        gen_kwargs.pop("max_length", None)
+        gen_kwargs.update(overrides)
+    return gen_kwargs
+
+def main():
+    """도메인 CSV에서 길이 예산을 계산해 length_budgets.json으로 저장"""
+    import pandas as pd
+    from transformers import AutoTokenizer
+
+    all_data = [pd.read_csv(f, encoding='utf-8') for f in default_csv_files() if os.path.exists(f)]
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+    df = pd.concat(all_data, ignore_index=True).dropna(subset=['Domain', 'Output'])
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    save_length_budgets(compute_length_budgets(df, tokenizer))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+upload_model.py 검증용 로컬 대체 허브 서버 (내용 주소 기반 객체 저장소 + 청크 업로드)
+- GET  /api/repos/<repo_id>/files                : 저장소 파일 목록 {경로: {sha256, size}}
+- GET  /api/repos/<repo_id>/resolve/<경로>        : 파일 내용
+- POST /api/repos/<repo_id>/commit               : {"files": {경로: {sha256, size}}, "message": ...} 파일 목록 갱신
+- GET  /api/objects/<sha256>/chunks              : 객체 완료 여부와 이미 받은 청크 번호 (재개용)
+- PUT  /api/objects/<sha256>/chunks/<번호>        : 청크 저장
+- POST /api/objects/<sha256>/complete            : {"num_chunks": n} 청크를 합쳐 해시 검증 후 객체로 저장
+  python local_hub.py --root /tmp/local_hub --port 8900
+  python local_hub.py --fail-rate 0.3      # 청크 업로드를 일정 확률로 실패시켜 재시도/재개 확인
+"""
+
+import os
+import re
+import json
+import random
+import shutil
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HUB_ROOT = "/tmp/local_hub"
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8900
+COPY_BUFFER = 8 * 1024 * 1024
+
+REPO_ROUTE = re.compile(r'^/api/repos/(?P<repo>[^/]+/[^/]+)/(?P<action>files|commit|resolve/(?P<path>.+))$')
+OBJECT_ROUTE = re.compile(r'^/api/objects/(?P<sha>[0-9a-f]{64})/(?P<action>chunks|complete)(?:/(?P<index>\d+))?$')
+
+class LocalHubStore:
+    """객체(sha256 이름), 업로드 중인 청크, 저장소별 파일 목록을 디렉토리에 보관"""
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        for name in ("objects", "chunks", "repos"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def object_path(self, sha):
+        return os.path.join(self.root, "objects", sha)
+
+    def chunk_dir(self, sha):
+        return os.path.join(self.root, "chunks", sha)
+
+    def refs_path(self, repo_id):
+        return os.path.join(self.root, "repos", repo_id.replace("/", "__") + ".json")
+
+    def files(self, repo_id):
+        path = self.refs_path(repo_id)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def received_chunks(self, sha):
+        chunk_dir = self.chunk_dir(sha)
+        if not os.path.isdir(chunk_dir):
+            return []
+        return sorted(int(name) for name in os.listdir(chunk_dir) if name.isdigit())
+
+    def put_chunk(self, sha, index, data):
+        chunk_dir = self.chunk_dir(sha)
+        os.makedirs(chunk_dir, exist_ok=True)
+        tmp_path = os.path.join(chunk_dir, f"{index}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(chunk_dir, str(index)))
+
+    def complete(self, sha, num_chunks):
+        """청크를 순서대로 합쳐 해시가 맞으면 객체로 등록 (반환: 오류 메시지 또는 None)"""
+        missing = sorted(set(range(num_chunks)) - set(self.received_chunks(sha)))
+        if missing:
+            return f"누락된 청크: {missing}"
+        tmp_path = self.object_path(sha) + ".tmp"
+        digest = hashlib.sha256()
+        with open(tmp_path, "wb") as out:
+            for index in range(num_chunks):
+                with open(os.path.join(self.chunk_dir(sha), str(index)), "rb") as f:
+                    while True:
+                        block = f.read(COPY_BUFFER)
+                        if not block:
+                            break
+                        digest.update(block)
+                        out.write(block)
+        if digest.hexdigest() != sha:
+            os.remove(tmp_path)
+            shutil.rmtree(self.chunk_dir(sha), ignore_errors=True)
+            return "해시 불일치"
+        os.replace(tmp_path, self.object_path(sha))
+        shutil.rmtree(self.chunk_dir(sha), ignore_errors=True)
+        return None
+
+    def commit(self, repo_id, files):
+        missing = [path for path, info in files.items() if not os.path.exists(self.object_path(info["sha256"]))]
+        if missing:
+            return f"업로드되지 않은 객체: {missing}"
+        with self.lock:
+            refs = self.files(repo_id)
+            refs.update(files)
+            with open(self.refs_path(repo_id), "w", encoding='utf-8') as f:
+                json.dump(refs, f, ensure_ascii=False, indent=2)
+        return None
+
+class LocalHubRequestHandler(BaseHTTPRequestHandler):
+    store = None
+    fail_rate = 0.0
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_file(self, path):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, COPY_BUFFER)
+
+    def do_GET(self):
+        repo_match, object_match = REPO_ROUTE.match(self.path), OBJECT_ROUTE.match(self.path)
+        if repo_match and repo_match.group("action") == "files":
+            self._send_json(200, {"files": self.store.files(repo_match.group("repo"))})
+        elif repo_match and repo_match.group("path"):
+            info = self.store.files(repo_match.group("repo")).get(repo_match.group("path"))
+            if info is None:
+                self._send_json(404, {"error": "not found"})
+            else:
+                self._send_file(self.store.object_path(info["sha256"]))
+        elif object_match and object_match.group("action") == "chunks" and object_match.group("index") is None:
+            sha = object_match.group("sha")
+            self._send_json(200, {
+                "complete": os.path.exists(self.store.object_path(sha)),
+                "chunks": self.store.received_chunks(sha),
+            })
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_PUT(self):
+        match = OBJECT_ROUTE.match(self.path)
+        if not match or match.group("index") is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        data = self._read_body()
+        if random.random() < self.fail_rate:
+            self._send_json(503, {"error": "의도적 실패 (--fail-rate)"})
+            return
+        self.store.put_chunk(match.group("sha"), int(match.group("index")), data)
+        self._send_json(200, {"received": len(data)})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self._read_body() or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        repo_match, object_match = REPO_ROUTE.match(self.path), OBJECT_ROUTE.match(self.path)
+        if object_match and object_match.group("action") == "complete":
+            error = self.store.complete(object_match.group("sha"), int(body.get("num_chunks", 0)))
+        elif repo_match and repo_match.group("action") == "commit":
+            error = self.store.commit(repo_match.group("repo"), body.get("files", {}))
+            if error is None:
+                logger.info(f"커밋: {repo_match.group('repo')} {body.get('message', '')} ({len(body.get('files', {}))}개 파일)")
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+        if error:
+            self._send_json(400, {"error": error})
+        else:
+            self._send_json(200, {"ok": True})
+
+def main():
+    parser = argparse.ArgumentParser(description="upload_model.py 검증용 로컬 허브 서버")
+    parser.add_argument("--root", default=HUB_ROOT)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="청크 업로드를 실패시킬 확률 (재시도/재개 확인용)")
+    args = parser.parse_args()
+
+    LocalHubRequestHandler.store = LocalHubStore(args.root)
+    LocalHubRequestHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), LocalHubRequestHandler)
+    logger.info(f"🚀 로컬 허브 시작: http://{args.host}:{args.port} (저장 위치 {args.root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
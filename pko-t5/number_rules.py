@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+도메인별 출력 수치 규칙 (학습 타겟에서 산출)
+- 허용 수치: 입력 수치 + 차이 + 시각의 시/분 표기("09:00" -> "9시") + 도메인별 파생 수치
+  (연기/화염 후속 기준 "이후 8초 이상" = 측정값 + k, 폐쇄시간 "8시간 후" 같은 관용 수치)
+- 필수 수치: 기준 대비 초과/미만/같음/기준 없음 경우별로 타겟 대부분(REQUIRED_RATIO)에 등장하는 필드(측정값, 기준값, 차이)
+  -> 디코딩에서 약한 가산/감점만 (해당 수치 없이 끝나는 타겟도 있으므로)
+- 강제 수치: 경우별 타겟 전부에 등장하는 필드 -> force 모드에서 나오기 전까지 종료(EOS) 차단
+- 수치 제약 디코딩(constrained_decoding)과 오답 예제 마이닝(hard_examples)이 같은 규칙을 사용
+  python number_rules.py           # CSV에서 규칙 산출 후 number_rules.json 저장 + 도메인별 커버리지 출력
+  python number_rules.py --check   # 저장된 규칙의 커버리지가 MIN_COVERAGE 미만인 도메인이 있으면 종료 코드 1
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+from collections import Counter
+
+from input_parser import parse_input, candidate_numbers, to_number, format_number, NUMBER, TIME_PATTERN
+
+logger = logging.getLogger(__name__)
+
+NUMBER_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "number_rules.json")
+
+# 파생 규칙으로 채택할 최소 설명 건수와 측정값/기준값 대비 오프셋 탐색 범위
+MIN_RULE_COUNT = 20
+MAX_OFFSET = 20
+# 경우별 타겟에서 이 비율 이상 등장하는 필드를 필수 수치로 사용 (강제 수치는 모든 타겟에 등장하는 필드만)
+REQUIRED_RATIO = 0.9
+FORCED_RATIO = 1.0
+# --check 통과 기준 (타겟 수치가 모두 허용 수치인 행 비율)
+MIN_COVERAGE = 0.99
+
+REQUIRED_FIELDS = ("measured", "baseline", "difference_text")
+CLOCK_TIME = re.compile(r'(\d{1,2}):(\d{2})')
+HOUR_MINUTE = re.compile(r'(\d{1,2})시(?:\s*(\d{1,2})분)?')
+
+_NUMBER_RULES = {}
+
+def split_domain(input_text, rules):
+    """"도메인, 입력" 문장에서 (도메인, 입력) 분리 (알 수 없는 도메인이면 (None, 전체))"""
+    head, _, rest = input_text.partition(", ")
+    head = head.rsplit(": ", 1)[-1]  # "분석: " 같은 입력 접두어
+    if head in rules:
+        return head, rest
+    return None, input_text
+
+def time_numbers(text):
+    """시각 표현의 시/분 표기 수치 ("09:05" -> 9, 5, "19:58" -> 19, 7, 58)"""
+    numbers = set()
+    for expression in TIME_PATTERN.findall(text):
+        match = CLOCK_TIME.search(expression) or HOUR_MINUTE.search(expression)
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        numbers.update({str(hour), str(hour % 12 or 12), str(minute)})
+    return numbers
+
+def case_of(parsed):
+    """기준 대비 경우: over / under / equal / no_baseline"""
+    if not parsed["has_baseline"] or parsed["difference"] is None:
+        return "no_baseline"
+    if parsed["difference"] > 0:
+        return "over"
+    return "under" if parsed["difference"] < 0 else "equal"
+
+def _offset_number(value, offset):
+    decimals = len(value.split(".")[1]) if "." in value else 0
+    result = to_number(value) + offset
+    return format_number(result, decimals) if result >= 0 else None
+
+def _explains(kind, value, parsed, number):
+    if kind == "constants":
+        return number == value
+    field = kind.split("_")[0]
+    return parsed[field] is not None and number == _offset_number(parsed[field], value)
+
+def _base_numbers(input_text):
+    return candidate_numbers(input_text) | time_numbers(input_text)
+
+def allowed_numbers(input_text, rules=None):
+    """출력에 등장할 수 있는 수치 집합 ("도메인, 입력" 또는 입력만)"""
+    rules = load_number_rules() if rules is None else rules
+    domain, text = split_domain(input_text, rules)
+    parsed = parse_input(text)
+    numbers = _base_numbers(text)
+    rule = rules.get(domain)
+    if rule is None:
+        return numbers
+    for field, offsets in (("measured", rule["measured_offsets"]), ("baseline", rule["baseline_offsets"])):
+        if parsed[field] is not None:
+            numbers.update(n for n in (_offset_number(parsed[field], k) for k in offsets) if n is not None)
+    numbers.update(rule["constants"])
+    return numbers
+
+def _case_numbers(input_text, rules, key):
+    rules = load_number_rules() if rules is None else rules
+    domain, text = split_domain(input_text, rules)
+    rule = rules.get(domain)
+    if rule is None:
+        return set()
+    parsed = parse_input(text)
+    return {parsed[field] for field in rule[key].get(case_of(parsed), []) if parsed[field] is not None}
+
+def must_include_numbers(input_text, rules=None):
+    """타겟에 거의 항상(REQUIRED_RATIO 이상) 등장하는 수치 (도메인/경우별 필수 필드 값)"""
+    return _case_numbers(input_text, rules, "required")
+
+def forced_numbers(input_text, rules=None):
+    """타겟 전부에 등장하는 수치 (생성 전에는 종료를 막아도 되는 값)"""
+    return _case_numbers(input_text, rules, "forced")
+
+def fit_number_rules(df):
+    """도메인별 {measured_offsets, baseline_offsets, constants, required} 산출
+
+    입력/차이/시각으로 설명되지 않는 타겟 수치를 가장 많이 설명하는 후보(측정값+k, 기준값+k, 상수)부터
+    MIN_RULE_COUNT 이상 설명하는 동안 탐욕적으로 채택
+    """
+    rules = {}
+    for domain, domain_df in df.groupby('Domain'):
+        rows = []
+        case_counts, field_counts = Counter(), Counter()
+        for input_text, output in zip(domain_df['Input'], domain_df['Output']):
+            parsed = parse_input(input_text)
+            numbers = set(re.findall(NUMBER, output))
+            case = case_of(parsed)
+            case_counts[case] += 1
+            for field in REQUIRED_FIELDS:
+                if parsed[field] is not None and parsed[field] in numbers:
+                    field_counts[case, field] += 1
+            unexplained = numbers - _base_numbers(input_text)
+            if unexplained:
+                rows.append((parsed, unexplained))
+
+        rule = {"measured_offsets": [], "baseline_offsets": [], "constants": []}
+        while rows:
+            candidates = Counter()
+            for parsed, unexplained in rows:
+                for number in unexplained:
+                    candidates["constants", number] += 1
+                    for field in ("measured", "baseline"):
+                        if parsed[field] is None or "." in number or "." in parsed[field]:
+                            continue
+                        offset = int(number) - int(parsed[field])
+                        if offset != 0 and abs(offset) <= MAX_OFFSET:
+                            candidates[f"{field}_offsets", offset] += 1
+            if not candidates:
+                break
+            (kind, value), count = candidates.most_common(1)[0]
+            if count < MIN_RULE_COUNT:
+                break
+            rule[kind].append(value)
+            rows = [(parsed, {n for n in unexplained if not _explains(kind, value, parsed, n)}) for parsed, unexplained in rows]
+            rows = [(parsed, unexplained) for parsed, unexplained in rows if unexplained]
+
+        rule["measured_offsets"].sort()
+        rule["baseline_offsets"].sort()
+        rule["constants"].sort(key=float)
+        for key, ratio in (("required", REQUIRED_RATIO), ("forced", FORCED_RATIO)):
+            rule[key] = {
+                case: [field for field in REQUIRED_FIELDS if field_counts[case, field] >= ratio * total]
+                for case, total in case_counts.items()
+            }
+        rules[domain] = rule
+    return rules
+
+def coverage(df, rules):
+    """도메인별 타겟 수치가 모두 허용 수치인 행 비율"""
+    result = {}
+    for domain, domain_df in df.groupby('Domain'):
+        covered = sum(
+            set(re.findall(NUMBER, output)) <= allowed_numbers(f"{domain}, {input_text}", rules)
+            for input_text, output in zip(domain_df['Input'], domain_df['Output'])
+        )
+        result[domain] = covered / len(domain_df)
+    return result
+
+def save_number_rules(rules, path=NUMBER_RULES_PATH):
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump(rules, f, ensure_ascii=False, indent=2)
+    logger.info(f"수치 규칙 저장: {path}")
+
+def load_number_rules(path=NUMBER_RULES_PATH):
+    """저장된 수치 규칙 로드 (한 번 로드하면 재사용)
+
+    규칙 없이는 도메인 파생 수치(연기/화염 후속 기준 등)가 금지되어 정상 타겟도 만들 수 없으므로 없으면 오류
+    """
+    if path not in _NUMBER_RULES:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"수치 규칙이 없습니다 ({path}). python number_rules.py로 생성하세요.")
+        with open(path, encoding='utf-8') as f:
+            _NUMBER_RULES[path] = json.load(f)
+    return _NUMBER_RULES[path]
+
+def main():
+    import pandas as pd
+    from slm_training.config import default_csv_files
+
+    all_data = [pd.read_csv(f, encoding='utf-8') for f in default_csv_files() if os.path.exists(f)]
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+    df = pd.concat(all_data, ignore_index=True).dropna(subset=['Domain', 'Input', 'Output'])
+
+    check = "--check" in sys.argv[1:]
+    rules = load_number_rules() if check else fit_number_rules(df)
+    failed = []
+    for domain, ratio in coverage(df, rules).items():
+        logger.info(f"{domain}: 타겟 수치 커버리지 {ratio:.2%} (규칙 {rules.get(domain)})")
+        if ratio < MIN_COVERAGE:
+            failed.append(domain)
+    if failed:
+        logger.error(f"커버리지 {MIN_COVERAGE:.0%} 미만 도메인: {failed}")
+    if check:
+        return 1 if failed else 0
+    save_number_rules(rules)
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+도메인 코퍼스 기반 PKO-T5 어휘(vocab) 가지치기 도구
+CSV 코퍼스에서 실제 사용되는 토큰만 남겨 임베딩/LM head 행렬을 잘라내고,
+원본 토크나이저 위에 id 매핑 계층을 두어 더 작은 체크포인트와 빠른 디코딩을 제공
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import datetime
+import pandas as pd
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers.tokenization_utils_base import BatchEncoding
+from slm_training.config import default_csv_files
+
+MODEL_PATH = "BBoDDoGood/SLM_pko-t5"
+
+OUTPUT_DIR = "/Volumes/Data/slm_model_pruned"
+MAPPING_FILE = "vocab_mapping.json"
+
+# 학습/추론에 쓰이는 입력 prefix (토큰 경계에 영향을 주므로 함께 스캔)
+INPUT_PREFIXES = ["분석: ", "수학 분석: ", "수학 계산 분석: "]
+
+BENCHMARK_SAMPLES = 20
+BENCHMARK_NEW_TOKENS = 64
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(f'pko_t5_prune_vocab_log_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def load_corpus_texts(csv_files):
+    """CSV 코퍼스에서 모델 입력/출력 문자열 수집"""
+    all_data = []
+    for csv_file in csv_files:
+        if os.path.exists(csv_file):
+            df = pd.read_csv(csv_file, encoding='utf-8')
+            all_data.append(df)
+            logger.info(f"로드된 파일: {csv_file}, 데이터 수: {len(df)}")
+        else:
+            logger.warning(f"파일을 찾을 수 없음: {csv_file}")
+
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+
+    df = pd.concat(all_data, ignore_index=True).dropna(subset=['Domain', 'Input', 'Output'])
+    inputs = (df['Domain'] + ", " + df['Input']).tolist()
+    texts = [prefix + text for prefix in INPUT_PREFIXES for text in inputs]
+    texts += df['Output'].tolist()
+    return texts, df
+
+def collect_kept_token_ids(tokenizer, texts, batch_size=1000):
+    """코퍼스에서 사용된 토큰 + 특수 토큰 + 숫자/단일 문자 토큰을 유지 대상으로 선택"""
+    kept = set(tokenizer.all_special_ids)
+
+    for start in range(0, len(texts), batch_size):
+        encodings = tokenizer(texts[start:start + batch_size], add_special_tokens=True)
+        for ids in encodings["input_ids"]:
+            kept.update(ids)
+    corpus_tokens = len(kept)
+
+    # 처음 보는 수치/문자도 분해해서 표현할 수 있도록 숫자 토큰과 단일 문자(바이트) 토큰 유지
+    for token_id, token in enumerate(tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))):
+        if token is None:
+            continue
+        stripped = token.lstrip("▁Ġ")
+        if re.fullmatch(r'[\d.,:]+', stripped) or len(stripped) <= 1:
+            kept.add(token_id)
+
+    kept_ids = sorted(kept)
+    logger.info(
+        f"유지 토큰 수: {len(kept_ids)} / {len(tokenizer)} "
+        f"(코퍼스 사용 {corpus_tokens}개, 숫자/단일 문자 보강 {len(kept_ids) - corpus_tokens}개)"
+    )
+    return kept_ids
+
+def prune_model_vocab(model, kept_ids):
+    """공유 임베딩과 LM head에서 유지 토큰 행만 잘라 새 vocab 크기로 교체"""
+    index = torch.tensor(kept_ids, dtype=torch.long)
+    old_to_new = {old: new for new, old in enumerate(kept_ids)}
+
+    old_embeddings = model.get_input_embeddings()
+    new_embeddings = torch.nn.Embedding(len(kept_ids), old_embeddings.embedding_dim)
+    new_embeddings.weight.data = old_embeddings.weight.data[index].clone()
+    model.set_input_embeddings(new_embeddings)
+
+    old_lm_head = model.get_output_embeddings()
+    new_lm_head = torch.nn.Linear(old_lm_head.in_features, len(kept_ids), bias=False)
+    new_lm_head.weight.data = old_lm_head.weight.data[index].clone()
+    model.set_output_embeddings(new_lm_head)
+
+    model.config.vocab_size = len(kept_ids)
+    for config in (model.config, model.generation_config):
+        for key in ("pad_token_id", "eos_token_id", "decoder_start_token_id"):
+            old_id = getattr(config, key, None)
+            if old_id is not None:
+                setattr(config, key, old_to_new[old_id])
+
+    if model.config.tie_word_embeddings:
+        model.tie_weights()
+    return model
+
+class PrunedVocabTokenizer:
+    """원본 토크나이저 위에서 원본 id <-> 축소 vocab id를 변환하는 매핑 계층"""
+
+    def __init__(self, base_tokenizer, kept_ids):
+        self.base = base_tokenizer
+        self.kept_ids = list(kept_ids)
+        self.old_to_new = {old: new for new, old in enumerate(self.kept_ids)}
+        self.unk_token_id = self.old_to_new.get(base_tokenizer.unk_token_id, 0)
+        self._fallback_cache = {}
+
+    @property
+    def pad_token_id(self):
+        return self.old_to_new[self.base.pad_token_id]
+
+    @property
+    def eos_token_id(self):
+        return self.old_to_new[self.base.eos_token_id]
+
+    def __len__(self):
+        return len(self.kept_ids)
+
+    def _fallback(self, old_id):
+        """축소 vocab에 없는 토큰은 문자 단위로 다시 분해해 유지 토큰으로 표현"""
+        if old_id not in self._fallback_cache:
+            text = self.base.decode([old_id])
+            new_ids = []
+            for char in text:
+                char_ids = self.base(char, add_special_tokens=False)["input_ids"]
+                if not char_ids or any(i not in self.old_to_new for i in char_ids):
+                    new_ids = [self.unk_token_id]
+                    break
+                new_ids.extend(self.old_to_new[i] for i in char_ids)
+            self._fallback_cache[old_id] = new_ids or [self.unk_token_id]
+        return self._fallback_cache[old_id]
+
+    def map_ids(self, ids):
+        """원본 id 시퀀스를 축소 vocab id 시퀀스로 변환"""
+        new_ids = []
+        for old_id in ids:
+            if old_id in self.old_to_new:
+                new_ids.append(self.old_to_new[old_id])
+            else:
+                new_ids.extend(self._fallback(old_id))
+        return new_ids
+
+    def __call__(self, text, return_tensors=None, padding=False, max_length=None, truncation=False, **kwargs):
+        encodings = self.base(text, max_length=max_length, truncation=truncation, **kwargs)
+        is_batched = not isinstance(text, str)
+        sequences = encodings["input_ids"] if is_batched else [encodings["input_ids"]]
+        sequences = [self.map_ids(ids) for ids in sequences]
+
+        # 문자 단위 분해로 길어진 경우 다시 최대 길이에 맞춤 (EOS 유지)
+        if truncation and max_length:
+            sequences = [
+                ids if len(ids) <= max_length else ids[:max_length - 1] + [self.eos_token_id]
+                for ids in sequences
+            ]
+
+        if padding or return_tensors is not None:
+            longest = max(len(ids) for ids in sequences)
+            attention_mask = [[1] * len(ids) + [0] * (longest - len(ids)) for ids in sequences]
+            sequences = [ids + [self.pad_token_id] * (longest - len(ids)) for ids in sequences]
+        else:
+            attention_mask = [[1] * len(ids) for ids in sequences]
+
+        data = {"input_ids": sequences, "attention_mask": attention_mask}
+        if not is_batched and return_tensors is None:
+            data = {k: v[0] for k, v in data.items()}
+        return BatchEncoding(data, tensor_type=return_tensors)
+
+    def decode(self, ids, **kwargs):
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        return self.base.decode([self.kept_ids[i] for i in ids], **kwargs)
+
+    def batch_decode(self, sequences, **kwargs):
+        return [self.decode(ids, **kwargs) for ids in sequences]
+
+    def save_pretrained(self, output_dir):
+        self.base.save_pretrained(output_dir)
+        with open(os.path.join(output_dir, MAPPING_FILE), "w", encoding='utf-8') as f:
+            json.dump({"kept_ids": self.kept_ids}, f)
+
+    @classmethod
+    def from_pretrained(cls, model_dir, **kwargs):
+        base = AutoTokenizer.from_pretrained(model_dir, **kwargs)
+        with open(os.path.join(model_dir, MAPPING_FILE), encoding='utf-8') as f:
+            kept_ids = json.load(f)["kept_ids"]
+        return cls(base, kept_ids)
+
+def load_pruned_model(model_dir, device="cpu"):
+    """가지치기된 체크포인트와 매핑 토크나이저 로드"""
+    tokenizer = PrunedVocabTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_dir).to(device)
+    return model, tokenizer
+
+def benchmark_decoding(model, tokenizer, texts, label):
+    """고정 길이 탐욕적 생성으로 토큰당 디코딩 시간 측정"""
+    model.eval()
+    elapsed, generated_tokens, outputs = 0.0, 0, []
+    for text in texts:
+        inputs = tokenizer(text, return_tensors="pt", max_length=256, truncation=True)
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = model.generate(
+                **inputs,
+                max_new_tokens=BENCHMARK_NEW_TOKENS,
+                num_beams=1,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+                eos_token_id=tokenizer.eos_token_id
+            )
+        elapsed += time.perf_counter() - start
+        generated_tokens += output.shape[1] - 1
+        outputs.append(tokenizer.decode(output[0], skip_special_tokens=True))
+
+    ms_per_token = 1000 * elapsed / max(generated_tokens, 1)
+    logger.info(f"[{label}] 토큰당 디코딩 시간: {ms_per_token:.2f}ms ({generated_tokens} 토큰)")
+    return ms_per_token, outputs
+
+def main():
+    """메인 실행 함수 (코퍼스 스캔 -> vocab 축소 -> 저장 -> 속도/일치율 비교)"""
+    logger.info(f"원본 모델 로드: {MODEL_PATH}")
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH)
+    original_params = sum(p.numel() for p in model.parameters())
+
+    texts, df = load_corpus_texts(default_csv_files())
+    kept_ids = collect_kept_token_ids(tokenizer, texts)
+
+    benchmark_texts = ("분석: " + df['Domain'] + ", " + df['Input']).sample(
+        n=min(BENCHMARK_SAMPLES, len(df)), random_state=42
+    ).tolist()
+    original_ms, original_outputs = benchmark_decoding(model, tokenizer, benchmark_texts, "원본")
+
+    pruned_model = prune_model_vocab(model, kept_ids)
+    pruned_tokenizer = PrunedVocabTokenizer(tokenizer, kept_ids)
+    pruned_params = sum(p.numel() for p in pruned_model.parameters())
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    pruned_model.save_pretrained(OUTPUT_DIR)
+    pruned_tokenizer.save_pretrained(OUTPUT_DIR)
+    logger.info(f"가지치기된 체크포인트 저장: {OUTPUT_DIR}")
+    logger.info(f"파라미터 수: {original_params:,} -> {pruned_params:,} ({pruned_params / original_params:.1%})")
+
+    pruned_ms, pruned_outputs = benchmark_decoding(pruned_model, pruned_tokenizer, benchmark_texts, "축소")
+    agreement = sum(a == b for a, b in zip(original_outputs, pruned_outputs)) / len(benchmark_texts)
+    logger.info(f"토큰당 디코딩 속도 향상: {original_ms / max(pruned_ms, 1e-6):.2f}x")
+    logger.info(f"원본 대비 출력 일치율: {agreement:.1%}")
+    return True
+
+if __name__ == "__main__":
+    logger.info("="*80)
+    logger.info("✂️ PKO-T5 도메인 vocab 가지치기 시작")
+    logger.info("="*80)
+
+    success = main()
+
+    if success:
+        logger.info("="*80)
+        logger.info("✅ vocab 가지치기가 완료되었습니다!")
+        logger.info("="*80)
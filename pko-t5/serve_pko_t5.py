@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PKO-T5 추론 HTTP 서버
+- POST /generate         : 전체 생성 결과를 JSON으로 반환
+- POST /generate/stream  : 생성 텍스트를 NDJSON 청크로 순차 전송 (탐욕적 디코딩)
+- POST /analyze          : 구조화 레코드(장소, 수치, 심각도, 권장 조치) + 선택적 생성 텍스트
+                           ("generate": false면 모델을 거치지 않고 레코드만 반환)
+- GET  /health           : 상태, 현재 모델 정보, 인코더 캐시 통계
+- POST /admin/reload     : {"model_path": "..."} 새 가중치를 백그라운드로 로드/워밍업 후 요청 사이에 교체 (무중단)
+                           --admin-token(또는 SLM_ADMIN_TOKEN)을 지정하면 "Authorization: Bearer <토큰>" 필요,
+                           지정하지 않으면 로컬(127.0.0.1, ::1) 요청만 허용
+요청 본문: {"domain": "군중 밀집 및 체류 감지", "input": "13:13 클리닉에서 71명 밀집, 기준 수용인원 49명"}
+  "domain"을 생략하면 도메인 분류기로 추정하고 응답의 "domain" 필드에 결과/신뢰도/출처를 포함
+  "generation_kwargs"는 GENERATION_KWARGS_LIMITS의 키만 허용하고 범위로 제한 (그 외 키는 400, 생성 실패는 500)
+  /generate/stream도 같은 generation_kwargs를 적용 (탐욕적 디코딩만 가능하므로 num_beams > 1은 400)
+  응답의 "triage" 필드에 심각도 사전 분류 결과 (기본은 분류만 하고 모두 생성)
+  python serve_pko_t5.py --triage canned     # 기준보다 낮은 양호 이벤트는 모델 호출 없이 정형 응답 ("triage": false로 생성 강제)
+  python serve_pko_t5.py --triage suppress   # 양호 이벤트는 텍스트 없이 심각도만 반환
+  python serve_pko_t5.py --watch-dir /Volumes/Data/slm_model   # eval_loss가 가장 좋은 완성 체크포인트로 자동 교체
+"""
+
+import gc
+import os
+import hmac
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from test_pko_t5 import load_model_safe, generate_text_safe, format_input, sanitize_generation_kwargs, DEFAULT_DOMAIN
+from stream_pko_t5 import stream_generate
+from encoder_cache import EncoderOutputCache
+from length_budget import load_length_budgets
+from structured_output import build_record
+from domain_classifier import load_domain_classifier, resolve_domain
+from triage import triage, TriageStats, TRIAGE_MODE, TRIAGE_MODES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 8000
+
+# 감시 디렉토리 확인 주기(초)와 교체 전 워밍업 입력
+WATCH_INTERVAL = 10.0
+WARMUP_INPUT = "13:13 클리닉에서 71명 밀집, 기준 수용인원 49명"
+
+# 관리 API 토큰 (없으면 로컬 요청만 허용)
+ADMIN_TOKEN_ENV = "SLM_ADMIN_TOKEN"
+LOCAL_ADDRESSES = ("127.0.0.1", "::1", "::ffff:127.0.0.1")
+
+def select_device(device="auto"):
+    """auto면 CUDA가 있을 때만 GPU (MPS는 생성 오류가 있어 CPU 사용)"""
+    import torch
+
+    if device == "auto":
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    if device == "cuda" and not torch.cuda.is_available():
+        raise RuntimeError("CUDA를 사용할 수 없습니다.")
+    return device
+
+def load_model_from(model_path, device):
+    """경로의 모델/토크나이저 로드 (safetensors는 mmap으로 읽어 로드 중 메모리 사용을 줄임)"""
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=False)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path, low_cpu_mem_usage=True).to(device)
+    model.eval()
+    return model, tokenizer
+
+def _model_signature(model_path):
+    """가중치 파일 크기/수정 시각 (같은 경로에 덮어쓴 경우 감지용)"""
+    weights = os.path.join(model_path, "model.safetensors")
+    if not os.path.exists(weights):
+        return None
+    stat = os.stat(weights)
+    return (stat.st_size, stat.st_mtime)
+
+class InferenceService:
+    """모델/토크나이저와 인코더 캐시를 보관하고 생성 요청을 직렬화"""
+
+    def __init__(self, model, tokenizer, device, model_path=None, triage_mode=TRIAGE_MODE):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.encoder_cache = EncoderOutputCache()
+        self.length_budgets = load_length_budgets()
+        self.domain_classifier = load_domain_classifier()
+        self.triage_mode = triage_mode
+        self.triage_stats = TriageStats()
+        # CPU 코어를 요청끼리 나눠 쓰면 모두 느려지므로 생성은 한 번에 하나씩
+        self.generation_lock = threading.Lock()
+        # 모델 교체는 한 번에 하나씩 (로드/워밍업은 생성 잠금 밖에서 진행)
+        self.reload_lock = threading.Lock()
+        self.model_info = {"model_path": model_path, "loaded_at": time.time()}
+        self.reload_status = {"state": "idle"}
+
+    def reload(self, model_path):
+        """새 모델을 로드/워밍업한 뒤 진행 중인 요청이 끝나면 교체 (반환: 교체 성공 여부)"""
+        if not self.reload_lock.acquire(blocking=False):
+            logger.warning(f"이미 모델 교체 중이라 요청을 건너뜁니다: {model_path}")
+            return False
+        return self._reload_locked(model_path)
+
+    def _reload_locked(self, model_path):
+        """reload_lock을 잡은 상태에서 호출 (끝나면 해제)"""
+        try:
+            self.reload_status = {"state": "loading", "model_path": model_path, "started_at": time.time()}
+            start_time = time.perf_counter()
+            model, tokenizer = load_model_from(model_path, self.device)
+            load_time = time.perf_counter() - start_time
+
+            # 첫 요청이 느려지지 않도록 교체 전에 한 번 생성 (실패하면 교체하지 않음)
+            self.reload_status["state"] = "warming_up"
+            warmup = generate_text_safe(
+                model, tokenizer, self.device, format_input(DEFAULT_DOMAIN, WARMUP_INPUT, model),
+                generation_kwargs={"max_length": 32, "num_beams": 1}
+            )
+            if warmup.startswith("오류:"):
+                raise RuntimeError(f"워밍업 실패 - {warmup}")
+
+            # 진행 중인 생성이 끝난 뒤 참조를 한 번에 교체
+            with self.generation_lock:
+                old_model = self.model
+                self.model, self.tokenizer = model, tokenizer
+                self.encoder_cache.clear()  # 이전 모델의 인코더 출력은 재사용 불가
+                self.model_info = {"model_path": model_path, "loaded_at": time.time()}
+            del old_model, model
+            gc.collect()
+
+            logger.info(f"🔄 모델 교체 완료: {model_path} (로드 {load_time:.1f}초, 전체 {time.perf_counter() - start_time:.1f}초)")
+            self.reload_status = {"state": "idle", "last_success": model_path}
+            return True
+        except Exception as e:
+            logger.error(f"모델 교체 실패 (기존 모델 유지): {model_path} - {e}")
+            self.reload_status = {"state": "idle", "last_error": str(e), "model_path": model_path}
+            return False
+        finally:
+            self.reload_lock.release()
+
+    def reload_async(self, model_path):
+        """잠금을 호출 스레드에서 잡은 뒤 백그라운드로 교체 (반환: 접수 여부, 이미 교체 중이면 False)"""
+        if not self.reload_lock.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._reload_locked, args=(model_path,), name="model-reload", daemon=True).start()
+        return True
+
+    def resolve_domain(self, input_text, domain=None):
+        """요청 도메인이 없으면 분류기로 추정 (신뢰도가 낮으면 기본 도메인)"""
+        return resolve_domain(self.domain_classifier, input_text, domain, default=DEFAULT_DOMAIN)
+
+    def triage(self, domain, input_text, enabled=True):
+        """심각도 사전 분류 (반환의 "generate"가 False면 모델 호출 생략)"""
+        decision = triage(domain, input_text, self.triage_mode if enabled else "off")
+        self.triage_stats.record(decision)
+        return decision
+
+    def generate(self, domain, input_text, generation_kwargs=None):
+        start_time = time.perf_counter()
+        with self.generation_lock:
+            text = generate_text_safe(
+                self.model, self.tokenizer, self.device, format_input(domain, input_text, self.model),
+                encoder_cache=self.encoder_cache, generation_kwargs=generation_kwargs,
+                length_budgets=self.length_budgets
+            )
+        if text.startswith("오류:"):
+            raise RuntimeError(text)
+        return {"text": text, "total_s": time.perf_counter() - start_time}
+
+    def analyze(self, domain, input_text, generate=True, generation_kwargs=None):
+        """구조화 레코드는 항상, 자연어 텍스트는 generate=True일 때만 생성"""
+        result = {"record": build_record(domain, input_text)}
+        if generate:
+            result.update(self.generate(domain, input_text, generation_kwargs))
+        return result
+
+    def stream(self, domain, input_text, generation_kwargs=None):
+        """텍스트 조각 이벤트를 yield 하고 마지막에 지연 시간 이벤트를 yield
+
+        중간에 닫히면 stream_generate가 생성 스레드를 멈추고 기다린 뒤에 생성 잠금을 해제
+        """
+        timings = {}
+        with self.generation_lock:
+            chunks = stream_generate(
+                self.model, self.tokenizer, self.device, format_input(domain, input_text, self.model),
+                encoder_cache=self.encoder_cache, timings=timings,
+                length_budgets=self.length_budgets, generation_kwargs=generation_kwargs
+            )
+            try:
+                for chunk in chunks:
+                    yield {"text": chunk}
+            finally:
+                chunks.close()
+        yield {"done": True, **timings}
+
+class ModelDirectoryWatcher(threading.Thread):
+    """학습 출력 디렉토리를 주기적으로 확인해 최고 성능 체크포인트(또는 덮어쓴 가중치)가 바뀌면 교체
+
+    체크포인트는 manifest가 완성된 것만 대상 (기록 중인 checkpoint-N.tmp는 무시)
+    평가 기록이 있으면 eval_loss가 가장 낮은 체크포인트, 없으면 최신 체크포인트 (upload_model과 같은 선택)
+    """
+
+    def __init__(self, service, watch_dir, interval=WATCH_INTERVAL):
+        super().__init__(name="model-watcher", daemon=True)
+        self.service = service
+        self.watch_dir = watch_dir
+        self.interval = interval
+        self.current = self.latest()
+
+    def latest(self):
+        from upload_model import select_checkpoint
+
+        model_path, _ = select_checkpoint(self.watch_dir)
+        return (model_path, _model_signature(model_path)) if model_path else None
+
+    def run(self):
+        logger.info(f"모델 디렉토리 감시: {self.watch_dir} ({self.interval:.0f}초 간격)")
+        while True:
+            time.sleep(self.interval)
+            try:
+                latest = self.latest()
+            except Exception as e:
+                logger.warning(f"감시 디렉토리 확인 실패: {e}")
+                continue
+            if latest is not None and latest != self.current and latest[1] is not None:
+                logger.info(f"새 모델 감지: {latest[0]}")
+                # 교체에 성공한 경우에만 현재 버전으로 기록 (실패하면 다음 주기에 재시도)
+                if self.service.reload(latest[0]):
+                    self.current = latest
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # chunked 전송에 필요
+    service = None
+    admin_token = None
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not body.get("input"):
+            raise ValueError("'input' 필드가 필요합니다.")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _is_admin(self):
+        """토큰이 설정되어 있으면 Bearer 토큰 비교, 없으면 로컬 요청만 허용"""
+        if self.admin_token:
+            authorization = self.headers.get("Authorization", "")
+            return hmac.compare_digest(authorization.encode("utf-8"), f"Bearer {self.admin_token}".encode("utf-8"))
+        return self.client_address[0] in LOCAL_ADDRESSES
+
+    def _handle_reload(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if not self._is_admin():
+            logger.warning(f"권한 없는 모델 교체 요청 거부: {self.client_address[0]}")
+            self._send_json(403, {"error": "forbidden"})
+            return
+        try:
+            model_path = json.loads(body or b"{}").get("model_path")
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        if not model_path or not os.path.exists(os.path.join(model_path, "config.json")):
+            self._send_json(400, {"error": f"모델 디렉토리가 아닙니다: {model_path}"})
+        # 로드/워밍업은 백그라운드에서 진행하고 기존 모델로 계속 응답
+        elif self.service.reload_async(model_path):
+            self._send_json(202, {"status": "reloading", "model_path": model_path})
+        else:
+            self._send_json(409, {"error": "이미 모델 교체 중입니다.", "reload": self.service.reload_status})
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "model": self.service.model_info,
+                "reload": self.service.reload_status,
+                "encoder_cache": self.service.encoder_cache.stats(),
+                "triage": {"mode": self.service.triage_mode, **self.service.triage_stats.stats()},
+            })
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/admin/reload":
+            self._handle_reload()
+            return
+        try:
+            body = self._read_json()
+            generation_kwargs = sanitize_generation_kwargs(body.get("generation_kwargs"))
+            if self.path == "/generate/stream" and generation_kwargs.get("num_beams", 1) != 1:
+                raise ValueError("스트리밍은 탐욕적 디코딩만 지원합니다 (num_beams=1).")
+        except Exception as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        # 도메인에 따라 모델 입력, 길이 예산, 심각도 규칙이 정해짐
+        resolution = self.service.resolve_domain(body["input"], body.get("domain"))
+        domain = resolution["domain"]
+        if self.path not in ("/generate", "/analyze", "/generate/stream"):
+            self._send_json(404, {"error": "not found"})
+            return
+        decision = self.service.triage(domain, body["input"], enabled=body.get("triage", True))
+        if self.path == "/generate":
+            try:
+                if decision["generate"]:
+                    result = self.service.generate(domain, body["input"], generation_kwargs)
+                else:
+                    result = {"text": decision["text"], "total_s": 0.0}
+            except Exception as e:
+                self._send_json(500, {"error": str(e), "domain": resolution, "triage": decision})
+                return
+            self._send_json(200, {**result, "domain": resolution, "triage": decision})
+        elif self.path == "/analyze":
+            try:
+                result = self.service.analyze(
+                    domain, body["input"], generate=body.get("generate", True) and decision["generate"],
+                    generation_kwargs=generation_kwargs
+                )
+            except Exception as e:
+                self._send_json(500, {"error": str(e), "domain": resolution, "triage": decision})
+                return
+            if body.get("generate", True) and not decision["generate"]:
+                result.update({"text": decision["text"], "total_s": 0.0})
+            self._send_json(200, {**result, "domain": resolution, "triage": decision})
+        elif not decision["generate"]:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                self._write_chunk({"domain": resolution, "triage": decision})
+                if decision["text"]:
+                    self._write_chunk({"text": decision["text"]})
+                self._write_chunk({"done": True, "ttft_s": 0.0, "total_s": 0.0})
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning("클라이언트 연결이 끊어져 스트리밍을 중단합니다.")
+                return
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            events = self.service.stream(domain, body["input"], generation_kwargs)
+            try:
+                self._write_chunk({"domain": resolution, "triage": decision})
+                for event in events:
+                    self._write_chunk(event)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning("클라이언트 연결이 끊어져 스트리밍을 중단합니다.")
+                return
+            except Exception as e:
+                logger.error(f"스트리밍 생성 실패: {e}")
+                self._write_chunk({"error": str(e)})
+            finally:
+                events.close()  # 생성 잠금 해제
+            self.wfile.write(b"0\r\n\r\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="PKO-T5 추론 서버")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--model-path", help="시작 시 로드할 모델 디렉토리 (기본: Hub 모델)")
+    parser.add_argument("--device", choices=("auto", "cpu", "cuda"), default="auto", help="--model-path 로드 디바이스")
+    parser.add_argument(
+        "--admin-token", default=os.environ.get(ADMIN_TOKEN_ENV),
+        help=f"/admin/reload 토큰 (기본: 환경 변수 {ADMIN_TOKEN_ENV}, 없으면 로컬 요청만 허용)"
+    )
+    parser.add_argument("--watch-dir", help="새 체크포인트를 감시해 자동 교체할 학습 출력 디렉토리")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL)
+    parser.add_argument(
+        "--triage", choices=TRIAGE_MODES, default=TRIAGE_MODE,
+        help="양호 이벤트 처리 (off: 모두 생성, canned: 정형 응답, suppress: 텍스트 생략)"
+    )
+    args = parser.parse_args()
+
+    if args.model_path:
+        try:
+            device = select_device(args.device)
+            logger.info(f"사용 디바이스: {device}")
+            model, tokenizer = load_model_from(args.model_path, device)
+        except Exception as e:
+            logger.error(f"모델 로드 실패: {args.model_path} - {e}")
+            model = None
+    else:
+        model, tokenizer, device = load_model_safe()
+    if model is None:
+        logger.error("모델 로드 실패!")
+        return
+
+    service = InferenceService(model, tokenizer, device, model_path=args.model_path, triage_mode=args.triage)
+    InferenceRequestHandler.service = service
+    InferenceRequestHandler.admin_token = args.admin_token
+    if args.watch_dir:
+        ModelDirectoryWatcher(service, args.watch_dir, args.watch_interval).start()
+    server = ThreadingHTTPServer((args.host, args.port), InferenceRequestHandler)
+    logger.info(f"🚀 추론 서버 시작: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+설정 기반 통합 학습 패키지
+사용 예: python -m slm_training --preset auto --set optimizer.learning_rate=1e-4
+(torch/transformers는 학습 실행 시점에만 로드)
+"""
+
+from .config import TrainingConfig, load_config, update_config, parse_override
+from .presets import PRESETS, get_preset, detect_preset
+
+__all__ = [
+    "TrainingConfig",
+    "load_config",
+    "update_config",
+    "parse_override",
+    "PRESETS",
+    "get_preset",
+    "detect_preset",
+]
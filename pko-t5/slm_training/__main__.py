@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+통합 학습 CLI
+  python -m slm_training --list-presets
+  python -m slm_training --preset auto --dump-config        # 확정된 설정만 출력
+  python -m slm_training --preset cpu_memory_efficient --set data.padding=max_length
+  python -m slm_training --config my_config.json --output-dir outputs/exp1
+  python -m slm_training --preset large --auto-tune                 # 배치/누적/워커 수 자동 결정
+  torchrun --nproc_per_node=2 -m slm_training --preset cpu          # CPU 다중 프로세스 데이터 병렬 (gloo)
+"""
+
+import os
+import sys
+import json
+import datetime
+import logging
+import argparse
+
+from .config import load_config, update_config, parse_override
+from .presets import PRESETS, get_preset, detect_preset
+
+logger = logging.getLogger(__name__)
+
+def build_config(args):
+    """프리셋 -> 설정 파일 -> --set 덮어쓰기 순서로 설정 확정"""
+    config = get_preset(args.preset)
+    if args.config:
+        config = load_config(args.config, base=config)
+    for override in args.overrides:
+        config = update_config(config, parse_override(override))
+    if args.output_dir:
+        config.output_dir = args.output_dir
+    if args.auto_tune:
+        config.auto_tune = True
+    return config.validate()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m slm_training", description="PKO-T5 SLM 통합 학습")
+    parser.add_argument("--preset", default="auto", help=f"학습 프리셋 (auto, {', '.join(PRESETS)})")
+    parser.add_argument("--config", help="프리셋 위에 덮어쓸 JSON 설정 파일")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="설정 덮어쓰기 (예: optimizer.learning_rate=1e-4, 여러 번 사용 가능)")
+    parser.add_argument("--output-dir", help="출력 디렉토리")
+    parser.add_argument("--auto-tune", action="store_true", help="배치/그래디언트 누적/데이터로더 워커 수 자동 튜닝")
+    parser.add_argument("--dump-config", action="store_true", help="확정된 설정만 출력하고 종료")
+    parser.add_argument("--list-presets", action="store_true", help="프리셋 목록 출력")
+    args = parser.parse_args(argv)
+
+    if args.list_presets:
+        print(f"auto -> {detect_preset()}")
+        for name, factory in PRESETS.items():
+            print(f"{name}: {factory.__doc__}")
+        return 0
+
+    # torchrun 다중 프로세스 학습 시 로그는 rank 0만 기록 (나머지는 경고 이상만 출력)
+    main_process = os.environ.get("RANK", "0") == "0"
+    logging.basicConfig(
+        level=logging.INFO if main_process else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f'slm_train_log_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+            logging.StreamHandler()
+        ] if main_process and not args.dump_config else [logging.StreamHandler()]
+    )
+
+    try:
+        config = build_config(args)
+    except (KeyError, ValueError, OSError) as e:
+        logger.error(f"설정 오류: {e}")
+        return 2
+
+    if args.dump_config:
+        print(json.dumps(config.to_dict(), ensure_ascii=False, indent=2))
+        return 0
+
+    # torch/transformers는 실제 학습할 때만 로드
+    from .trainer import train
+
+    logger.info("=" * 80)
+    logger.info(f"🚀 PKO-T5 모델 학습 시작 (프리셋 {config.name})")
+    logger.info("=" * 80)
+    success = train(config)
+    if success:
+        logger.info("✅ PKO-T5 모델 학습이 성공적으로 완료되었습니다!")
+    else:
+        logger.info("❌ PKO-T5 모델 학습 중 오류가 발생했습니다.")
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+배치 크기 / 그래디언트 누적 / 데이터로더 워커 자동 튜닝
+- 최대 길이(max_source_length, max_target_length) 배치로 forward+backward를 실행해 메모리에 들어가는 최대 배치 탐색
+  (CUDA: 배치를 두 배씩 늘리며 OOM 확인 후 이분 탐색,
+   CPU: 스텝 중 현재 RSS를 샘플링해 배치를 단계적으로 늘리고, 직전 측정으로 예측한 다음 배치가 예산을 넘으면 멈춤)
+- 프리셋의 실효 배치(배치 x 누적)를 유지하도록 그래디언트 누적 재계산
+- 데이터로더 워커 수는 후보별 배치 로드 처리량을 측정해 선택
+결과는 output_dir/autotune.json에 저장하고, 모델/길이/장치가 같으면 다음 실행에서 재사용
+"""
+
+import os
+import gc
+import json
+import time
+import logging
+import threading
+
+import psutil
+import torch
+from torch.utils.data import DataLoader
+
+logger = logging.getLogger(__name__)
+
+AUTOTUNE_FILE = "autotune.json"
+# 자동 튜닝으로 바뀌는 TrainingConfig 필드
+TUNED_FIELDS = (
+    "per_device_train_batch_size",
+    "per_device_eval_batch_size",
+    "gradient_accumulation_steps",
+    "dataloader_num_workers",
+)
+MAX_BATCH_SIZE = 64
+# 탐색 결과에서 남겨 둘 메모리 여유 (단편화, 평가/생성 시 추가 메모리)
+MEMORY_FRACTION = 0.8
+# CPU probe 스텝 중 RSS 샘플링 간격(초)
+RSS_SAMPLE_INTERVAL = 0.005
+WORKER_CANDIDATES = [0, 1, 2, 4, 8]
+WORKER_PROBE_BATCHES = 20
+# 처리량 차이가 이 비율 이하면 워커 수가 적은 쪽 선택 (학습 스레드와 코어 경쟁 방지)
+WORKER_TOLERANCE = 0.05
+
+# 옵티마이저 상태의 파라미터당 바이트 수 (probe에서는 옵티마이저를 만들지 않으므로 예산에서 미리 제외)
+OPTIMIZER_STATE_BYTES = {
+    "adamw_torch": 8,
+    "adamw_hf": 8,
+    "adafactor": 1,
+    "adamw_bnb_8bit": 2,
+}
+
+def _step_peak_rss(step):
+    """step() 실행 중 현재 RSS의 최댓값 (바이트)
+
+    ru_maxrss는 프로세스 전체 기간의 최댓값이라 모델 로드/토큰화 때의 값에 가려지므로
+    스텝 동안만 memory_info().rss를 주기적으로 샘플링
+    """
+    process = psutil.Process()
+    peak = process.memory_info().rss
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            peak = max(peak, process.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        step()
+    finally:
+        done.set()
+        sampler.join()
+    return max(peak, process.memory_info().rss)
+
+def _is_oom(error):
+    return isinstance(error, torch.cuda.OutOfMemoryError) or "out of memory" in str(error).lower()
+
+def _dummy_batch(model, tokenizer, config, batch_size):
+    """최대 길이로 채운 최악의 경우 배치"""
+    device = next(model.parameters()).device
+    token_id = tokenizer.unk_token_id if tokenizer.unk_token_id is not None else tokenizer.eos_token_id
+    input_ids = torch.full((batch_size, config.data.max_source_length), token_id, dtype=torch.long, device=device)
+    labels = torch.full((batch_size, config.data.max_target_length), token_id, dtype=torch.long, device=device)
+    return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids), "labels": labels}
+
+def _train_step(model, tokenizer, config, batch_size):
+    batch = _dummy_batch(model, tokenizer, config, batch_size)
+    dtype = {"bf16": torch.bfloat16, "fp16": torch.float16}.get(config.precision)
+    device_type = "cuda" if config.device == "cuda" else "cpu"
+    with torch.autocast(device_type=device_type, dtype=dtype, enabled=dtype is not None):
+        loss = model(**batch).loss
+    loss.backward()
+    model.zero_grad(set_to_none=True)
+
+def _static_bytes(model, config):
+    """probe에 포함되지 않는 옵티마이저 상태 메모리"""
+    num_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
+    return num_params * OPTIMIZER_STATE_BYTES.get(config.optimizer.optim, 8)
+
+def probe_cuda_batch_size(model, tokenizer, config):
+    """배치를 두 배씩 늘려 OOM 지점을 찾고 그 사이를 이분 탐색"""
+    budget = torch.cuda.get_device_properties(0).total_memory * MEMORY_FRACTION - _static_bytes(model, config)
+
+    def fits(batch_size):
+        torch.cuda.empty_cache()
+        torch.cuda.reset_peak_memory_stats()
+        try:
+            _train_step(model, tokenizer, config, batch_size)
+        except RuntimeError as e:
+            if not _is_oom(e):
+                raise
+            model.zero_grad(set_to_none=True)
+            torch.cuda.empty_cache()
+            return False
+        return torch.cuda.max_memory_allocated() <= budget
+
+    if not fits(1):
+        return 1
+    low, high = 1, None
+    while low < MAX_BATCH_SIZE:
+        candidate = min(low * 2, MAX_BATCH_SIZE)
+        if not fits(candidate):
+            high = candidate
+            break
+        low = candidate
+    while high is not None and high - low > 1:
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+    torch.cuda.empty_cache()
+    return low
+
+def probe_cpu_batch_size(model, tokenizer, config):
+    """배치를 1부터 단계적으로 늘리며 스텝 중 최대 RSS가 예산 안에 드는 가장 큰 배치 탐색
+
+    CPU는 OOM 시 프로세스가 종료되므로, 직전 배치의 스텝 메모리 증가량을 배치에 비례해 늘린 예측값이
+    예산을 넘는 배치는 실행하지 않음 (두 배 또는 예측상 들어가는 최대 배치 중 작은 쪽으로 한 단계씩 증가)
+    """
+    budget = (psutil.Process().memory_info().rss + psutil.virtual_memory().available) * MEMORY_FRACTION
+    # torchrun으로 한 노드에 여러 프로세스를 띄우면 메모리를 나눠 씀
+    budget /= int(os.environ.get("LOCAL_WORLD_SIZE", 1))
+    budget -= _static_bytes(model, config)
+
+    def measure(batch_size):
+        gc.collect()
+        base = psutil.Process().memory_info().rss
+        peak = _step_peak_rss(lambda: _train_step(model, tokenizer, config, batch_size))
+        return base, peak
+
+    base, peak = measure(1)
+    if peak > budget:
+        logger.warning("배치 1도 메모리 예산을 넘습니다. 배치 1로 진행합니다.")
+        return 1
+
+    batch_size = 1
+    while batch_size < MAX_BATCH_SIZE:
+        per_sample = max(peak - base, 1) / batch_size
+        fits = int((budget - base) // per_sample)
+        candidate = min(batch_size * 2, fits, MAX_BATCH_SIZE)
+        if candidate <= batch_size:
+            break
+        base, peak = measure(candidate)
+        logger.info(f"배치 {candidate}: 스텝 중 최대 RSS {peak / 1024 ** 3:.2f}GB (예산 {budget / 1024 ** 3:.2f}GB)")
+        if peak > budget:
+            break
+        batch_size = candidate
+    logger.info(f"CPU 최대 배치: {batch_size}")
+    return batch_size
+
+def split_effective_batch(effective_batch_size, max_batch_size):
+    """실효 배치를 유지하는 (배치, 누적) 선택: 최대 배치 이하인 실효 배치의 가장 큰 약수"""
+    batch_size = max(d for d in range(1, min(effective_batch_size, max_batch_size) + 1) if effective_batch_size % d == 0)
+    return batch_size, effective_batch_size // batch_size
+
+def probe_dataloader_workers(dataset, collator, batch_size):
+    """워커 후보별 배치 로드 처리량(batches/sec)을 측정해 가장 빠른 워커 수 선택"""
+    candidates = [w for w in WORKER_CANDIDATES if w <= (os.cpu_count() or 1)]
+    num_batches = min(WORKER_PROBE_BATCHES, max(1, len(dataset) // batch_size))
+    throughputs = {}
+    for num_workers in candidates:
+        loader = DataLoader(dataset, batch_size=batch_size, shuffle=True, collate_fn=collator, num_workers=num_workers)
+        start_time = time.perf_counter()
+        for i, _ in enumerate(loader, 1):
+            if i >= num_batches:
+                break
+        throughputs[num_workers] = num_batches / (time.perf_counter() - start_time)
+        logger.info(f"데이터로더 워커 {num_workers}개: {throughputs[num_workers]:.1f} batches/sec")
+
+    best = max(throughputs.values())
+    return min(w for w, throughput in throughputs.items() if throughput >= best * (1 - WORKER_TOLERANCE))
+
+def _cache_key(config, model_name):
+    return {
+        "model": model_name,
+        "device": config.device,
+        "precision": config.precision,
+        "optim": config.optimizer.optim,
+        "max_source_length": config.data.max_source_length,
+        "max_target_length": config.data.max_target_length,
+        "gradient_checkpointing": config.model.gradient_checkpointing,
+        "effective_batch_size": config.per_device_train_batch_size * config.gradient_accumulation_steps,
+    }
+
+def autotune(config, model, tokenizer, model_name, train_dataset, collator):
+    """config의 배치/누적/워커 수를 측정값으로 갱신 (config를 직접 수정)"""
+    key = _cache_key(config, model_name)
+    cache_path = os.path.join(config.output_dir, AUTOTUNE_FILE)
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            logger.info(f"이전 자동 튜닝 결과 재사용: {cache_path}")
+            return _apply(config, cached["result"])
+
+    start_time = time.perf_counter()
+    was_training = model.training
+    model.train()
+    if config.model.gradient_checkpointing:
+        model.gradient_checkpointing_enable()
+    try:
+        if config.device == "cuda":
+            max_batch_size = probe_cuda_batch_size(model, tokenizer, config)
+        else:
+            max_batch_size = probe_cpu_batch_size(model, tokenizer, config)
+    finally:
+        model.zero_grad(set_to_none=True)
+        model.train(was_training)
+
+    batch_size, accumulation = split_effective_batch(key["effective_batch_size"], max_batch_size)
+    num_workers = probe_dataloader_workers(train_dataset, collator, batch_size)
+    result = {
+        "max_batch_size": max_batch_size,
+        "per_device_train_batch_size": batch_size,
+        "per_device_eval_batch_size": max_batch_size,
+        "gradient_accumulation_steps": accumulation,
+        "dataloader_num_workers": num_workers,
+    }
+    logger.info(f"자동 튜닝 소요 시간: {time.perf_counter() - start_time:.1f}초")
+
+    os.makedirs(config.output_dir, exist_ok=True)
+    with open(cache_path, "w", encoding='utf-8') as f:
+        json.dump({"key": key, "result": result}, f, ensure_ascii=False, indent=2)
+    return _apply(config, result)
+
+def _apply(config, result):
+    config.per_device_train_batch_size = result["per_device_train_batch_size"]
+    config.per_device_eval_batch_size = result["per_device_eval_batch_size"]
+    config.gradient_accumulation_steps = result["gradient_accumulation_steps"]
+    config.dataloader_num_workers = result["dataloader_num_workers"]
+    logger.info(
+        f"자동 튜닝 결과: 최대 배치 {result['max_batch_size']}, "
+        f"학습 배치 {config.per_device_train_batch_size} x 누적 {config.gradient_accumulation_steps} "
+        f"(실효 배치 {config.per_device_train_batch_size * config.gradient_accumulation_steps}), "
+        f"평가 배치 {config.per_device_eval_batch_size}, 데이터로더 워커 {config.dataloader_num_workers}개"
+    )
+    return config
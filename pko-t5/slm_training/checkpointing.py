@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+비동기 원자적 체크포인트
+- save_steps마다 모델/옵티마이저/스케줄러 상태를 CPU 사본으로 떠 두고 백그라운드 스레드에서 기록 (학습은 바로 진행)
+- checkpoint-N.tmp 디렉토리에 모두 기록하고 manifest.json(파일별 크기)을 마지막에 쓴 뒤 checkpoint-N으로 원자적 이름 변경
+  (이름 변경 후 상위 디렉토리 fsync)
+- 재개 시에는 manifest와 실제 파일이 일치하는 가장 최근 체크포인트만 사용 (기록 중 중단된 체크포인트는 건너뜀)
+- 평가와 겹치는 저장 스텝은 평가가 끝난 뒤(on_evaluate) 스냅샷 -> trainer_state.json/best_step에 그 스텝의 평가가 포함
+저장 형식은 Trainer 체크포인트와 같으므로 trainer.train(resume_from_checkpoint=...)로 그대로 재개
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import logging
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from safetensors.torch import save_file, load_file
+from transformers import TrainerCallback
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "checkpoint-"
+TMP_SUFFIX = ".tmp"
+OLD_SUFFIX = ".old"
+MANIFEST_FILE = "manifest.json"
+BEST_METRIC = "eval_loss"
+
+def _clone_to_cpu(value):
+    """텐서는 CPU로 복제, 컨테이너는 재귀 복사 (학습이 원본을 계속 갱신해도 사본은 고정)"""
+    if torch.is_tensor(value):
+        return value.detach().to("cpu", copy=True)
+    if isinstance(value, dict):
+        return {k: _clone_to_cpu(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_clone_to_cpu(v) for v in value)
+    return value
+
+def _tied_names(state_dict):
+    """앞선 키와 같은 저장소를 공유하는(tied) 키 이름"""
+    tied, seen = set(), set()
+    for name, tensor in state_dict.items():
+        if tensor.data_ptr() in seen:
+            tied.add(name)
+        seen.add(tensor.data_ptr())
+    return tied
+
+def _model_state_snapshot(model):
+    """공유(tied) 가중치는 한 번만 저장 (from_pretrained/Trainer 로드 시 다시 묶임)"""
+    state_dict = model.state_dict()
+    tied = _tied_names(state_dict)
+    return {
+        name: tensor.detach().to("cpu", copy=True).contiguous()
+        for name, tensor in state_dict.items() if name not in tied
+    }
+
+def _rng_state():
+    rng_state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "cpu": torch.random.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        rng_state["cuda"] = torch.cuda.random.get_rng_state_all()
+    return rng_state
+
+def checkpoint_step(name):
+    return int(name[len(CHECKPOINT_PREFIX):])
+
+def is_complete_checkpoint(path):
+    """manifest의 파일이 모두 기록된 크기로 존재하는지 확인
+
+    manifest가 없으면 Trainer 동기 저장 체크포인트로 보고 마지막에 기록되는 trainer_state.json 유무로 판단
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return os.path.exists(os.path.join(path, "trainer_state.json"))
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    for name, info in manifest["files"].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) != info["bytes"]:
+            return False
+    return True
+
+def list_complete_checkpoints(output_dir):
+    """완전한 체크포인트 경로 목록 (스텝 오름차순)"""
+    if not os.path.exists(output_dir):
+        return []
+    checkpoints = []
+    for name in os.listdir(output_dir):
+        path = os.path.join(output_dir, name)
+        if not name.startswith(CHECKPOINT_PREFIX) or name.endswith((TMP_SUFFIX, OLD_SUFFIX)) or not os.path.isdir(path):
+            continue
+        if is_complete_checkpoint(path):
+            checkpoints.append(path)
+        else:
+            logger.warning(f"불완전한 체크포인트 건너뜀: {path}")
+    return sorted(checkpoints, key=lambda p: checkpoint_step(os.path.basename(p)))
+
+def _fsync_dir(path):
+    """디렉토리 항목(이름 변경) 자체를 디스크에 반영"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def find_latest_checkpoint(output_dir):
+    checkpoints = list_complete_checkpoints(output_dir)
+    return checkpoints[-1] if checkpoints else None
+
+def best_step(log_history, metric=BEST_METRIC):
+    """로그 기록에서 지표가 가장 낮은 평가 스텝"""
+    evaluations = [entry for entry in log_history if metric in entry]
+    if not evaluations:
+        return None
+    return min(evaluations, key=lambda entry: entry[metric])["step"]
+
+class AsyncCheckpointCallback(TrainerCallback):
+    """save_steps마다 CPU 스냅샷을 떠서 백그라운드 스레드로 체크포인트 기록
+
+    동시에 기록 중인 체크포인트는 하나로 제한 (이전 기록이 끝나지 않았으면 기다림 -> 스냅샷 메모리 상한)
+    같은 스텝에 평가가 예정되어 있으면 평가 기록이 log_history에 들어간 뒤 스냅샷 (Trainer 동기 저장과 같은 순서)
+    학습 종료 시 기록을 마무리하고, 평가 손실이 가장 낮은 체크포인트 가중치를 모델에 다시 로드
+    """
+
+    def __init__(self, output_dir, save_steps, save_total_limit=None, tokenizer=None, is_main_process=True,
+                 state_providers=None):
+        self.output_dir = output_dir
+        # 체크포인트에 함께 저장할 JSON 상태 (파일 이름 -> 상태를 반환하는 함수, 예: 샘플러 상태)
+        self.state_providers = state_providers or {}
+        self.save_steps = save_steps
+        self.save_total_limit = save_total_limit
+        self.tokenizer = tokenizer
+        self.is_main_process = is_main_process
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self.pending = None
+        # 평가 뒤로 미룬 저장 스텝
+        self.deferred_step = None
+
+        if is_main_process and os.path.exists(output_dir):
+            # 이전 실행에서 이름 변경 전에 중단된 임시 디렉토리 정리
+            for name in os.listdir(output_dir):
+                if not name.startswith(CHECKPOINT_PREFIX):
+                    continue
+                path = os.path.join(output_dir, name)
+                if name.endswith(TMP_SUFFIX):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif name.endswith(OLD_SUFFIX):
+                    # 교체 도중 중단되어 새 체크포인트가 없으면 이전 체크포인트를 되살림
+                    final_path = path[:-len(OLD_SUFFIX)]
+                    if os.path.exists(final_path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.replace(path, final_path)
+
+    def wait(self):
+        if self.pending is not None:
+            self.pending.result()
+            self.pending = None
+
+    def on_step_end(self, args, state, control, model=None, optimizer=None, lr_scheduler=None, **kwargs):
+        if not self.is_main_process or state.global_step % self.save_steps != 0:
+            return
+        # DefaultFlowCallback이 먼저 평가 여부를 정함 -> 평가가 있으면 on_evaluate에서 스냅샷
+        if control.should_evaluate:
+            self.deferred_step = state.global_step
+            return
+        self._snapshot(args, state, model, optimizer, lr_scheduler)
+
+    def on_evaluate(self, args, state, control, model=None, optimizer=None, lr_scheduler=None, **kwargs):
+        if self.deferred_step is not None and self.deferred_step == state.global_step:
+            self.deferred_step = None
+            self._snapshot(args, state, model, optimizer, lr_scheduler)
+
+    def _snapshot(self, args, state, model, optimizer, lr_scheduler):
+        # 이전 기록이 진행 중이면 끝날 때까지 대기 (예외도 여기서 드러남)
+        wait_start = time.perf_counter()
+        self.wait()
+        wait_time = time.perf_counter() - wait_start
+
+        snapshot_start = time.perf_counter()
+        snapshot = {
+            "step": state.global_step,
+            "model": _model_state_snapshot(model),
+            "model_config": model.config.to_json_string(),
+            "generation_config": model.generation_config.to_json_string() if getattr(model, "generation_config", None) else None,
+            "optimizer": _clone_to_cpu(optimizer.state_dict()) if optimizer is not None else None,
+            "scheduler": _clone_to_cpu(lr_scheduler.state_dict()) if lr_scheduler is not None else None,
+            "trainer_state": json.dumps(dataclasses.asdict(state), indent=2, sort_keys=True) + "\n",
+            "rng_state": _rng_state(),
+            "training_args": args,
+            "best_step": best_step(state.log_history),
+            "extra_states": {name: provider() for name, provider in self.state_providers.items()},
+        }
+        logger.info(
+            f"체크포인트 스냅샷: 스텝 {state.global_step}, {time.perf_counter() - snapshot_start:.2f}초 "
+            f"(이전 기록 대기 {wait_time:.2f}초)"
+        )
+        self.pending = self.executor.submit(self._write, snapshot)
+
+    def _write(self, snapshot):
+        start_time = time.perf_counter()
+        final_path = os.path.join(self.output_dir, f"{CHECKPOINT_PREFIX}{snapshot['step']}")
+        tmp_path = final_path + TMP_SUFFIX
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        save_file(snapshot["model"], os.path.join(tmp_path, "model.safetensors"), metadata={"format": "pt"})
+        with open(os.path.join(tmp_path, "config.json"), "w", encoding='utf-8') as f:
+            f.write(snapshot["model_config"])
+        if snapshot["generation_config"]:
+            with open(os.path.join(tmp_path, "generation_config.json"), "w", encoding='utf-8') as f:
+                f.write(snapshot["generation_config"])
+        if snapshot["optimizer"] is not None:
+            torch.save(snapshot["optimizer"], os.path.join(tmp_path, "optimizer.pt"))
+        if snapshot["scheduler"] is not None:
+            torch.save(snapshot["scheduler"], os.path.join(tmp_path, "scheduler.pt"))
+        torch.save(snapshot["rng_state"], os.path.join(tmp_path, "rng_state.pth"))
+        torch.save(snapshot["training_args"], os.path.join(tmp_path, "training_args.bin"))
+        with open(os.path.join(tmp_path, "trainer_state.json"), "w", encoding='utf-8') as f:
+            f.write(snapshot["trainer_state"])
+        if self.tokenizer is not None:
+            self.tokenizer.save_pretrained(tmp_path)
+        for name, extra_state in snapshot["extra_states"].items():
+            with open(os.path.join(tmp_path, name), "w", encoding='utf-8') as f:
+                json.dump(extra_state, f, ensure_ascii=False, indent=2)
+
+        # manifest는 모든 파일을 기록하고 디스크에 반영한 뒤 마지막에 작성
+        files = {}
+        for name in sorted(os.listdir(tmp_path)):
+            file_path = os.path.join(tmp_path, name)
+            with open(file_path, "rb") as f:
+                os.fsync(f.fileno())
+            files[name] = {"bytes": os.path.getsize(file_path)}
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding='utf-8') as f:
+            json.dump({"step": snapshot["step"], "created_at": time.time(), "files": files}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 같은 스텝의 기존 체크포인트는 옆으로 옮겨 두고 교체가 디스크에 반영된 뒤 삭제
+        # (교체 전에 지우면 그 사이 중단 시 해당 스텝 체크포인트가 사라짐)
+        old_path = final_path + OLD_SUFFIX
+        if os.path.exists(final_path):
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(final_path, old_path)
+        os.replace(tmp_path, final_path)
+        _fsync_dir(self.output_dir)
+        shutil.rmtree(old_path, ignore_errors=True)
+        logger.info(f"체크포인트 기록 완료: {final_path} ({time.perf_counter() - start_time:.1f}초, 백그라운드)")
+        self._rotate(snapshot["best_step"])
+
+    def _rotate(self, best):
+        """save_total_limit를 넘는 오래된 체크포인트 삭제 (최고 성능 체크포인트는 유지)"""
+        if not self.save_total_limit:
+            return
+        checkpoints = list_complete_checkpoints(self.output_dir)
+        removable = [p for p in checkpoints[:-1] if checkpoint_step(os.path.basename(p)) != best]
+        excess = len(checkpoints) - self.save_total_limit
+        for path in removable[:max(0, excess)]:
+            logger.info(f"오래된 체크포인트 삭제: {path}")
+            shutil.rmtree(path, ignore_errors=True)
+
+    def on_train_end(self, args, state, control, model=None, optimizer=None, lr_scheduler=None, **kwargs):
+        if not self.is_main_process:
+            return
+        if self.deferred_step == state.global_step:
+            # 평가가 호출되지 않고 끝난 경우
+            self.deferred_step = None
+            self._snapshot(args, state, model, optimizer, lr_scheduler)
+        self.wait()
+        self.executor.shutdown(wait=True)
+
+        best = best_step(state.log_history)
+        best_path = os.path.join(self.output_dir, f"{CHECKPOINT_PREFIX}{best}") if best is not None else None
+        if best_path and is_complete_checkpoint(best_path) and best != state.global_step:
+            best_state = load_file(os.path.join(best_path, "model.safetensors"))
+            # 공유(tied) 가중치는 묶인 키 중 하나만 있으면 됨, 그 외 키가 다르면 로드하지 않고 최종 가중치 유지
+            model_state = model.state_dict()
+            groups = {}
+            for name, tensor in model_state.items():
+                groups.setdefault(tensor.data_ptr(), []).append(name)
+            missing = {
+                name for name, tensor in model_state.items()
+                if not any(other in best_state for other in groups[tensor.data_ptr()])
+            }
+            unexpected = set(best_state) - set(model_state)
+            if missing or unexpected:
+                logger.error(
+                    f"최고 성능 체크포인트 키 불일치로 최종 가중치를 유지합니다: {best_path} "
+                    f"(누락 {sorted(missing)[:5]}, 예상 밖 {sorted(unexpected)[:5]})"
+                )
+                return
+            model.load_state_dict(best_state, strict=False)
+            logger.info(f"최고 성능 체크포인트 가중치 로드: {best_path} ({BEST_METRIC} 기준)")
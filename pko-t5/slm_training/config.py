@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+학습 설정 (선언형)
+모델, 데이터 소스, 패딩 전략, 정밀도, 옵티마이저, 배치/누적, 평가 예산을 dataclass로 정의하고
+JSON 파일 또는 "섹션.키=값" 형식의 명령행 덮어쓰기로 조정
+표준 라이브러리만 사용 (CLI 시작 시 torch/transformers를 불러오지 않음)
+"""
+
+import os
+import json
+from dataclasses import dataclass, field, asdict, fields, is_dataclass
+
+# 저장소 루트 (pko-t5/slm_training/config.py 기준 두 단계 위)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CSV_DIR = os.path.join(REPO_ROOT, "csv")
+# 학습 결과 저장 위치 (test_pko_t5.py, distill_pko_t5.py 등이 읽는 경로와 동일)
+OUTPUT_ROOT = "/Volumes/Data"
+
+PADDING_STRATEGIES = ("longest", "max_length")
+PRECISIONS = ("fp32", "fp16", "bf16")
+DEVICES = ("auto", "cpu", "cuda")
+
+def default_csv_files():
+    """저장소 csv 디렉토리의 도메인 데이터셋 (없는 파일은 로드 시 건너뜀)"""
+    return [os.path.join(CSV_DIR, f"domain{i}_dataset.csv") for i in range(1, 11)]
+
+@dataclass
+class ModelConfig:
+    # 앞에서부터 로드를 시도하고 처음 성공한 모델 사용
+    candidates: list = field(default_factory=lambda: [
+        "paust/pko-t5-base",
+        "google/flan-t5-base",
+        "google/mt5-small",
+        "facebook/mbart-large-50",
+    ])
+    gradient_checkpointing: bool = False
+
+@dataclass
+class DataConfig:
+    csv_files: list = field(default_factory=default_csv_files)
+    source_prefix: str = "분석: "     # T5 계열 모델 입력 앞에 붙는 태스크 접두어
+    max_source_length: int = 256
+    max_target_length: int = 256
+    # longest: 배치별 동적 패딩 (콜레이터), max_length: 토큰화 시 고정 길이 패딩 (기존 스크립트 방식)
+    padding: str = "longest"
+    pad_to_multiple_of: int = None
+    # 토큰화 결과를 int32 배열 샤드로 저장하고 워커에서 벡터화 패딩 (false면 DataCollatorForSeq2Seq)
+    token_shards: bool = True
+    eval_ratio: float = 0.2
+    # 도메인별 에포크당 최대 학습 예제 수 ({"군중 밀집 및 체류 감지": 5000}, 없으면 전체 사용, 토큰 샤드 필요)
+    domain_quotas: dict = None
+    # 수학 계산(측정값/기준값) 포함 데이터 비율 (0이면 샘플링하지 않음)
+    math_focus_ratio: float = 0.0
+    # 수학 데이터 행당 수치 변경 증강 개수 (0이면 증강하지 않음)
+    math_augmentations: int = 0
+    # 입력/타겟 시각·수치 표기 정규화 (korean_normalizer, 모델 config.json에 기록되어 추론 시 자동 적용)
+    normalize_text: bool = False
+    annotate_difference: bool = True  # 정규화 시 입력 끝에 계산된 차이 명시 ("(차이 +22명)")
+
+@dataclass
+class OptimizerConfig:
+    optim: str = "adamw_torch"       # adamw_torch | adafactor | adamw_bnb_8bit ...
+    learning_rate: float = 2e-5
+    weight_decay: float = 0.01
+    warmup_steps: int = 50
+    max_grad_norm: float = 1.0
+
+@dataclass
+class EvalConfig:
+    eval_steps: int = 100
+    save_steps: int = 100
+    logging_steps: int = 20
+    save_total_limit: int = 2
+    max_eval_samples: int = None      # 평가 예산: 검증 샘플 수 상한 (None이면 전체)
+    predict_with_generate: bool = False
+    generation_max_length: int = 256
+    generation_num_beams: int = 2
+
+@dataclass
+class CurriculumConfig:
+    # 타겟 길이/산술 난이도 순으로 쉬운 예제부터 샘플링 (토큰 샤드 필요)
+    enabled: bool = False
+    initial_competence: float = 0.1   # 학습 시작 시 샘플링하는 난이도 하위 비율
+    warmup_ratio: float = 0.5         # 전체 학습 중 이 비율이 지나면 모든 예제를 균등 샘플링
+    length_weight: float = 0.5        # 난이도 = length_weight * 길이 순위 + (1 - length_weight) * 산술 순위
+    target_eval_loss: float = None    # 설정 시 목표 평가 손실 도달 스텝 기록 (steps_to_target.json)
+
+@dataclass
+class HardExampleConfig:
+    # 평가마다 학습 데이터 일부를 생성해 보고 수치가 틀린 예제를 다음 에포크에 더 자주 샘플링 (토큰 샤드 필요)
+    enabled: bool = False
+    slice_size: int = 256             # 평가 1회당 생성해 보는 학습 예제 수 (평가마다 다음 구간으로 순환)
+    batch_size: int = 32              # 탐욕적 디코딩 배치 크기
+    boost: float = 2.0                # 틀릴 때마다 곱하는 샘플링 가중치
+    max_weight: float = 8.0           # 가중치 상한 (맞히면 1로 복귀)
+
+@dataclass
+class TrainingConfig:
+    name: str = "cpu"
+    output_dir: str = os.path.join(OUTPUT_ROOT, "slm_model")
+    seed: int = 42
+    device: str = "auto"
+    precision: str = "fp32"           # 지원하지 않는 장치에서는 자동으로 fp32 사용
+    num_train_epochs: float = 3
+    per_device_train_batch_size: int = 1
+    per_device_eval_batch_size: int = 1
+    gradient_accumulation_steps: int = 2
+    dataloader_num_workers: int = 1
+    dataloader_prefetch_factor: int = 4   # 워커당 미리 만들어 두는 배치 수
+    dataloader_pin_memory: bool = False
+    report_to: list = field(default_factory=list)
+    # 메모리에 맞는 최대 배치를 측정해 배치/누적/데이터로더 워커 수를 자동 결정 (실효 배치는 유지)
+    auto_tune: bool = False
+    # save_steps마다 CPU 스냅샷을 백그라운드 스레드로 기록 (false면 Trainer 동기 저장)
+    async_checkpoint: bool = True
+    # torchrun 실행 시 자동 설정 (CPU: gloo, CUDA: nccl)
+    ddp_backend: str = None
+    instrumentation: bool = True
+    torch_profiler: bool = False
+    model: ModelConfig = field(default_factory=ModelConfig)
+    data: DataConfig = field(default_factory=DataConfig)
+    optimizer: OptimizerConfig = field(default_factory=OptimizerConfig)
+    eval: EvalConfig = field(default_factory=EvalConfig)
+    curriculum: CurriculumConfig = field(default_factory=CurriculumConfig)
+    hard_examples: HardExampleConfig = field(default_factory=HardExampleConfig)
+
+    def validate(self):
+        if self.data.padding not in PADDING_STRATEGIES:
+            raise ValueError(f"알 수 없는 패딩 전략: {self.data.padding} (선택 가능: {PADDING_STRATEGIES})")
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"알 수 없는 정밀도: {self.precision} (선택 가능: {PRECISIONS})")
+        if self.device not in DEVICES:
+            raise ValueError(f"알 수 없는 장치: {self.device} (선택 가능: {DEVICES})")
+        return self
+
+    def to_dict(self):
+        return asdict(self)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+def _coerce(instance, f, value):
+    """필드 선언 타입으로 값 변환 (변환할 수 없으면 ValueError, None은 기본값이 None인 필드만 허용)"""
+    name = f"{type(instance).__name__}.{f.name}"
+    if value is None:
+        if f.default is None:
+            return None
+        raise ValueError(f"{name}에는 None을 쓸 수 없습니다.")
+    kind = f.type
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+    elif kind is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif kind is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif kind is str:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+    elif kind in (list, dict):
+        if isinstance(value, kind):
+            return value
+    else:
+        return value
+    raise ValueError(f"{name}는 {kind.__name__} 값이어야 합니다: {value!r}")
+
+def _merge(instance, values):
+    """dataclass 인스턴스에 딕셔너리 값을 재귀적으로 덮어쓰기 (알 수 없는 키는 오류, 값은 필드 타입으로 변환)"""
+    known = {f.name: f for f in fields(instance)}
+    for key, value in values.items():
+        if key not in known:
+            raise KeyError(f"알 수 없는 설정 키: {type(instance).__name__}.{key}")
+        current = getattr(instance, key)
+        if is_dataclass(current) and isinstance(value, dict):
+            _merge(current, value)
+        else:
+            setattr(instance, key, _coerce(instance, known[key], value))
+    return instance
+
+def update_config(config, values):
+    """중첩 딕셔너리로 설정 갱신 ({"optimizer": {"learning_rate": 1e-4}})"""
+    return _merge(config, values).validate()
+
+def load_config(path, base=None):
+    """JSON 설정 파일 로드 (base 설정 위에 덮어쓰기)"""
+    with open(path, encoding='utf-8') as f:
+        values = json.load(f)
+    return update_config(base if base is not None else TrainingConfig(), values)
+
+def parse_override(text):
+    """ "optimizer.learning_rate=1e-4" -> {"optimizer": {"learning_rate": 1e-4}} (값은 JSON으로 해석)"""
+    if "=" not in text:
+        raise ValueError(f"덮어쓰기 형식은 '섹션.키=값' 입니다: {text}")
+    dotted_key, raw_value = text.split("=", 1)
+    try:
+        value = json.loads(raw_value)
+    except json.JSONDecodeError:
+        value = raw_value  # 따옴표 없는 문자열
+    result = {}
+    node = result
+    keys = dotted_key.strip().split(".")
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+    return result
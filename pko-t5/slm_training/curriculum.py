@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+길이/산술 난이도 기반 커리큘럼 샘플링
+- 난이도: 타겟 토큰 길이 순위와 산술 난이도 순위의 가중 평균
+  산술 난이도 = 수치 크기(log10) + 기준값과의 차이 계산 필요 + 소수("1.9m") + 단위 혼합
+- competence 기반 커리큘럼: 학습 진행률 t에서 c(t) = min(1, sqrt(t(1 - c0²)/T + c0²)),
+  난이도 하위 c(t) 비율의 예제에서만 샘플링하다가 T 이후에는 전체 균등 셔플
+- 목표 평가 손실에 도달한 스텝을 steps_to_target.json으로 기록하고, 균등 샘플링과 비교 실행 가능
+  python -m slm_training.curriculum --preset cpu --target-loss 0.5
+"""
+
+import os
+import sys
+import json
+import math
+import copy
+import logging
+import argparse
+
+import numpy as np
+from transformers import TrainerCallback
+
+from input_parser import parse_input, to_number, TIME_PATTERN, VALUE_PATTERN
+from .sampler import ResumableSampler
+
+logger = logging.getLogger(__name__)
+
+STEPS_TO_TARGET_FILE = "steps_to_target.json"
+
+def arithmetic_difficulty(input_text):
+    """입력 문장("도메인, 입력")의 산술 난이도 점수 (0이면 수치 없음)"""
+    text = input_text.split(", ", 1)[-1]
+    parsed = parse_input(text)
+    numbers = [value for value in (parsed["measured"], parsed["baseline"]) if value is not None]
+    if not numbers:
+        return 0.0
+
+    score = math.log10(max(to_number(value) for value in numbers) + 1)
+    # 기준값과의 차이(초과/부족) 계산이 필요한 입력
+    if parsed["difference"] is not None:
+        score += 1.0
+    if any("." in value for value in numbers):
+        score += 1.0
+    # 시각 표현을 제외한 수치의 단위 종류 ("4명 ... 1.8m")
+    time_spans = [m.span() for m in TIME_PATTERN.finditer(text)]
+    units = {
+        m.group(2) for m in VALUE_PATTERN.finditer(text)
+        if not any(start < m.end() and m.start() < end for start, end in time_spans)
+    }
+    score += max(0, len(units) - 1)
+    return score
+
+def competence(progress, initial_competence):
+    """진행률(0~1) -> 샘플링 가능한 난이도 비율 (제곱근 competence 함수)"""
+    return np.minimum(1.0, np.sqrt(progress * (1 - initial_competence ** 2) + initial_competence ** 2))
+
+def _rank(values):
+    """값의 순위를 0~1로 정규화"""
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+    return ranks / max(len(values) - 1, 1)
+
+class CurriculumSampler(ResumableSampler):
+    """쉬운 예제에서 어려운 예제로 샘플링 범위를 넓혀 가는 재개 가능 샘플러
+
+    에포크 순서는 (시드, 에포크)로 결정되므로 ResumableSampler와 같은 상태로 재개됨
+    """
+
+    def __init__(self, domain_ids, target_lengths, arith_difficulty, domain_names=None, seed=42,
+                 domain_quotas=None, curriculum_samples=1, initial_competence=0.1, length_weight=0.5):
+        self.difficulty = length_weight * _rank(target_lengths) + (1 - length_weight) * _rank(arith_difficulty)
+        self.curriculum_samples = max(1, curriculum_samples)
+        self.initial_competence = initial_competence
+        super().__init__(domain_ids, domain_names, seed=seed, domain_quotas=domain_quotas)
+
+    def order_pool(self, pool, rng):
+        # 에포크 시작까지 소비한 전체 샘플 수 기준 진행률
+        start = self.epoch * len(pool)
+        progress = (start + np.arange(len(pool))) / self.curriculum_samples
+        allowed = competence(np.minimum(progress, 1.0), self.initial_competence)
+        if allowed[0] >= 1.0:
+            # 커리큘럼 이후에는 기본 순서 (예제 가중치가 있으면 가중 추출)
+            return super().order_pool(pool, rng)
+
+        ranked = pool[np.argsort(self.difficulty[pool], kind="stable")]
+        # 각 위치에서 난이도 하위 allowed 비율 안의 예제를 무작위로 선택
+        limit = np.maximum(1, np.ceil(allowed * len(pool))).astype(np.int64)
+        return ranked[(rng.random(len(pool)) * limit).astype(np.int64)]
+
+class StepsToTargetCallback(TrainerCallback):
+    """평가 손실이 처음 목표 이하가 된 스텝 기록 (학습 종료 시 steps_to_target.json 저장)"""
+
+    def __init__(self, target_loss, output_dir=None, label=None):
+        self.target_loss = target_loss
+        self.output_dir = output_dir
+        self.label = label
+        self.reached_step = None
+        self.best_loss = None
+
+    def on_evaluate(self, args, state, control, metrics=None, **kwargs):
+        loss = (metrics or {}).get("eval_loss")
+        if loss is None:
+            return
+        self.best_loss = loss if self.best_loss is None else min(self.best_loss, loss)
+        if self.reached_step is None and loss <= self.target_loss:
+            self.reached_step = state.global_step
+            logger.info(f"목표 평가 손실 {self.target_loss} 도달: 스텝 {state.global_step} (eval_loss {loss:.4f})")
+
+    def on_train_end(self, args, state, control, **kwargs):
+        report = {
+            "label": self.label,
+            "target_eval_loss": self.target_loss,
+            "steps_to_target": self.reached_step,
+            "best_eval_loss": self.best_loss,
+            "total_steps": state.global_step,
+        }
+        if self.reached_step is None:
+            logger.info(f"목표 평가 손실 {self.target_loss} 미도달 (최저 {self.best_loss})")
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, STEPS_TO_TARGET_FILE), "w", encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+def compare_with_uniform(config, target_loss):
+    """같은 설정으로 균등 샘플링/커리큘럼 학습을 각각 실행하고 목표 손실 도달 스텝 비교"""
+    from .trainer import train
+
+    reports = {}
+    for label, enabled in (("uniform", False), ("curriculum", True)):
+        run_config = copy.deepcopy(config)
+        run_config.output_dir = f"{config.output_dir}_{label}"
+        run_config.curriculum.enabled = enabled
+        run_config.curriculum.target_eval_loss = target_loss
+        logger.info(f"[{label}] 학습 시작: {run_config.output_dir}")
+        if not train(run_config):
+            logger.error(f"[{label}] 학습 실패")
+            return None
+        with open(os.path.join(run_config.output_dir, STEPS_TO_TARGET_FILE), encoding='utf-8') as f:
+            reports[label] = json.load(f)
+
+    uniform, curriculum = reports["uniform"]["steps_to_target"], reports["curriculum"]["steps_to_target"]
+    if uniform and curriculum:
+        reports["speedup"] = uniform / curriculum
+    logger.info("=" * 50)
+    logger.info(f"[커리큘럼 비교] 목표 eval_loss {target_loss}")
+    for label in ("uniform", "curriculum"):
+        report = reports[label]
+        logger.info(
+            f"  {label}: 도달 스텝 {report['steps_to_target'] or '미도달'} / 전체 {report['total_steps']}, "
+            f"최저 eval_loss {report['best_eval_loss']}"
+        )
+    if "speedup" in reports:
+        logger.info(f"  커리큘럼이 균등 샘플링 대비 {reports['speedup']:.2f}배 빠르게 도달")
+    logger.info("=" * 50)
+
+    report_path = f"{config.output_dir}_curriculum_comparison.json"
+    with open(report_path, "w", encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    logger.info(f"비교 결과 저장: {report_path}")
+    return reports
+
+def main(argv=None):
+    from .__main__ import build_config
+
+    parser = argparse.ArgumentParser(prog="python -m slm_training.curriculum", description="커리큘럼 vs 균등 샘플링 비교")
+    parser.add_argument("--preset", default="auto")
+    parser.add_argument("--config")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--output-dir")
+    parser.add_argument("--target-loss", type=float, required=True, help="목표 평가 손실 (eval_loss)")
+    args = parser.parse_args(argv)
+    args.auto_tune = False
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    reports = compare_with_uniform(build_config(args), args.target_loss)
+    return 0 if reports is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+학습 데이터 로드/샘플링/증강/토큰화
+기존 스크립트들의 load_dataset, 수학 데이터 샘플링, 수학 데이터 증강, 전처리 함수를 통합
+"""
+
+import os
+import re
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 수학 계산(측정값/기준값 비교)이 포함된 입력으로 보는 키워드
+MATH_KEYWORDS = ['명', '기준', '수용인원', '허용', '최대', '제한', '초과', '부족', '차이']
+
+# 수치 증강용 패턴 (행마다 다시 해석하지 않도록 미리 컴파일)
+COUNT_VALUE = re.compile(r'(\d+)명')
+BASELINE_COUNT = re.compile(r'기준.*?(\d+)명')
+EXCESS_CLAUSE = re.compile(r'기준.*?명.*?초과.*?명')
+DEFICIT_CLAUSE = re.compile(r'기준.*?명.*?부족.*?명')
+EQUAL_CLAUSE = re.compile(r'기준.*?명.*?동일.*?명')
+
+def load_dataframe(csv_files):
+    """CSV 파일들을 하나의 DataFrame으로 로드 (없는 파일은 경고 후 건너뜀)"""
+    import pandas as pd
+
+    all_data = []
+    for csv_file in csv_files:
+        if os.path.exists(csv_file):
+            df = pd.read_csv(csv_file, encoding='utf-8')
+            all_data.append(df)
+            logger.info(f"로드된 파일: {csv_file}, 데이터 수: {len(df)}")
+        else:
+            logger.warning(f"파일을 찾을 수 없음: {csv_file}")
+
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+
+    df = pd.concat(all_data, ignore_index=True)
+    logger.info(f"원본 데이터 수: {len(df)}")
+    df = df.dropna(subset=['Domain', 'Input', 'Output']).reset_index(drop=True)
+    logger.info(f"정제된 데이터 수: {len(df)}")
+    return df
+
+def is_math_row(df):
+    return df['Input'].str.contains('|'.join(MATH_KEYWORDS), na=False)
+
+def augment_math_data(df, num_augmentations, seed):
+    """기준/측정 인원 수치를 바꾼 증강 데이터 생성 (출력의 초과/부족 계산도 함께 수정)"""
+    import pandas as pd
+
+    rng = random.Random(seed)
+    augmented = []
+    for domain, input_text, output_text in zip(df['Domain'], df['Input'], df['Output']):
+        numbers = COUNT_VALUE.findall(input_text)
+        baselines = BASELINE_COUNT.findall(input_text)
+        if not numbers or not baselines:
+            continue
+
+        baseline = int(baselines[0])
+        for _ in range(num_augmentations):
+            new_current = rng.randint(max(1, baseline - 50), baseline + 100)
+            new_baseline = rng.randint(max(1, new_current - 30), new_current + 30)
+
+            new_input = COUNT_VALUE.sub(f'{new_current}명', input_text, count=1)
+            new_input = BASELINE_COUNT.sub(f'기준 {new_baseline}명', new_input)
+
+            diff = new_current - new_baseline
+            if diff > 0:
+                new_output = EXCESS_CLAUSE.sub(f'기준 {new_baseline}명을 {abs(diff)}명 초과한 {new_current}명', output_text)
+            elif diff < 0:
+                new_output = DEFICIT_CLAUSE.sub(f'기준 {new_baseline}명보다 {abs(diff)}명 적은 {new_current}명', output_text)
+            else:
+                new_output = EQUAL_CLAUSE.sub(f'기준 {new_baseline}명과 동일한 {new_current}명', output_text)
+
+            augmented.append({'Domain': domain, 'Input': new_input, 'Output': new_output})
+
+    return pd.DataFrame(augmented, columns=['Domain', 'Input', 'Output'])
+
+def sample_math_focus(df, math_ratio, seed):
+    """수학 계산 데이터가 math_ratio 비율이 되도록 전체 크기를 유지하며 재샘플링"""
+    import pandas as pd
+
+    math_mask = is_math_row(df)
+    math_data, general_data = df[math_mask], df[~math_mask]
+    if len(math_data) == 0:
+        return df
+
+    math_sample_size = min(int(len(df) * math_ratio), len(math_data))
+    general_sample_size = min(len(df) - math_sample_size, len(general_data))
+    df = pd.concat([
+        math_data.sample(n=math_sample_size, random_state=seed),
+        general_data.sample(n=general_sample_size, random_state=seed),
+    ], ignore_index=True)
+    logger.info(f"수학 계산 중심 데이터셋: {len(df)}개 (수학 데이터 {math_sample_size}개)")
+    return df
+
+def build_datasets(config, instrumentation=None):
+    """설정에 따라 로드 -> 증강 -> 샘플링 -> 분할한 DatasetDict(train/validation) 생성"""
+    import pandas as pd
+    from datasets import Dataset, DatasetDict
+    from sklearn.model_selection import train_test_split
+    from instrumentation import maybe_phase
+
+    data = config.data
+    with maybe_phase(instrumentation, "csv_load"):
+        df = load_dataframe(data.csv_files)
+
+    if data.math_augmentations > 0:
+        with maybe_phase(instrumentation, "augmentation"):
+            augmented = augment_math_data(df[is_math_row(df)], data.math_augmentations, config.seed)
+        logger.info(f"증강된 수학 데이터 수: {len(augmented)}")
+        df = pd.concat([df, augmented], ignore_index=True)
+
+    if data.math_focus_ratio > 0:
+        df = sample_math_focus(df, data.math_focus_ratio, config.seed)
+
+    if data.normalize_text:
+        from korean_normalizer import normalize_series
+        # 타겟은 입력의 시각 표현을 그대로 옮기므로 같은 규칙으로 함께 정규화
+        with maybe_phase(instrumentation, "normalization"):
+            df['Input'] = normalize_series(df['Input'], with_difference=data.annotate_difference)
+            df['Output'] = normalize_series(df['Output'])
+
+    df['input_text'] = df['Domain'] + ", " + df['Input']
+    df['target_text'] = df['Output']
+    logger.info(f"평균 입력 길이: {df['input_text'].str.len().mean():.1f}자")
+    logger.info(f"평균 출력 길이: {df['target_text'].str.len().mean():.1f}자")
+    logger.info(f"도메인 종류: {df['Domain'].unique().tolist()}")
+
+    train_df, eval_df = train_test_split(
+        df[['input_text', 'target_text']],
+        test_size=data.eval_ratio,
+        random_state=config.seed
+    )
+    # 평가 예산: 검증 샘플 수 상한
+    if config.eval.max_eval_samples is not None and len(eval_df) > config.eval.max_eval_samples:
+        eval_df = eval_df.sample(n=config.eval.max_eval_samples, random_state=config.seed)
+
+    return DatasetDict({
+        'train': Dataset.from_pandas(train_df, preserve_index=False),
+        'validation': Dataset.from_pandas(eval_df, preserve_index=False),
+    })
+
+def preprocess_function(examples, tokenizer, config, model_name, padding=None):
+    """입력/타겟 토큰화 (max_length 패딩이면 패딩 레이블을 -100으로 치환)"""
+    data = config.data
+    inputs = examples["input_text"]
+    if "t5" in model_name.lower():
+        inputs = [data.source_prefix + text for text in inputs]
+
+    if padding is None:
+        padding = "max_length" if data.padding == "max_length" else False
+    model_inputs = tokenizer(inputs, max_length=data.max_source_length, padding=padding, truncation=True)
+    labels = tokenizer(
+        text_target=examples["target_text"], max_length=data.max_target_length, padding=padding, truncation=True
+    )
+    model_inputs["labels"] = [
+        [-100 if token == tokenizer.pad_token_id else token for token in label]
+        for label in labels["input_ids"]
+    ] if padding else labels["input_ids"]
+    return model_inputs
+
+def tokenize_datasets(dataset, tokenizer, config, model_name, instrumentation=None, padding=None):
+    from instrumentation import maybe_phase
+
+    with maybe_phase(instrumentation, "tokenization"):
+        return dataset.map(
+            lambda examples: preprocess_function(examples, tokenizer, config, model_name, padding),
+            batched=True,
+            remove_columns=dataset["train"].column_names
+        )
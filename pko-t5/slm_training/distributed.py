@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+다중 프로세스 데이터 병렬 학습 (torchrun 실행 시)
+  torchrun --nproc_per_node=2 -m slm_training --preset cpu
+  torchrun --nnodes=2 --node_rank=0 --nproc_per_node=2 --master_addr=10.0.0.1 --master_port=29500 -m slm_training --preset cpu
+- CPU는 gloo, CUDA는 nccl 백엔드로 프로세스 그룹 초기화 (그래디언트 all-reduce는 Trainer의 DDP 래핑이 담당)
+- 모든 rank가 같은 시드로 같은 학습 데이터를 만들고, Trainer의 DistributedSampler가 rank별로 겹치지 않게 나눠 읽음
+- 로그/체크포인트/계측 결과는 rank 0에서만 기록
+- 노드의 물리 코어를 로컬 프로세스 수로 나눠 프로세스별 스레드 수 지정 (torchrun 기본값 OMP_NUM_THREADS=1 대체)
+"""
+
+import os
+import math
+import logging
+
+import psutil
+import torch
+import torch.distributed as dist
+
+logger = logging.getLogger(__name__)
+
+def world_info():
+    """torchrun 환경 변수 기준 (rank, local_rank, world_size, local_world_size)"""
+    return (
+        int(os.environ.get("RANK", 0)),
+        int(os.environ.get("LOCAL_RANK", 0)),
+        int(os.environ.get("WORLD_SIZE", 1)),
+        int(os.environ.get("LOCAL_WORLD_SIZE", 1)),
+    )
+
+def is_distributed():
+    return world_info()[2] > 1
+
+def is_main_process():
+    return world_info()[0] == 0
+
+def is_local_main_process():
+    return world_info()[1] == 0
+
+def barrier():
+    if dist.is_available() and dist.is_initialized():
+        dist.barrier()
+
+def broadcast_object(value):
+    """rank 0의 값을 모든 rank에 전달 (단일 프로세스면 그대로 반환)"""
+    if not (dist.is_available() and dist.is_initialized()):
+        return value
+    objects = [value]
+    dist.broadcast_object_list(objects, src=0)
+    return objects[0]
+
+def threads_per_process():
+    """노드 물리 코어를 로컬 프로세스 수로 나눈 스레드 수"""
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    return max(1, cores // world_info()[3])
+
+def setup_distributed(config):
+    """프로세스 그룹 초기화 + 스레드 수 지정 (단일 프로세스면 아무것도 하지 않음)"""
+    rank, local_rank, world_size, local_world_size = world_info()
+    if world_size <= 1:
+        return False
+
+    backend = "nccl" if config.device == "cuda" else "gloo"
+    if config.device == "cuda":
+        torch.cuda.set_device(local_rank)
+    else:
+        threads = threads_per_process()
+        torch.set_num_threads(threads)
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+    # accelerate(Trainer)는 이미 초기화된 프로세스 그룹을 그대로 사용
+    if not dist.is_initialized():
+        dist.init_process_group(backend=backend)
+    config.ddp_backend = backend
+
+    logger.info(
+        f"분산 학습: rank {rank}/{world_size} (로컬 {local_rank}/{local_world_size}), 백엔드 {backend}, "
+        f"프로세스당 스레드 {torch.get_num_threads()}개"
+    )
+    return True
+
+def scale_for_world_size(config):
+    """전체 실효 배치(배치 x 누적 x 프로세스 수)가 프리셋과 같도록 rank별 그래디언트 누적을 줄임"""
+    world_size = world_info()[2]
+    if world_size <= 1:
+        return config
+    effective_batch_size = config.per_device_train_batch_size * config.gradient_accumulation_steps
+    accumulation = max(1, math.ceil(effective_batch_size / (config.per_device_train_batch_size * world_size)))
+    if accumulation != config.gradient_accumulation_steps:
+        logger.info(
+            f"프로세스 {world_size}개: 그래디언트 누적 {config.gradient_accumulation_steps} -> {accumulation} "
+            f"(전체 실효 배치 {config.per_device_train_batch_size * accumulation * world_size})"
+        )
+        config.gradient_accumulation_steps = accumulation
+    return config
+
+def cleanup_distributed():
+    if dist.is_available() and dist.is_initialized():
+        dist.destroy_process_group()
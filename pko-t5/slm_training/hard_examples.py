@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+오답 예제 마이닝 (하드 예제 재가중)
+- 평가마다 학습 데이터의 일부 구간(평가 회차마다 다음 구간으로 순환)을 탐욕적 디코딩으로 배치 생성
+- 출력 수치가 틀린 예제(정답 수치 누락 또는 입력에서 나올 수 없는 수치)를 찾아 다음 에포크 샘플링 가중치를 올림
+  맞힌 예제는 가중치를 1로 되돌림 -> 대부분을 차지하는 쉬운 양호 예제 대신 모델이 틀리는 예제에 학습을 집중
+- 데이터셋은 다시 만들지 않고 샘플러 가중치만 갱신 (가중치는 샘플러 상태로 체크포인트에 저장)
+"""
+
+import re
+import time
+import logging
+
+import numpy as np
+import torch
+from transformers import TrainerCallback
+
+from input_parser import NUMBER
+from number_rules import allowed_numbers
+from .distributed import broadcast_object
+from .token_shards import LABEL_PAD_ID
+
+logger = logging.getLogger(__name__)
+
+NUMBER_PATTERN = re.compile(NUMBER)
+
+def numbers_wrong(input_text, generated, reference):
+    """정답 수치가 빠졌거나 정답/허용 수치(입력, 차이, 시각, 도메인 파생 수치) 어디에도 없는 수치가 있으면 True"""
+    generated_numbers = set(NUMBER_PATTERN.findall(generated))
+    reference_numbers = set(NUMBER_PATTERN.findall(reference))
+    missing = reference_numbers - generated_numbers
+    invented = generated_numbers - reference_numbers - allowed_numbers(input_text)
+    return bool(missing or invented)
+
+class HardExampleCallback(TrainerCallback):
+    """평가 후 학습 데이터 순환 구간을 생성해 보고 수치가 틀린 예제의 샘플링 가중치를 올리는 콜백
+
+    생성은 rank 0에서만 하고, 갱신할 가중치를 모든 rank에 전달해 샘플러를 같은 상태로 유지
+    """
+
+    def __init__(self, sampler, dataset, tokenizer, source_prefix="", slice_size=256, batch_size=32,
+                 max_length=256, boost=2.0, max_weight=8.0, is_main_process=True):
+        self.sampler = sampler
+        self.dataset = dataset
+        self.tokenizer = tokenizer
+        self.source_prefix = source_prefix
+        self.slice_size = min(slice_size, len(dataset))
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.boost = boost
+        self.max_weight = max_weight
+        self.is_main_process = is_main_process
+
+    def slice_indices(self, global_step, eval_steps):
+        """평가 회차(스텝 기준)에 해당하는 순환 구간 (재개해도 같은 구간에서 이어짐)"""
+        rotation = max(global_step // max(eval_steps, 1) - 1, 0)
+        start = rotation * self.slice_size
+        return (start + np.arange(self.slice_size)) % len(self.dataset)
+
+    def _decode(self, ids):
+        text = self.tokenizer.decode(ids, skip_special_tokens=True)
+        return text[len(self.source_prefix):] if self.source_prefix and text.startswith(self.source_prefix) else text
+
+    def mine(self, model, indices):
+        """구간을 배치 생성해 예제별 오답 여부 반환"""
+        device = next(model.parameters()).device
+        was_training = model.training
+        model.eval()
+        wrong = np.zeros(len(indices), dtype=bool)
+        try:
+            for start in range(0, len(indices), self.batch_size):
+                batch = self.dataset.__getitems__(indices[start:start + self.batch_size])
+                with torch.no_grad():
+                    outputs = model.generate(
+                        input_ids=batch["input_ids"].to(device),
+                        attention_mask=batch["attention_mask"].to(device),
+                        max_length=self.max_length,
+                        num_beams=1,
+                        do_sample=False,
+                        pad_token_id=self.tokenizer.pad_token_id,
+                        eos_token_id=self.tokenizer.eos_token_id
+                    )
+                labels = batch["labels"].masked_fill(batch["labels"] == LABEL_PAD_ID, self.tokenizer.pad_token_id)
+                for i, (input_ids, output_ids, label_ids) in enumerate(zip(batch["input_ids"], outputs, labels)):
+                    wrong[start + i] = numbers_wrong(
+                        self._decode(input_ids), self._decode(output_ids), self._decode(label_ids)
+                    )
+        finally:
+            model.train(was_training)
+        return wrong
+
+    def on_evaluate(self, args, state, control, model=None, **kwargs):
+        update = None
+        if self.is_main_process:
+            start_time = time.perf_counter()
+            indices = self.slice_indices(state.global_step, args.eval_steps)
+            try:
+                wrong = self.mine(model, indices)
+            except Exception as e:
+                logger.error(f"오답 예제 마이닝 중 오류: {e}")
+                wrong = None
+            if wrong is not None:
+                current = self.sampler.next_weights
+                weights = current[indices] if current is not None else np.ones(len(indices))
+                weights = np.where(wrong, np.minimum(weights * self.boost, self.max_weight), 1.0)
+                update = (indices.tolist(), weights.tolist())
+                logger.info(
+                    f"오답 예제 마이닝: {len(indices)}개 중 {int(wrong.sum())}개 수치 오류 "
+                    f"({time.perf_counter() - start_time:.1f}초), 다음 에포크부터 가중치 적용"
+                )
+        update = broadcast_object(update)
+        if update is not None:
+            self.sampler.set_next_weights(*update)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+새로 추가된 CSV 행만으로 이어서 학습하는 증분 학습
+- 전체 학습이 끝나면 출력 디렉토리에 data_manifest.json(CSV별 행 수, 바이트 수, 내용 해시) 기록
+- 증분 학습은 manifest 이후 뒤에 추가된 행(델타)과 기존 행 일부(리플레이, 망각 방지)를 섞어
+  가장 최근 모델(직전 증분 결과 또는 전체 학습 결과/최신 체크포인트)에서 짧게 이어서 학습
+- 기존 행이 추가 외에 수정/삭제되었으면(앞부분 해시 불일치) 증분 학습 대신 전체 학습 필요
+  python -m slm_training.incremental --preset cpu
+  python -m slm_training.incremental --preset cpu --replay-ratio 2 --epochs 1 --dry-run
+  python -m slm_training.incremental --preset cpu --init-manifest   # 이미 학습된 모델의 manifest를 현재 CSV로 생성
+"""
+
+import io
+import os
+import sys
+import math
+import json
+import time
+import copy
+import hashlib
+import logging
+import argparse
+
+from .checkpointing import find_latest_checkpoint
+from .distributed import is_main_process
+
+logger = logging.getLogger(__name__)
+
+DATA_MANIFEST_FILE = "data_manifest.json"
+INCREMENTAL_DIR = "incremental"
+INCREMENTAL_CSV = "incremental_data.csv"
+# 델타 1행당 함께 학습할 기존 행 수
+REPLAY_RATIO = 1.0
+INCREMENTAL_EPOCHS = 1
+COLUMNS = ['Domain', 'Input', 'Output']
+
+def _read_csv_bytes(data):
+    import pandas as pd
+
+    return pd.read_csv(io.BytesIO(data), encoding='utf-8')
+
+def _file_state(data, rows):
+    return {"rows": rows, "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+def build_data_manifest(csv_files):
+    """CSV별 현재 상태 (행 수는 pandas로 읽은 원본 행 수, 결측 제거 전)"""
+    files = {}
+    for path in csv_files:
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        files[path] = _file_state(data, len(_read_csv_bytes(data)))
+    return {"files": files, "created_at": time.time()}
+
+def load_data_manifest(output_dir):
+    path = os.path.join(output_dir, DATA_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def write_data_manifest(output_dir, manifest):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, DATA_MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+def collect_delta(csv_files, manifest):
+    """manifest 이후 추가된 행과 기존 행 분리 (반환: delta_df, old_df, 새 manifest 파일 상태 / 추가 외 변경이 있으면 None)"""
+    import pandas as pd
+
+    deltas, olds, files = [], [], {}
+    for path in csv_files:
+        if not os.path.exists(path):
+            logger.warning(f"파일을 찾을 수 없음: {path}")
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        df = _read_csv_bytes(data)
+        previous = manifest["files"].get(path)
+        if previous is None:
+            seen = 0
+        elif hashlib.sha256(data[:previous["bytes"]]).hexdigest() != previous["sha256"]:
+            logger.error(f"기존 행이 수정/삭제되었습니다 (추가만 증분 학습 가능, 전체 학습 필요): {path}")
+            return None
+        else:
+            seen = previous["rows"]
+        olds.append(df.iloc[:seen])
+        deltas.append(df.iloc[seen:])
+        files[path] = _file_state(data, len(df))
+        if len(df) > seen:
+            logger.info(f"추가된 행: {path} {len(df) - seen}개 (기존 {seen}개)")
+
+    def _concat(frames):
+        frames = [frame[COLUMNS] for frame in frames if len(frame)]
+        if not frames:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.concat(frames, ignore_index=True).dropna(subset=COLUMNS).reset_index(drop=True)
+
+    return _concat(deltas), _concat(olds), files
+
+def latest_model_dir(manifest, output_dir):
+    """이어서 학습할 모델: 직전 증분 결과 -> 전체 학습 결과 -> 최신 체크포인트"""
+    model_dir = manifest.get("model_dir") or output_dir
+    if os.path.exists(os.path.join(model_dir, "config.json")):
+        return model_dir
+    return find_latest_checkpoint(model_dir)
+
+def _fit_schedule(config, num_rows):
+    """작은 델타에서도 평가/저장이 일어나도록 스텝 간격과 워밍업을 전체 스텝 수에 맞춤"""
+    samples_per_step = config.per_device_train_batch_size * config.gradient_accumulation_steps
+    total_steps = max(1, math.ceil(num_rows * (1 - config.data.eval_ratio) / samples_per_step) * math.ceil(config.num_train_epochs))
+    interval = max(1, total_steps // 2)
+    if config.eval.eval_steps > interval:
+        config.eval.eval_steps = config.eval.save_steps = interval
+    config.optimizer.warmup_steps = min(config.optimizer.warmup_steps, total_steps // 10)
+    return total_steps
+
+def incremental_train(config, replay_ratio=REPLAY_RATIO, epochs=INCREMENTAL_EPOCHS, dry_run=False):
+    """델타 + 리플레이로 최신 모델을 이어서 학습 (반환: 성공 여부, 추가된 행이 없으면 True)"""
+    from .trainer import train
+
+    manifest = load_data_manifest(config.output_dir)
+    if manifest is None:
+        logger.error(
+            f"{config.output_dir}에 {DATA_MANIFEST_FILE}이 없습니다. 전체 학습을 먼저 실행하거나 "
+            "--init-manifest로 현재 CSV를 학습 완료 상태로 기록하세요."
+        )
+        return False
+    collected = collect_delta(config.data.csv_files, manifest)
+    if collected is None:
+        return False
+    delta, old, files = collected
+    if len(delta) == 0:
+        logger.info("새로 추가된 행이 없습니다.")
+        return True
+
+    base_model = latest_model_dir(manifest, config.output_dir)
+    if base_model is None:
+        logger.error(f"이어서 학습할 모델이 없습니다: {manifest.get('model_dir') or config.output_dir}")
+        return False
+
+    import pandas as pd
+
+    replay = old.sample(n=min(len(old), int(len(delta) * replay_ratio)), random_state=config.seed)
+    data = pd.concat([delta, replay], ignore_index=True)
+
+    # 같은 데이터 상태로 다시 실행하면 같은 디렉토리의 체크포인트에서 재개
+    total_rows = sum(state["rows"] for state in files.values())
+    run_dir = os.path.join(config.output_dir, INCREMENTAL_DIR, f"rows-{total_rows}")
+    run_config = copy.deepcopy(config)
+    run_config.output_dir = run_dir
+    run_config.model.candidates = [base_model]
+    run_config.num_train_epochs = epochs
+    run_config.data.csv_files = [os.path.join(run_dir, INCREMENTAL_CSV)]
+    total_steps = _fit_schedule(run_config, len(data))
+    logger.info(
+        f"증분 학습: 델타 {len(delta)}개 + 리플레이 {len(replay)}개, {base_model}에서 이어서 약 {total_steps}스텝 -> {run_dir}"
+    )
+    if dry_run:
+        return True
+
+    # 모든 rank가 같은 내용을 기록하므로 임시 파일 + 이름 변경으로 충돌 방지
+    os.makedirs(run_dir, exist_ok=True)
+    tmp_path = f"{run_config.data.csv_files[0]}.{os.getpid()}.tmp"
+    data.to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, run_config.data.csv_files[0])
+
+    if not train(run_config):
+        return False
+
+    if is_main_process():
+        history = manifest.get("history", [])
+        history.append({
+            "model_dir": run_dir,
+            "base_model": base_model,
+            "delta_rows": len(delta),
+            "replay_rows": len(replay),
+            "finished_at": time.time(),
+        })
+        write_data_manifest(config.output_dir, {
+            "files": files,
+            "created_at": time.time(),
+            "model_dir": run_dir,
+            "history": history,
+        })
+        logger.info(f"증분 학습 완료: 최신 모델 {run_dir}")
+    return True
+
+def main(argv=None):
+    from .__main__ import build_config
+
+    parser = argparse.ArgumentParser(prog="python -m slm_training.incremental", description="추가된 CSV 행 증분 학습")
+    parser.add_argument("--preset", default="auto")
+    parser.add_argument("--config")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--output-dir", help="전체 학습 출력 디렉토리 (manifest 위치)")
+    parser.add_argument("--replay-ratio", type=float, default=REPLAY_RATIO, help="델타 1행당 함께 학습할 기존 행 수")
+    parser.add_argument("--epochs", type=float, default=INCREMENTAL_EPOCHS)
+    parser.add_argument("--dry-run", action="store_true", help="델타/리플레이 크기만 출력")
+    parser.add_argument("--init-manifest", action="store_true", help="현재 CSV 전체를 학습 완료 상태로 기록하고 종료")
+    args = parser.parse_args(argv)
+    args.auto_tune = False
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = build_config(args)
+    if args.init_manifest:
+        write_data_manifest(config.output_dir, build_data_manifest(config.data.csv_files))
+        logger.info(f"manifest 기록: {os.path.join(config.output_dir, DATA_MANIFEST_FILE)}")
+        return 0
+    return 0 if incremental_train(config, args.replay_ratio, args.epochs, args.dry_run) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+하드웨어/용도별 학습 프리셋
+기존 train_pko_t5_*.py / train_math_specialized.py 스크립트의 설정을 프리셋으로 옮겨 둔 것
+"auto"는 현재 장비(CUDA, CPU bf16 지원 여부)를 보고 가장 빠른 프리셋을 고름
+"""
+
+import os
+import sys
+import shutil
+import logging
+import importlib.util
+
+from .config import (
+    TrainingConfig, ModelConfig, DataConfig, OptimizerConfig, EvalConfig, CurriculumConfig, HardExampleConfig, OUTPUT_ROOT
+)
+
+logger = logging.getLogger(__name__)
+
+LARGE_MODEL_CANDIDATES = [
+    "paust/pko-t5-large",
+    "google/flan-t5-large",
+    "google/mt5-large",
+    "paust/pko-t5-base",
+]
+
+def cpu_supports_bf16():
+    """CPU의 bf16 연산 지원 여부 확인 (AVX512-BF16 / AMX / Apple Silicon)"""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/cpuinfo", encoding="utf-8") as f:
+                cpu_flags = f.read()
+            return "avx512_bf16" in cpu_flags or "amx_bf16" in cpu_flags
+        if sys.platform == "darwin":
+            import platform
+            return platform.machine() == "arm64"
+    except Exception as e:
+        logger.warning(f"CPU bf16 지원 여부 확인 실패: {e}")
+    return False
+
+def cuda_available():
+    """NVIDIA 드라이버/장치 존재 여부로 판단 (프리셋 선택/목록 출력만으로 torch를 불러오지 않음)
+
+    실제 학습 장치는 trainer가 torch로 다시 확인 (여기서 틀려도 CPU로 대체)
+    """
+    if importlib.util.find_spec("torch") is None:
+        return False
+    if os.environ.get("CUDA_VISIBLE_DEVICES", None) in ("", "-1"):
+        return False
+    if sys.platform.startswith("linux"):
+        return os.path.exists("/proc/driver/nvidia/version") or os.path.exists("/dev/nvidia0")
+    return shutil.which("nvidia-smi") is not None
+
+def _output_dir(name=None):
+    return os.path.join(OUTPUT_ROOT, f"slm_model_{name}" if name else "slm_model")
+
+def cpu_preset():
+    """CPU 기본 설정 (train_pko_t5_cpu.py baseline 프로파일)"""
+    return TrainingConfig(
+        name="cpu",
+        output_dir=_output_dir(),
+        device="cpu",
+        precision="fp32",
+        num_train_epochs=3,
+        per_device_train_batch_size=1,
+        per_device_eval_batch_size=1,
+        gradient_accumulation_steps=2,
+        # 배치 생성은 백그라운드 워커 하나로 충분 (나머지 코어는 학습 연산에 사용)
+        dataloader_num_workers=1,
+        optimizer=OptimizerConfig(optim="adamw_torch", learning_rate=2e-5, warmup_steps=50),
+        eval=EvalConfig(eval_steps=100, save_steps=100, logging_steps=20, save_total_limit=2),
+    )
+
+def cpu_memory_efficient_preset():
+    """CPU 메모리 절약 설정: Adafactor(T5 표준) + bf16 autocast, 줄어든 옵티마이저 상태만큼 배치 확대"""
+    config = cpu_preset()
+    config.name = "cpu_memory_efficient"
+    config.precision = "bf16"
+    config.per_device_train_batch_size = 4
+    config.per_device_eval_batch_size = 4
+    config.gradient_accumulation_steps = 1
+    # relative_step=False 이므로 T5 파인튜닝 관례대로 고정 학습률 사용
+    config.optimizer = OptimizerConfig(optim="adafactor", learning_rate=5e-4, warmup_steps=50)
+    return config
+
+def cpu_8bit_preset():
+    """bitsandbytes 8bit AdamW 상태 사용 (미설치 시 adafactor로 대체)"""
+    config = cpu_memory_efficient_preset()
+    config.name = "cpu_8bit"
+    config.optimizer = OptimizerConfig(optim="adamw_bnb_8bit", learning_rate=2e-5, warmup_steps=50)
+    return config
+
+def gpu_preset():
+    """Colab T4 GPU 설정 (train_pko_t5_gpu.py)"""
+    return TrainingConfig(
+        name="gpu",
+        output_dir="/content/drive/MyDrive/SLM/slm_output",
+        device="cuda",
+        precision="fp16",
+        num_train_epochs=5,
+        per_device_train_batch_size=4,
+        per_device_eval_batch_size=4,
+        gradient_accumulation_steps=2,
+        dataloader_num_workers=2,
+        dataloader_pin_memory=True,
+        report_to=["tensorboard"],
+        model=ModelConfig(gradient_checkpointing=True),
+        optimizer=OptimizerConfig(optim="adamw_torch", learning_rate=3e-5, warmup_steps=200),
+        eval=EvalConfig(eval_steps=200, save_steps=200, logging_steps=50, save_total_limit=2,
+                        predict_with_generate=True),
+    )
+
+def large_preset():
+    """PKO-T5-large 수학 추론 중심 설정 (train_pko_t5_large.py, 키워드 과샘플링 대신 난이도 커리큘럼)"""
+    return TrainingConfig(
+        name="large",
+        output_dir=_output_dir("large"),
+        device="auto",
+        precision="fp16",  # CUDA에서만 적용, CPU에서는 fp32
+        num_train_epochs=2,
+        per_device_train_batch_size=2,
+        per_device_eval_batch_size=2,
+        gradient_accumulation_steps=4,
+        model=ModelConfig(candidates=list(LARGE_MODEL_CANDIDATES), gradient_checkpointing=True),
+        data=DataConfig(source_prefix="수학 분석: ", max_source_length=512, max_target_length=512),
+        optimizer=OptimizerConfig(optim="adamw_torch", learning_rate=1e-5, warmup_steps=100),
+        eval=EvalConfig(eval_steps=200, save_steps=200, logging_steps=50, save_total_limit=2,
+                        predict_with_generate=True, generation_max_length=512, generation_num_beams=4),
+        curriculum=CurriculumConfig(enabled=True),
+    )
+
+def math_specialized_preset():
+    """수학 데이터 증강 + 난이도 커리큘럼 + 오답 예제 재가중 설정 (train_math_specialized.py)"""
+    config = large_preset()
+    config.name = "math_specialized"
+    config.output_dir = _output_dir("math_specialized")
+    config.num_train_epochs = 3
+    config.data.source_prefix = "수학 계산 분석: "
+    config.data.math_augmentations = 5
+    config.optimizer = OptimizerConfig(optim="adamw_torch", learning_rate=5e-6, warmup_steps=200)
+    config.eval.save_total_limit = 3
+    config.hard_examples = HardExampleConfig(enabled=True, slice_size=128, batch_size=16)
+    return config
+
+def hybrid_preset():
+    """하이브리드 스크립트 설정 (train_pko_t5_cpu_hybrid.py, 배치 4 + 8배수 패딩)"""
+    return TrainingConfig(
+        name="hybrid",
+        output_dir=_output_dir(),
+        device="cpu",
+        precision="fp32",
+        num_train_epochs=3,
+        per_device_train_batch_size=4,
+        per_device_eval_batch_size=4,
+        gradient_accumulation_steps=1,
+        dataloader_num_workers=4,
+        data=DataConfig(pad_to_multiple_of=8),
+        optimizer=OptimizerConfig(optim="adamw_torch", learning_rate=5e-5, warmup_steps=0),
+        eval=EvalConfig(eval_steps=500, save_steps=500, logging_steps=100, save_total_limit=3,
+                        predict_with_generate=True),
+    )
+
+PRESETS = {
+    "cpu": cpu_preset,
+    "cpu_memory_efficient": cpu_memory_efficient_preset,
+    "cpu_8bit": cpu_8bit_preset,
+    "gpu": gpu_preset,
+    "large": large_preset,
+    "math_specialized": math_specialized_preset,
+    "hybrid": hybrid_preset,
+}
+
+def detect_preset():
+    """현재 장비에서 가장 빠른 기본 프리셋 이름"""
+    if cuda_available():
+        return "gpu"
+    if cpu_supports_bf16():
+        return "cpu_memory_efficient"
+    return "cpu"
+
+def get_preset(name):
+    """프리셋 이름으로 새 설정 생성 ("auto"는 장비 감지)"""
+    if name == "auto":
+        name = detect_preset()
+        logger.info(f"자동 선택된 프리셋: {name}")
+    if name not in PRESETS:
+        raise ValueError(f"알 수 없는 프리셋: {name} (선택 가능: {['auto'] + list(PRESETS)})")
+    return PRESETS[name]()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+체크포인트에서 바로 이어지는 재개 가능 샘플러
+- 에포크 순서는 (시드, 에포크)로 결정되는 순열이므로 상태는 시드/에포크/소비 위치/도메인별 소비 수만 저장
+- 도메인별 쿼터(에포크당 최대 예제 수)로 큰 도메인이 에포크를 독점하지 않게 제한
+- 재개 시 저장된 위치부터 인덱스를 내므로 Trainer가 이미 본 배치를 다시 읽으며 건너뛸 필요가 없음 (ignore_data_skip)
+- 예제별 샘플링 가중치(오답 예제 재가중 등)는 다음 에포크부터 적용되며 상태에 함께 저장
+"""
+
+import os
+import json
+import math
+import logging
+
+import numpy as np
+from torch.utils.data import Sampler
+from transformers import TrainerCallback
+
+logger = logging.getLogger(__name__)
+
+SAMPLER_STATE_FILE = "sampler_state.json"
+
+class ResumableSampler(Sampler):
+    """(시드, 에포크) 순열 + 소비 위치로 상태를 표현하는 샘플러
+
+    position은 학습 루프가 실제로 소비한 샘플 수 (데이터로더 워커가 미리 읽은 양과 무관하게
+    SamplerStateCallback이 스텝마다 갱신)
+    """
+
+    def __init__(self, domain_ids, domain_names=None, seed=42, domain_quotas=None):
+        self.domain_ids = np.asarray(domain_ids)
+        self.domain_names = list(domain_names or [])
+        self.seed = seed
+        self.quotas = {}
+        for name, quota in (domain_quotas or {}).items():
+            if name not in self.domain_names:
+                logger.warning(f"쿼터 대상 도메인이 학습 데이터에 없음: {name}")
+                continue
+            self.quotas[self.domain_names.index(name)] = quota
+        self.epoch = 0
+        self.position = 0
+        # 현재 에포크 순서에 쓰인 가중치 / 다음 에포크에 적용할 가중치 (None이면 균등)
+        self.weights = None
+        self.next_weights = None
+        self._order = None
+        self._order_epoch = None
+        self._length = len(self.epoch_order())
+
+    def epoch_order(self):
+        """현재 에포크의 인덱스 순서 (도메인 쿼터로 고른 예제를 order_pool로 정렬)"""
+        if self._order_epoch != self.epoch:
+            rng = np.random.default_rng([self.seed, self.epoch])
+            if self.quotas:
+                selected = []
+                for domain in np.unique(self.domain_ids):
+                    indices = np.flatnonzero(self.domain_ids == domain)
+                    quota = self.quotas.get(int(domain))
+                    if quota is not None and len(indices) > quota:
+                        indices = rng.choice(indices, size=quota, replace=False)
+                    selected.append(indices)
+                pool = np.concatenate(selected)
+            else:
+                pool = np.arange(len(self.domain_ids))
+            self._order = self.order_pool(pool, rng)
+            self._order_epoch = self.epoch
+        return self._order
+
+    def order_pool(self, pool, rng):
+        """에포크 순서 생성 (기본: 전체 셔플, 가중치가 있으면 가중 복원 추출, 하위 클래스에서 커리큘럼 등으로 교체)"""
+        if self.weights is None:
+            return rng.permutation(pool)
+        probabilities = self.weights[pool] / self.weights[pool].sum()
+        return rng.choice(pool, size=len(pool), replace=True, p=probabilities)
+
+    def set_next_weights(self, indices, weights):
+        """다음 에포크부터 적용할 예제별 샘플링 가중치 갱신 (현재 에포크 순서는 그대로)"""
+        if self.next_weights is None:
+            self.next_weights = np.ones(len(self.domain_ids), dtype=np.float64)
+        self.next_weights[np.asarray(indices, dtype=np.int64)] = weights
+
+    def set_epoch(self, epoch):
+        # 재개한 에포크와 같으면 위치 유지, 새 에포크면 처음부터 (대기 중인 가중치 적용)
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self.position = 0
+            if self.next_weights is not None:
+                self.weights = self.next_weights.copy()
+
+    def advance(self, num_samples):
+        self.position = min(self.position + num_samples, self._length)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        start = self.position
+        if start:
+            logger.info(f"샘플러 재개: 에포크 {self.epoch}, {start}/{self._length}번째 샘플부터")
+        return iter(self.epoch_order()[start:].tolist())
+
+    def domain_counts(self):
+        """현재 에포크에서 도메인별로 소비한 샘플 수"""
+        consumed = self.domain_ids[self.epoch_order()[:self.position]]
+        counts = np.bincount(consumed, minlength=max(len(self.domain_names), 1))
+        names = self.domain_names or [str(i) for i in range(len(counts))]
+        return {names[i]: int(count) for i, count in enumerate(counts) if i < len(names)}
+
+    def state_dict(self):
+        return {
+            "seed": self.seed,
+            "epoch": self.epoch,
+            "position": self.position,
+            "quotas": {self.domain_names[k]: v for k, v in self.quotas.items()},
+            "domain_counts": self.domain_counts(),
+            # 기본값(1)이 아닌 가중치만 {인덱스: 가중치}로 저장
+            "weights": _sparse_weights(self.weights),
+            "next_weights": _sparse_weights(self.next_weights),
+        }
+
+    def load_state_dict(self, state):
+        if state["seed"] != self.seed:
+            logger.warning(f"샘플러 시드가 다릅니다 (저장 {state['seed']}, 현재 {self.seed}). 저장된 시드를 사용합니다.")
+            self.seed = state["seed"]
+            self._order_epoch = None
+        self.epoch = state["epoch"]
+        self.weights = _dense_weights(state.get("weights"), len(self.domain_ids))
+        self.next_weights = _dense_weights(state.get("next_weights"), len(self.domain_ids))
+        if self.weights is not None:
+            self._order_epoch = None
+        self.position = min(state["position"], self._length)
+        if self.domain_names and self.domain_counts() != state["domain_counts"]:
+            logger.warning("도메인별 소비 수가 저장된 상태와 다릅니다 (데이터 또는 쿼터 변경).")
+
+    def resume_from_step(self, global_step, samples_per_step):
+        """샘플러 상태가 없는 체크포인트(이전 형식)는 스텝 수로 에포크/위치를 추정"""
+        steps_per_epoch = math.ceil(self._length / samples_per_step)
+        self.epoch = global_step // steps_per_epoch
+        self.position = min((global_step % steps_per_epoch) * samples_per_step, self._length)
+
+def _sparse_weights(weights):
+    if weights is None:
+        return None
+    indices = np.flatnonzero(weights != 1.0)
+    return {str(i): float(weights[i]) for i in indices}
+
+def _dense_weights(sparse, size):
+    if sparse is None:
+        return None
+    weights = np.ones(size, dtype=np.float64)
+    for index, weight in sparse.items():
+        if int(index) < size:
+            weights[int(index)] = weight
+    return weights
+
+def load_sampler_state(checkpoint_dir):
+    """체크포인트의 샘플러 상태 (없으면 None)"""
+    path = os.path.join(checkpoint_dir, SAMPLER_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+class SamplerStateCallback(TrainerCallback):
+    """스텝마다 소비 위치를 갱신하고, 동기 저장(Trainer save) 체크포인트에 샘플러 상태 기록
+
+    비동기 체크포인트는 AsyncCheckpointCallback이 sampler.state_dict()를 스냅샷에 함께 저장
+    """
+
+    def __init__(self, sampler, samples_per_step, is_main_process=True):
+        self.sampler = sampler
+        self.samples_per_step = samples_per_step
+        self.is_main_process = is_main_process
+
+    def on_step_end(self, args, state, control, **kwargs):
+        self.sampler.advance(self.samples_per_step)
+
+    def on_save(self, args, state, control, **kwargs):
+        if not self.is_main_process:
+            return
+        checkpoint_dir = os.path.join(args.output_dir, f"checkpoint-{state.global_step}")
+        if os.path.isdir(checkpoint_dir):
+            with open(os.path.join(checkpoint_dir, SAMPLER_STATE_FILE), "w", encoding='utf-8') as f:
+                json.dump(self.sampler.state_dict(), f, ensure_ascii=False, indent=2)
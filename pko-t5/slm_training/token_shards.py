@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+토큰화 결과를 연속 int32 배열 + 오프셋 인덱스로 저장한 사전 토큰화 샤드
+- split별 input_ids.npy / labels.npy(이어 붙인 토큰)와 *_offsets.npy(예제 경계)를 mmap으로 열어 사용
+- 배치는 Dataset.__getitems__에서 오프셋 기반 gather로 한 번에 패딩 (파이썬 리스트 패딩 없음)
+  DataLoader 워커 안에서 실행되므로 prefetch_factor만큼 미리 만들어진 배치를 학습 루프가 바로 가져감
+- 예제별 도메인 번호(domains.npy)와 산술 난이도(arith_difficulty.npy)를 함께 저장해 쿼터/커리큘럼 샘플링에 사용
+- CSV 파일(경로/크기/수정 시각)과 데이터 설정이 같으면 CSV 로드/토큰화 없이 기존 샤드 재사용
+"""
+
+import os
+import json
+import shutil
+import logging
+import dataclasses
+from itertools import chain
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from instrumentation import maybe_phase
+from .data import build_datasets, tokenize_datasets
+from .distributed import is_local_main_process, barrier
+from .curriculum import arithmetic_difficulty
+
+logger = logging.getLogger(__name__)
+
+SHARD_DIR = "token_shards"
+META_FILE = "meta.json"
+SPLITS = ("train", "validation")
+LABEL_PAD_ID = -100
+# 샤드 파일 구성이 바뀌면 올려서 기존 샤드를 다시 생성
+SHARD_VERSION = 3
+
+def _shard_key(config, tokenizer, model_name):
+    """샤드 내용을 결정하는 값 (하나라도 바뀌면 다시 생성)"""
+    csv_stats = [
+        [path, os.path.getsize(path), int(os.path.getmtime(path))] if os.path.exists(path) else [path, None, None]
+        for path in config.data.csv_files
+    ]
+    data = dataclasses.asdict(config.data)
+    # 패딩은 배치 생성 시 적용하므로 샤드 내용과 무관
+    data.pop("padding")
+    data.pop("pad_to_multiple_of")
+    return {
+        "version": SHARD_VERSION,
+        "model": model_name,
+        "vocab_size": len(tokenizer),
+        "seed": config.seed,
+        "max_eval_samples": config.eval.max_eval_samples,
+        "data": data,
+        "csv": csv_stats,
+    }
+
+def _flatten(sequences):
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    tokens = np.fromiter(chain.from_iterable(sequences), dtype=np.int32, count=int(offsets[-1]))
+    return tokens, offsets
+
+def write_token_shards(tokenized_dataset, input_texts, shard_dir, key):
+    """split별 토큰 배열/오프셋과 예제별 도메인 번호, 산술 난이도 기록 (임시 디렉토리에 쓴 뒤 원자적 이름 변경)
+
+    input_texts: split -> 예제별 입력 문장("도메인, 입력") 목록
+    """
+    domains = {split: [text.split(", ", 1)[0] for text in texts] for split, texts in input_texts.items()}
+    tmp_dir = shard_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    domain_names = sorted(set(chain.from_iterable(domains.values())))
+    domain_index = {name: i for i, name in enumerate(domain_names)}
+    counts = {}
+    for split in SPLITS:
+        split_dir = os.path.join(tmp_dir, split)
+        os.makedirs(split_dir)
+        for column in ("input_ids", "labels"):
+            tokens, offsets = _flatten(tokenized_dataset[split][column])
+            np.save(os.path.join(split_dir, f"{column}.npy"), tokens)
+            np.save(os.path.join(split_dir, f"{column}_offsets.npy"), offsets)
+        np.save(os.path.join(split_dir, "domains.npy"), np.array([domain_index[d] for d in domains[split]], dtype=np.int16))
+        np.save(
+            os.path.join(split_dir, "arith_difficulty.npy"),
+            np.array([arithmetic_difficulty(text) for text in input_texts[split]], dtype=np.float32)
+        )
+        counts[split] = len(tokenized_dataset[split])
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding='utf-8') as f:
+        json.dump({"key": key, "num_examples": counts, "domains": domain_names}, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.replace(tmp_dir, shard_dir)
+    logger.info(f"토큰 샤드 저장: {shard_dir} ({counts})")
+
+def _pad_gather(tokens, offsets, indices, pad_value, min_width=0, multiple=None):
+    """오프셋 기반 벡터화 패딩 (반환: (배치, 폭) int64 배열, 유효 토큰 마스크)"""
+    starts = offsets[indices]
+    lengths = offsets[indices + 1] - starts
+    width = max(int(lengths.max()), min_width)
+    if multiple:
+        width = -(-width // multiple) * multiple
+    positions = np.arange(width)
+    mask = positions < lengths[:, None]
+    gathered = tokens[np.where(mask, starts[:, None] + positions, 0)]
+    return np.where(mask, gathered, pad_value).astype(np.int64), mask
+
+class TokenShardDataset(Dataset):
+    """토큰 샤드 split 하나를 mmap으로 읽는 데이터셋
+
+    __getitems__(인덱스 목록)이 패딩된 배치 텐서를 바로 반환하므로 콜레이터는 collate_pretokenized 사용
+    """
+
+    def __init__(self, split_dir, pad_token_id, pad_to_multiple_of=None, max_source_length=None, max_target_length=None):
+        self.split_dir = split_dir
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        # padding=max_length 설정이면 고정 폭으로 패딩
+        self.max_source_length = max_source_length or 0
+        self.max_target_length = max_target_length or 0
+        self._arrays = None
+        self._length = len(np.load(os.path.join(split_dir, "input_ids_offsets.npy"), mmap_mode="r")) - 1
+        with open(os.path.join(os.path.dirname(split_dir), META_FILE), encoding='utf-8') as f:
+            self.domain_names = json.load(f)["domains"]
+
+    def domain_ids(self):
+        """예제별 도메인 번호 (domain_names 인덱스)"""
+        return np.load(os.path.join(self.split_dir, "domains.npy"))
+
+    def target_lengths(self):
+        return np.diff(self.arrays["labels_offsets"])
+
+    def arith_difficulty(self):
+        return np.load(os.path.join(self.split_dir, "arith_difficulty.npy"))
+
+    @property
+    def arrays(self):
+        # 워커 프로세스마다 처음 접근할 때 mmap으로 열기 (pickle 시 배열을 복사하지 않음)
+        if self._arrays is None:
+            self._arrays = {
+                name: np.load(os.path.join(self.split_dir, f"{name}.npy"), mmap_mode="r")
+                for name in ("input_ids", "input_ids_offsets", "labels", "labels_offsets")
+            }
+        return self._arrays
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_arrays"] = None
+        return state
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        arrays = self.arrays
+        return {
+            name: arrays[name][arrays[f"{name}_offsets"][index]:arrays[f"{name}_offsets"][index + 1]].tolist()
+            for name in ("input_ids", "labels")
+        }
+
+    def __getitems__(self, indices):
+        arrays = self.arrays
+        indices = np.asarray(indices, dtype=np.int64)
+        input_ids, attention_mask = _pad_gather(
+            arrays["input_ids"], arrays["input_ids_offsets"], indices,
+            self.pad_token_id, self.max_source_length, self.pad_to_multiple_of
+        )
+        labels, _ = _pad_gather(
+            arrays["labels"], arrays["labels_offsets"], indices,
+            LABEL_PAD_ID, self.max_target_length, self.pad_to_multiple_of
+        )
+        return {
+            "input_ids": torch.from_numpy(input_ids),
+            "attention_mask": torch.from_numpy(attention_mask.astype(np.int64)),
+            "labels": torch.from_numpy(labels),
+        }
+
+def collate_pretokenized(batch):
+    """__getitems__가 만든 배치를 그대로 전달 (decoder_input_ids는 모델이 labels로부터 생성)"""
+    if isinstance(batch, dict):
+        return batch
+    raise TypeError("TokenShardDataset 배치는 __getitems__로 생성되어야 합니다 (torch>=2.0 DataLoader).")
+
+def load_token_shards(config, tokenizer, model_name, instrumentation=None):
+    """샤드가 최신이면 그대로 열고, 아니면 CSV 로드/토큰화 후 새로 기록 (반환: train, validation 데이터셋)"""
+    shard_dir = os.path.join(config.output_dir, SHARD_DIR)
+    key = _shard_key(config, tokenizer, model_name)
+    meta_path = os.path.join(shard_dir, META_FILE)
+
+    # 다중 프로세스 학습 시 노드별 로컬 rank 0만 샤드를 만들고 나머지는 완료를 기다림
+    cached = True
+    if is_local_main_process():
+        cached = False
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                cached = json.load(f).get("key") == key
+        if cached:
+            logger.info(f"기존 토큰 샤드 사용: {shard_dir}")
+    if not cached:
+        logger.info("데이터셋 로드 중...")
+        dataset = build_datasets(config, instrumentation)
+        logger.info("데이터 토큰화 중...")
+        # 샤드는 패딩 없이 저장하고 배치 생성 시 패딩
+        tokenized_dataset = tokenize_datasets(dataset, tokenizer, config, model_name, instrumentation, padding=False)
+        input_texts = {split: dataset[split]["input_text"] for split in SPLITS}
+        with maybe_phase(instrumentation, "shard_write"):
+            write_token_shards(tokenized_dataset, input_texts, shard_dir, key)
+    barrier()
+
+    fixed = config.data.padding == "max_length"
+    return tuple(
+        TokenShardDataset(
+            os.path.join(shard_dir, split),
+            tokenizer.pad_token_id,
+            pad_to_multiple_of=config.data.pad_to_multiple_of,
+            max_source_length=config.data.max_source_length if fixed else None,
+            max_target_length=config.data.max_target_length if fixed else None,
+        )
+        for split in SPLITS
+    )
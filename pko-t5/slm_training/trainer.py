@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+설정 기반 학습 실행
+TrainingConfig를 현재 장비에 맞게 확정(장치, 정밀도, 옵티마이저)한 뒤 Seq2SeqTrainer로 학습
+"""
+
+import os
+import json
+import datetime
+import logging
+import importlib.util
+
+import torch
+from transformers import (
+    AutoTokenizer,
+    AutoModelForSeq2SeqLM,
+    Seq2SeqTrainingArguments,
+    Seq2SeqTrainer,
+    DataCollatorForSeq2Seq,
+    set_seed
+)
+
+from instrumentation import (
+    Instrumentation, InstrumentationCallback, InstrumentedCollator, maybe_phase, pop_collate_time, instrument_backward
+)
+from korean_normalizer import NORMALIZATION_CONFIG_KEY
+from .data import build_datasets, tokenize_datasets
+from .presets import cpu_supports_bf16
+from .curriculum import CurriculumSampler, StepsToTargetCallback
+from .hard_examples import HardExampleCallback
+from .sampler import ResumableSampler, SamplerStateCallback, load_sampler_state, SAMPLER_STATE_FILE
+from .token_shards import load_token_shards, collate_pretokenized
+from .checkpointing import AsyncCheckpointCallback, find_latest_checkpoint
+from .incremental import build_data_manifest, write_data_manifest
+from .distributed import world_info, setup_distributed, scale_for_world_size, is_main_process, broadcast_object, cleanup_distributed
+
+logger = logging.getLogger(__name__)
+
+# 8bit 옵티마이저를 쓸 수 없을 때 대체 옵티마이저와 학습률
+FALLBACK_OPTIM = "adafactor"
+FALLBACK_LEARNING_RATE = 5e-4
+
+TEST_INPUTS = [
+    "군중 밀집 및 체류 감지, 13:00 공연장 입구 외곽 감지 인원 55명",
+    "군중 밀집 및 체류 감지, 현재 시각은 08시 15분이며, 도서관 2층 정문 앞에 18명이 있습니다. 기준 인원은 25명입니다.",
+    "군중 밀집 및 체류 감지, 15:30 지하철역 승강장 감지 인원 120명, 기준 인원 100명",
+]
+
+def load_model(candidates):
+    """후보 모델을 순서대로 로드 시도 (반환: tokenizer, model, model_name)"""
+    for model_name in candidates:
+        try:
+            logger.info(f"모델 로드 시도: {model_name}")
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            logger.info(f"✅ 모델 로드 성공: {model_name}")
+            return tokenizer, model, model_name
+        except Exception as e:
+            logger.warning(f"❌ 모델 로드 실패: {model_name} - {e}")
+    return None, None, None
+
+def resolve_runtime(config):
+    """장치/정밀도/옵티마이저를 현재 환경에서 사용 가능한 값으로 확정 (config를 직접 수정)"""
+    if config.device == "auto":
+        config.device = "cuda" if torch.cuda.is_available() else "cpu"
+    elif config.device == "cuda" and not torch.cuda.is_available():
+        logger.warning("CUDA를 사용할 수 없어 CPU로 학습합니다.")
+        config.device = "cpu"
+
+    if config.precision == "fp16" and config.device != "cuda":
+        logger.warning("fp16은 CUDA에서만 사용하므로 fp32로 학습합니다.")
+        config.precision = "fp32"
+    elif config.precision == "bf16":
+        supported = torch.cuda.is_bf16_supported() if config.device == "cuda" else cpu_supports_bf16()
+        if not supported:
+            logger.warning("이 장치는 bf16을 지원하지 않아 fp32로 학습합니다.")
+            config.precision = "fp32"
+
+    if config.optimizer.optim.endswith("_8bit") and importlib.util.find_spec("bitsandbytes") is None:
+        logger.warning(f"bitsandbytes가 설치되지 않아 8bit 옵티마이저 대신 {FALLBACK_OPTIM}를 사용합니다.")
+        config.optimizer.optim = FALLBACK_OPTIM
+        config.optimizer.learning_rate = FALLBACK_LEARNING_RATE
+
+    if config.device != "cuda":
+        config.dataloader_pin_memory = False
+
+    logger.info(
+        f"실행 설정: 프리셋 {config.name}, 장치 {config.device}, 정밀도 {config.precision}, "
+        f"옵티마이저 {config.optimizer.optim} (lr {config.optimizer.learning_rate}), "
+        f"배치 {config.per_device_train_batch_size} x 누적 {config.gradient_accumulation_steps}, "
+        f"패딩 {config.data.padding}"
+    )
+    return config
+
+class ResumableSeq2SeqTrainer(Seq2SeqTrainer):
+    """학습 샘플러를 외부에서 주입할 수 있는 Seq2SeqTrainer (재개 가능 샘플러 사용)
+
+    instrumentation을 주면 backward 시간을 직접 측정하고, 배치에 실려 온 collate 시간을 기록
+    """
+
+    def __init__(self, *args, train_sampler=None, instrumentation=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.train_sampler = train_sampler
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrument_backward(self.accelerator, instrumentation)
+
+    def _prepare_inputs(self, inputs):
+        # 학습/평가/생성 모두 모델 호출 전에 거치는 지점 (collate 시간 키를 모델 입력에서 제거)
+        return super()._prepare_inputs(pop_collate_time(inputs, self.instrumentation))
+
+    def _get_train_sampler(self, *args, **kwargs):
+        if self.train_sampler is not None:
+            return self.train_sampler
+        return super()._get_train_sampler(*args, **kwargs)
+
+def build_training_args(config, ignore_data_skip=False):
+    return Seq2SeqTrainingArguments(
+        output_dir=config.output_dir,
+        learning_rate=config.optimizer.learning_rate,
+        per_device_train_batch_size=config.per_device_train_batch_size,
+        per_device_eval_batch_size=config.per_device_eval_batch_size,
+        gradient_accumulation_steps=config.gradient_accumulation_steps,
+        num_train_epochs=config.num_train_epochs,
+        weight_decay=config.optimizer.weight_decay,
+        warmup_steps=config.optimizer.warmup_steps,
+        max_grad_norm=config.optimizer.max_grad_norm,
+        optim=config.optimizer.optim,
+        logging_steps=config.eval.logging_steps,
+        save_steps=config.eval.save_steps,
+        eval_steps=config.eval.eval_steps,
+        eval_strategy="steps",
+        # 비동기 체크포인트 사용 시 저장은 AsyncCheckpointCallback이 담당
+        save_strategy="no" if config.async_checkpoint else "steps",
+        save_total_limit=config.eval.save_total_limit,
+        predict_with_generate=config.eval.predict_with_generate,
+        generation_max_length=config.eval.generation_max_length,
+        generation_num_beams=config.eval.generation_num_beams,
+        fp16=config.precision == "fp16",
+        bf16=config.precision == "bf16",
+        use_cpu=config.device == "cpu",
+        gradient_checkpointing=config.model.gradient_checkpointing,
+        dataloader_pin_memory=config.dataloader_pin_memory,
+        dataloader_num_workers=config.dataloader_num_workers,
+        # 워커가 배치를 미리 만들어 두고, 에포크마다 워커를 다시 띄우지 않음
+        dataloader_prefetch_factor=config.dataloader_prefetch_factor if config.dataloader_num_workers > 0 else None,
+        dataloader_persistent_workers=config.dataloader_num_workers > 0,
+        remove_unused_columns=False,
+        push_to_hub=False,
+        load_best_model_at_end=not config.async_checkpoint,
+        metric_for_best_model="eval_loss",
+        greater_is_better=False,
+        report_to=config.report_to if is_main_process() else [],
+        ddp_backend=config.ddp_backend,
+        # T5는 모든 파라미터가 손실에 참여하므로 미사용 파라미터 탐색(추가 그래프 순회) 생략
+        ddp_find_unused_parameters=False if config.ddp_backend else None,
+        # 샘플러 상태로 재개하면 이미 본 배치를 다시 읽으며 건너뛰지 않음
+        ignore_data_skip=ignore_data_skip,
+        seed=config.seed
+    )
+
+def test_model(model, tokenizer, config, model_name, instrumentation=None):
+    """학습된 모델로 샘플 입력 생성 (측정값/기준값 차이 계산 결과도 함께 확인)"""
+    from input_parser import parse_input
+
+    logger.info("학습된 모델 테스트...")
+    model.eval()
+    device = next(model.parameters()).device
+    try:
+        for i, input_text in enumerate(TEST_INPUTS, 1):
+            source = config.data.source_prefix + input_text if "t5" in model_name.lower() else input_text
+            inputs = tokenizer(source, return_tensors="pt", max_length=config.data.max_source_length, truncation=True)
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+
+            with torch.no_grad(), maybe_phase(instrumentation, "generate"):
+                outputs = model.generate(
+                    **inputs,
+                    max_length=config.eval.generation_max_length,
+                    num_beams=config.eval.generation_num_beams,
+                    early_stopping=True,
+                    no_repeat_ngram_size=2,
+                    do_sample=False,
+                    pad_token_id=tokenizer.pad_token_id,
+                    eos_token_id=tokenizer.eos_token_id
+                )
+            if instrumentation is not None:
+                instrumentation.add_tokens("generate", outputs.shape[-1] - 1)
+
+            logger.info(f"테스트 {i}:")
+            logger.info(f"입력: {input_text}")
+            logger.info(f"출력: {tokenizer.decode(outputs[0], skip_special_tokens=True)}")
+            parsed = parse_input(input_text)
+            if parsed["difference"] is not None:
+                logger.info(f"기대 차이: {parsed['difference']}{parsed['unit'] or ''}")
+            logger.info("-" * 50)
+    except Exception as e:
+        logger.error(f"테스트 중 오류: {e}")
+
+def train(config):
+    """설정대로 학습 실행 (반환: 성공 여부)"""
+    config.validate()
+    set_seed(config.seed)
+    resolve_runtime(config)
+    setup_distributed(config)
+    scale_for_world_size(config)
+    try:
+        return _train(config)
+    finally:
+        cleanup_distributed()
+
+def _train(config):
+    tokenizer, model, model_name = load_model(config.model.candidates)
+    if model is None:
+        logger.error("사용 가능한 모델이 없습니다!")
+        return False
+    model = model.to(config.device)
+    # 추론 스크립트가 같은 입력 정규화를 적용하도록 모델 config.json(체크포인트 포함)에 기록
+    setattr(model.config, NORMALIZATION_CONFIG_KEY, {
+        "normalize_text": config.data.normalize_text,
+        "annotate_difference": config.data.annotate_difference,
+    })
+    logger.info(f"선택된 모델: {model_name}")
+    logger.info(f"토크나이저 vocab 크기: {len(tokenizer)}")
+
+    instrumentation = Instrumentation(config.name) if config.instrumentation else None
+    instrumentation_dir = os.path.join(config.output_dir, "instrumentation")
+
+    # 학습에 사용한 CSV 상태 (로드 전에 기록해 학습 중 추가된 행은 다음 증분 학습 대상)
+    data_manifest = build_data_manifest(config.data.csv_files) if is_main_process() else None
+
+    if config.data.token_shards:
+        # 사전 토큰화 샤드: 배치 패딩은 데이터로더 워커에서 벡터화 처리
+        train_dataset, eval_dataset = load_token_shards(config, tokenizer, model_name, instrumentation)
+        data_collator = collate_pretokenized
+    else:
+        logger.info("데이터셋 로드 중...")
+        dataset = build_datasets(config, instrumentation)
+        logger.info("데이터 토큰화 중...")
+        tokenized_dataset = tokenize_datasets(dataset, tokenizer, config, model_name, instrumentation)
+        train_dataset, eval_dataset = tokenized_dataset["train"], tokenized_dataset["validation"]
+        data_collator = DataCollatorForSeq2Seq(
+            tokenizer=tokenizer,
+            model=model,
+            padding=True,
+            pad_to_multiple_of=config.data.pad_to_multiple_of
+        )
+    if config.auto_tune:
+        from .autotune import autotune, TUNED_FIELDS
+        # rank 0만 측정하고 결과를 나머지 rank에 전달
+        tuned = None
+        if is_main_process():
+            autotune(config, model, tokenizer, model_name, train_dataset, data_collator)
+            tuned = {name: getattr(config, name) for name in TUNED_FIELDS}
+        for name, value in broadcast_object(tuned).items():
+            setattr(config, name, value)
+
+    callbacks = []
+    if instrumentation is not None:
+        data_collator = InstrumentedCollator(data_collator, instrumentation)
+        callbacks.append(InstrumentationCallback(
+            instrumentation, model,
+            profile_dir=os.path.join(instrumentation_dir, "profiler") if config.torch_profiler and is_main_process() else None
+        ))
+
+    resume_from_checkpoint = find_latest_checkpoint(config.output_dir)
+    if resume_from_checkpoint:
+        logger.info(f"🔄 기존 체크포인트에서 재개: {resume_from_checkpoint}")
+    else:
+        logger.info("🆕 새로운 학습 시작 (체크포인트 없음)")
+
+    # 재개 가능 샘플러 (도메인 정보가 있는 토큰 샤드에서만 사용)
+    train_sampler = None
+    if config.data.token_shards:
+        samples_per_step = config.per_device_train_batch_size * config.gradient_accumulation_steps * world_info()[2]
+        if config.curriculum.enabled:
+            train_sampler = CurriculumSampler(
+                train_dataset.domain_ids(), train_dataset.target_lengths(), train_dataset.arith_difficulty(),
+                train_dataset.domain_names, seed=config.seed, domain_quotas=config.data.domain_quotas,
+                curriculum_samples=int(len(train_dataset) * config.num_train_epochs * config.curriculum.warmup_ratio),
+                initial_competence=config.curriculum.initial_competence,
+                length_weight=config.curriculum.length_weight
+            )
+        else:
+            train_sampler = ResumableSampler(
+                train_dataset.domain_ids(), train_dataset.domain_names,
+                seed=config.seed, domain_quotas=config.data.domain_quotas
+            )
+        if resume_from_checkpoint:
+            sampler_state = load_sampler_state(resume_from_checkpoint)
+            if sampler_state is not None:
+                train_sampler.load_state_dict(sampler_state)
+            else:
+                with open(os.path.join(resume_from_checkpoint, "trainer_state.json"), encoding='utf-8') as f:
+                    train_sampler.resume_from_step(json.load(f)["global_step"], samples_per_step)
+        callbacks.append(SamplerStateCallback(train_sampler, samples_per_step, is_main_process=is_main_process()))
+
+        if config.hard_examples.enabled:
+            callbacks.append(HardExampleCallback(
+                train_sampler, train_dataset, tokenizer,
+                source_prefix=config.data.source_prefix if "t5" in model_name.lower() else "",
+                slice_size=config.hard_examples.slice_size,
+                batch_size=config.hard_examples.batch_size,
+                max_length=config.eval.generation_max_length,
+                boost=config.hard_examples.boost,
+                max_weight=config.hard_examples.max_weight,
+                is_main_process=is_main_process()
+            ))
+
+    elif config.curriculum.enabled or config.hard_examples.enabled:
+        logger.warning("커리큘럼/오답 예제 재가중은 토큰 샤드(data.token_shards=true)가 필요해 균등 샘플링으로 학습합니다.")
+
+    if config.curriculum.target_eval_loss is not None:
+        callbacks.append(StepsToTargetCallback(
+            config.curriculum.target_eval_loss,
+            output_dir=config.output_dir if is_main_process() else None,
+            label="curriculum" if train_sampler is not None and config.curriculum.enabled else "uniform"
+        ))
+
+    if config.async_checkpoint:
+        callbacks.append(AsyncCheckpointCallback(
+            config.output_dir,
+            save_steps=config.eval.save_steps,
+            save_total_limit=config.eval.save_total_limit,
+            tokenizer=tokenizer,
+            is_main_process=is_main_process(),
+            state_providers={SAMPLER_STATE_FILE: train_sampler.state_dict} if train_sampler is not None else None
+        ))
+
+    trainer = ResumableSeq2SeqTrainer(
+        model=model,
+        args=build_training_args(config, ignore_data_skip=train_sampler is not None),
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset,
+        tokenizer=tokenizer,
+        data_collator=data_collator,
+        callbacks=callbacks,
+        train_sampler=train_sampler,
+        instrumentation=instrumentation
+    )
+
+    logger.info(f"모델 학습 시작: {model_name} (프리셋 {config.name})")
+    start_time = datetime.datetime.now()
+    try:
+        trainer.train(resume_from_checkpoint=resume_from_checkpoint)
+        logger.info("학습 완료!")
+
+        # save_model은 내부에서 rank 0만 기록 (모든 rank가 호출해야 함)
+        trainer.save_model()
+        if is_main_process():
+            tokenizer.save_pretrained(config.output_dir)
+            # 어떤 설정으로 학습했는지 모델과 함께 보관
+            config.save(os.path.join(config.output_dir, "training_config.json"))
+            write_data_manifest(config.output_dir, data_manifest)
+            logger.info(f"모델이 {config.output_dir}에 저장되었습니다.")
+
+            test_model(model, tokenizer, config, model_name, instrumentation)
+            if instrumentation is not None:
+                instrumentation.log_summary()
+                instrumentation.export(instrumentation_dir, step=trainer.state.global_step)
+
+        logger.info(f"총 학습 시간: {datetime.datetime.now() - start_time}")
+        return True
+    except Exception as e:
+        logger.error(f"학습 중 오류 발생: {e}")
+        return False
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+템플릿 초안 기반 추측 디코딩 (speculative decoding)
+도메인 CSV 출력 문장으로 만든 n-gram 초안 모델(또는 경량 학생 T5)이 다음 토큰 여러 개를 제안하고,
+PKO-T5 모델은 한 번의 디코더 forward로 제안 토큰을 검증
+검증은 탐욕적(argmax) 기준이므로 결과는 일반 탐욕적 디코딩과 동일
+"""
+
+import os
+import time
+import logging
+import datetime
+from collections import defaultdict
+import pandas as pd
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from slm_training.config import default_csv_files
+
+MODEL_PATH = "BBoDDoGood/SLM_pko-t5"
+STUDENT_PATH = "/Volumes/Data/slm_model_student"  # distill_pko_t5.py 결과물 (선택)
+
+# 초안 설정
+NGRAM_ORDER = 4              # 최대 문맥 길이 (토큰)
+NGRAM_SAMPLES_PER_DOMAIN = 5000
+DRAFT_LENGTH = 6             # 한 번에 제안하는 토큰 수
+MAX_NEW_TOKENS = 256
+
+BENCHMARK_SAMPLES_PER_DOMAIN = 20
+
+logger = logging.getLogger(__name__)
+
+class NgramDrafter:
+    """도메인별 출력 문장 n-gram + 입력 복사(prompt lookup) 기반 초안 생성기"""
+
+    def __init__(self, tables, max_n=NGRAM_ORDER):
+        # tables[domain][n][문맥 튜플] = 가장 빈번한 다음 토큰
+        self.tables = tables
+        self.max_n = max_n
+
+    @classmethod
+    def from_dataframe(cls, df, tokenizer, max_n=NGRAM_ORDER, samples_per_domain=NGRAM_SAMPLES_PER_DOMAIN):
+        """도메인 CSV의 Output 컬럼으로 n-gram 표 생성"""
+        tables = {}
+        for domain, domain_df in df.groupby('Domain'):
+            outputs = domain_df['Output'].sample(
+                n=min(samples_per_domain, len(domain_df)), random_state=42
+            ).tolist()
+            counts = [defaultdict(lambda: defaultdict(int)) for _ in range(max_n + 1)]
+            for ids in tokenizer(outputs)["input_ids"]:  # EOS 포함
+                for i in range(1, len(ids)):
+                    for n in range(1, max_n + 1):
+                        if i - n < 0:
+                            break
+                        counts[n][tuple(ids[i - n:i])][ids[i]] += 1
+            tables[domain] = [
+                {ctx: max(nexts, key=nexts.get) for ctx, nexts in counts[n].items()}
+                for n in range(max_n + 1)
+            ]
+            logger.info(f"n-gram 초안 표 생성: {domain} ({sum(len(t) for t in tables[domain])}개 문맥)")
+        return cls(tables, max_n)
+
+    def _next_token(self, table, context, source_ids):
+        # 1) 긴 문맥 n-gram 일치 (템플릿 문구)
+        for n in range(min(self.max_n, len(context)), 1, -1):
+            token = table[n].get(tuple(context[-n:]))
+            if token is not None:
+                return token
+        # 2) 입력 문장에서 마지막 2토큰과 같은 위치를 찾아 다음 토큰 복사 (장소/시각 등)
+        if len(context) >= 2:
+            key = context[-2:]
+            for i in range(len(source_ids) - 2, -1, -1):
+                if source_ids[i:i + 2] == key and i + 2 < len(source_ids):
+                    return source_ids[i + 2]
+        # 3) 단일 토큰 문맥
+        if context:
+            return table[1].get((context[-1],))
+        return None
+
+    def propose(self, generated, source_ids, k, domain=None):
+        """생성된 토큰(generated) 뒤에 이어질 토큰을 최대 k개 제안"""
+        table = self.tables.get(domain) or next(iter(self.tables.values()))
+        context = list(generated)
+        draft = []
+        for _ in range(k):
+            token = self._next_token(table, context, source_ids)
+            if token is None:
+                break
+            draft.append(token)
+            context.append(token)
+        return draft
+
+class StudentDrafter:
+    """경량 학생 T5 모델의 탐욕적 생성 결과를 초안으로 사용 (같은 토크나이저 필요)"""
+
+    def __init__(self, student):
+        self.student = student.eval()
+        self._encoder_key = None
+        self._encoder_outputs = None
+
+    def propose(self, generated, source_ids, k, domain=None):
+        if k < 1:
+            return []
+        key = tuple(source_ids)
+        input_ids = torch.tensor([source_ids])
+        if key != self._encoder_key:
+            # 요청 단위로 학생 인코더 출력 재사용
+            self._encoder_outputs = self.student.get_encoder()(input_ids=input_ids)
+            self._encoder_key = key
+        start = self.student.config.decoder_start_token_id
+        decoder_input_ids = torch.tensor([[start] + list(generated)])
+        with torch.no_grad():
+            output = self.student.generate(
+                encoder_outputs=self._encoder_outputs,
+                decoder_input_ids=decoder_input_ids,
+                max_new_tokens=k,
+                num_beams=1,
+                do_sample=False
+            )
+        return output[0, decoder_input_ids.shape[1]:].tolist()
+
+def _crop_cache(past_key_values, length):
+    """디코더 self-attention 캐시를 length 토큰까지 잘라냄 (거부된 초안 토큰 제거)"""
+    if hasattr(past_key_values, "crop"):
+        past_key_values.crop(length)
+        return past_key_values
+    # 레거시 튜플 캐시: (self_k, self_v, cross_k, cross_v) per layer
+    return tuple(
+        (layer[0][:, :, :length], layer[1][:, :, :length]) + tuple(layer[2:])
+        for layer in past_key_values
+    )
+
+def speculative_generate(model, tokenizer, input_ids, attention_mask, drafter, domain=None,
+                         max_new_tokens=MAX_NEW_TOKENS, draft_length=DRAFT_LENGTH):
+    """초안 제안 -> 단일 forward 검증을 반복하는 탐욕적 생성 (배치 크기 1)
+
+    반환: (생성 토큰 id 리스트(decoder start 포함), 통계 딕셔너리)
+    """
+    eos_token_id = tokenizer.eos_token_id
+    source_ids = input_ids[0].tolist()
+    stats = {"forward_passes": 0, "proposed": 0, "accepted": 0}
+
+    with torch.no_grad():
+        encoder_outputs = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask)
+        sequence = [model.config.decoder_start_token_id]
+        past_key_values = None
+        cached = 0  # 캐시에 들어 있는 디코더 토큰 수
+
+        while len(sequence) - 1 < max_new_tokens:
+            remaining = max_new_tokens - (len(sequence) - 1)
+            # 남은 토큰이 1개면 검증 forward가 직접 마지막 토큰을 내므로 초안 생략
+            k = min(draft_length, remaining - 1)
+            draft = drafter.propose(sequence[1:], source_ids, k, domain) if k >= 1 else []
+            feed = sequence[cached:] + draft
+
+            outputs = model(
+                encoder_outputs=encoder_outputs,
+                attention_mask=attention_mask,
+                decoder_input_ids=torch.tensor([feed], device=input_ids.device),
+                past_key_values=past_key_values,
+                use_cache=True
+            )
+            stats["forward_passes"] += 1
+
+            # 마지막 확정 토큰 이후 위치부터의 argmax 예측
+            predictions = outputs.logits[0, -(len(draft) + 1):].argmax(-1).tolist()
+            accepted = 0
+            while accepted < len(draft) and draft[accepted] == predictions[accepted]:
+                accepted += 1
+            stats["proposed"] += len(draft)
+            stats["accepted"] += accepted
+
+            new_tokens = draft[:accepted] + [predictions[accepted]]
+            cached = len(sequence) + accepted
+            past_key_values = _crop_cache(outputs.past_key_values, cached)
+
+            for token in new_tokens:
+                sequence.append(token)
+                if token == eos_token_id or len(sequence) - 1 >= max_new_tokens:
+                    return sequence, stats
+
+    return sequence, stats
+
+def greedy_generate(model, tokenizer, input_ids, attention_mask, max_new_tokens=MAX_NEW_TOKENS):
+    """비교 기준이 되는 일반 탐욕적 디코딩 (generation_config의 반복 억제 옵션은 끔)"""
+    with torch.no_grad():
+        output = model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            max_new_tokens=max_new_tokens,
+            num_beams=1,
+            do_sample=False,
+            no_repeat_ngram_size=0,
+            repetition_penalty=1.0,
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+    return output[0].tolist()
+
+def load_corpus(csv_files):
+    """도메인 CSV 로드"""
+    all_data = []
+    for csv_file in csv_files:
+        if os.path.exists(csv_file):
+            all_data.append(pd.read_csv(csv_file, encoding='utf-8'))
+        else:
+            logger.warning(f"파일을 찾을 수 없음: {csv_file}")
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+    return pd.concat(all_data, ignore_index=True).dropna(subset=['Domain', 'Input', 'Output'])
+
+def benchmark(model, tokenizer, drafter, df):
+    """도메인별 탐욕적 디코딩 대비 추측 디코딩 속도와 출력 동일성 측정 (CPU)"""
+    model.eval()
+    results = {}
+
+    for domain, domain_df in df.groupby('Domain'):
+        samples = domain_df.sample(n=min(BENCHMARK_SAMPLES_PER_DOMAIN, len(domain_df)), random_state=0)
+        greedy_time = speculative_time = 0.0
+        identical = proposed = accepted = passes = tokens = 0
+
+        for _, row in samples.iterrows():
+            inputs = tokenizer(
+                "분석: " + row['Domain'] + ", " + row['Input'],
+                return_tensors="pt", max_length=256, truncation=True
+            )
+
+            start = time.perf_counter()
+            reference = greedy_generate(model, tokenizer, inputs["input_ids"], inputs["attention_mask"])
+            greedy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            sequence, stats = speculative_generate(
+                model, tokenizer, inputs["input_ids"], inputs["attention_mask"], drafter, domain=domain
+            )
+            speculative_time += time.perf_counter() - start
+
+            # generate는 배치 패딩이 없으므로 토큰 단위로 그대로 비교
+            identical += int(sequence == reference)
+            proposed += stats["proposed"]
+            accepted += stats["accepted"]
+            passes += stats["forward_passes"]
+            tokens += len(sequence) - 1
+
+        results[domain] = {
+            "speedup": greedy_time / max(speculative_time, 1e-9),
+            "identical_rate": identical / len(samples),
+            "acceptance_rate": accepted / max(proposed, 1),
+            "tokens_per_forward": tokens / max(passes, 1),
+        }
+        logger.info(
+            f"{domain}: 속도 향상 {results[domain]['speedup']:.2f}x, "
+            f"동일 출력 {results[domain]['identical_rate']:.0%}, "
+            f"초안 수락률 {results[domain]['acceptance_rate']:.1%}, "
+            f"forward당 토큰 {results[domain]['tokens_per_forward']:.2f}"
+        )
+    return results
+
+def main():
+    """메인 실행 함수 (n-gram 초안 생성 -> 도메인별 CPU 벤치마크)"""
+    torch.set_grad_enabled(False)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH).to("cpu")
+
+    df = load_corpus(default_csv_files())
+    drafter = NgramDrafter.from_dataframe(df, tokenizer)
+    logger.info("📐 n-gram 초안 기반 추측 디코딩 벤치마크")
+    benchmark(model, tokenizer, drafter, df)
+
+    if os.path.exists(STUDENT_PATH):
+        student = AutoModelForSeq2SeqLM.from_pretrained(STUDENT_PATH).to("cpu")
+        logger.info("🎓 학생 모델 초안 기반 추측 디코딩 벤치마크")
+        benchmark(model, tokenizer, StudentDrafter(student), df)
+    return True
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(f'pko_t5_speculative_log_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+            logging.StreamHandler()
+        ]
+    )
+    main()
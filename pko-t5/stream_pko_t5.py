@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PKO-T5 스트리밍 생성
+탐욕적 디코딩 결과를 토큰 단위로 디코딩하여 Python 제너레이터로 순차 반환
+첫 토큰까지의 시간(TTFT)과 전체 지연 시간을 분리해서 측정
+소비자가 제너레이터를 닫으면(클라이언트 연결 끊김 등) 생성 스레드를 멈추고 끝날 때까지 기다린 뒤 반환
+"""
+
+import time
+import logging
+import threading
+import torch
+from transformers import TextIteratorStreamer, StoppingCriteria, StoppingCriteriaList
+
+from encoder_cache import generate_with_encoder_cache
+from length_budget import apply_length_budget
+
+logger = logging.getLogger(__name__)
+
+STREAM_TIMEOUT = 120  # 토큰 사이 최대 대기 시간 (초)
+
+class TimedTextStreamer(TextIteratorStreamer):
+    """첫 생성 토큰이 도착한 시각과 생성 토큰 수를 기록하는 스트리머"""
+
+    def __init__(self, tokenizer, **kwargs):
+        super().__init__(tokenizer, **kwargs)
+        self.first_token_time = None
+        self.num_tokens = 0
+
+    def put(self, value):
+        # 인코더-디코더는 첫 put이 decoder start 토큰(프롬프트)이므로 제외
+        if not (self.skip_prompt and self.next_tokens_are_prompt):
+            if self.first_token_time is None:
+                self.first_token_time = time.perf_counter()
+            self.num_tokens += value.numel()
+        super().put(value)
+
+class CancelCriteria(StoppingCriteria):
+    """외부에서 event를 set 하면 다음 토큰에서 생성 중단"""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+def stream_generate(model, tokenizer, device, input_text, max_length=512, encoder_cache=None, timings=None,
+                    length_budgets=None, generation_kwargs=None):
+    """탐욕적 디코딩 결과를 텍스트 조각 단위로 yield (input_text는 "도메인, 입력" 형식)
+
+    generation_kwargs는 기본 생성 설정을 덮어씀 (검사/범위 제한은 호출자 책임, 빔 서치는 스트리밍 불가)
+
+    timings 딕셔너리를 넘기면 생성 종료 후 다음 값이 채워짐:
+        ttft_s: 첫 토큰 생성까지의 시간, first_text_s: 첫 텍스트 조각 반환까지의 시간,
+        total_s: 전체 생성 시간, new_tokens: 생성 토큰 수
+    """
+    timings = {} if timings is None else timings
+
+    inputs = tokenizer(
+        "분석: " + input_text,
+        return_tensors="pt",
+        max_length=256,
+        truncation=True,
+        padding=True
+    )
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+
+    streamer = TimedTextStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_TIMEOUT)
+    gen_kwargs = dict(
+        max_length=max_length,
+        num_beams=1,  # 스트리밍은 탐욕적 디코딩만 지원
+        no_repeat_ngram_size=2,
+        do_sample=False,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        streamer=streamer
+    )
+    apply_length_budget(gen_kwargs, tokenizer, length_budgets, input_text)
+    gen_kwargs.update(generation_kwargs or {})
+    cancelled = threading.Event()
+    gen_kwargs["stopping_criteria"] = StoppingCriteriaList(
+        list(gen_kwargs.get("stopping_criteria") or []) + [CancelCriteria(cancelled)]
+    )
+    errors = []
+
+    def run_generation():
+        try:
+            if encoder_cache is not None:
+                generate_with_encoder_cache(model, inputs, encoder_cache, **gen_kwargs)
+            else:
+                with torch.no_grad():
+                    model.generate(**inputs, **gen_kwargs)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    model.eval()
+    start_time = time.perf_counter()
+    thread = threading.Thread(target=run_generation, daemon=True)
+    thread.start()
+
+    try:
+        for text in streamer:
+            if not text:
+                continue
+            if "first_text_s" not in timings:
+                timings["first_text_s"] = time.perf_counter() - start_time
+            yield text
+    finally:
+        # 중간에 닫혀도 생성 스레드가 끝난 뒤에 반환 (호출자의 생성 잠금이 실제 생성 종료 후 풀리도록)
+        cancelled.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+    timings["total_s"] = time.perf_counter() - start_time
+    timings["ttft_s"] = (
+        streamer.first_token_time - start_time if streamer.first_token_time else timings["total_s"]
+    )
+    timings["new_tokens"] = streamer.num_tokens
+
+def run_interactive():
+    """대화형 스트리밍 CLI"""
+    from test_pko_t5 import load_model_safe, format_input, DEFAULT_DOMAIN, USE_DOMAIN_CLASSIFIER
+    from length_budget import load_length_budgets
+    from domain_classifier import load_domain_classifier, resolve_domain
+
+    model, tokenizer, device = load_model_safe()
+    if model is None:
+        logger.error("모델 로드 실패!")
+        return
+    length_budgets = load_length_budgets()
+    domain_classifier = load_domain_classifier() if USE_DOMAIN_CLASSIFIER else None
+
+    print("[STREAM] 스트리밍 생성 (종료하려면 'quit' 입력)")
+    print("-" * 70)
+    while True:
+        try:
+            user_input = input("\n입력 텍스트: ").strip()
+            if user_input.lower() in ['quit', 'exit', '종료']:
+                break
+            if not user_input:
+                continue
+
+            timings = {}
+            print("생성된 분석: ", end="", flush=True)
+            domain = resolve_domain(domain_classifier, user_input, default=DEFAULT_DOMAIN)["domain"]
+            full_input = format_input(domain, user_input, model)
+            for chunk in stream_generate(model, tokenizer, device, full_input,
+                                         timings=timings, length_budgets=length_budgets):
+                print(chunk, end="", flush=True)
+            print()
+            print(
+                f"[TIMING] 첫 토큰 {timings['ttft_s'] * 1000:.0f}ms, "
+                f"첫 텍스트 {timings.get('first_text_s', timings['total_s']) * 1000:.0f}ms, "
+                f"전체 {timings['total_s'] * 1000:.0f}ms ({timings['new_tokens']} 토큰)"
+            )
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            print(f"오류: {e}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_interactive()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+구조화 출력
+입력 파싱 결과로부터 대시보드용 레코드(도메인, 장소, 시각, 측정값, 기준값, 차이,
+심각도, 권장 조치)를 규칙 기반으로 결정적으로 생성
+생성 모델을 거치지 않으므로 자연어 문장이 필요 없는 경우 생성을 건너뛸 수 있음
+심각도 규칙은 학습 타겟(Output) 문장의 판단 표현으로 매긴 라벨에 맞춰 산출
+  python structured_output.py --fit     # CSV 타겟 라벨로 도메인별 규칙 산출 (SEVERITY_RULES 갱신용)
+  python structured_output.py --check   # 현재 규칙과 타겟 라벨의 도메인별 일치율 (산출 규칙보다 낮으면 종료 코드 1)
+"""
+
+import os
+import re
+import sys
+import json
+from collections import Counter
+
+from input_parser import parse_input, to_number
+
+SEVERITY_LEVELS = ("양호", "주의", "위험")
+
+# 도메인별 심각도 규칙 (측정값 / 기준값 배율 기준, python structured_output.py --fit 결과)
+#   측정값이 기준 미만 -> 양호, 기준과 같으면 at_baseline, danger_ratio 미만 초과 -> 주의, 이상 -> 위험
+#   emergency_ratio 이상 -> 위험 중에서도 긴급 대응
+#   기준이 없는 입력은 no_baseline 심각도
+SEVERITY_RULES = {
+    "군중 밀집 및 체류 감지": {"danger_ratio": 1.0, "emergency_ratio": 1.5, "no_baseline": "양호", "at_baseline": "주의"},
+    "쓰러짐 및 장기 정지 감지": {"danger_ratio": 1.5, "emergency_ratio": 2.0, "no_baseline": "주의", "at_baseline": "위험"},
+    "연기 및 화염 감지": {"danger_ratio": 1.0, "emergency_ratio": 2.0, "no_baseline": "위험", "at_baseline": "양호"},
+    "폐쇄시간 무단 출입 감지": {"danger_ratio": 1.2, "emergency_ratio": 2.0, "no_baseline": "주의", "at_baseline": "양호"},
+    # 기준이 수치가 아닌 보호구 목록이므로 미착용 감지 자체를 위험으로 분류
+    "작업자 안전장비 미착용 감지": {"danger_ratio": 1.0, "emergency_ratio": None, "no_baseline": "위험", "at_baseline": "양호"},
+    "이상 이동 패턴 감지": {"danger_ratio": 1.0, "emergency_ratio": 2.0, "no_baseline": "양호", "at_baseline": "양호"},
+    "줄 서기 및 대기열 정렬 상태 감지": {"danger_ratio": 1.0, "emergency_ratio": 2.0, "no_baseline": "양호", "at_baseline": "양호"},
+}
+DEFAULT_SEVERITY_RULE = {"danger_ratio": 1.5, "emergency_ratio": 2.0, "no_baseline": "주의", "at_baseline": "양호"}
+
+# 규칙 산출 시 탐색하는 danger_ratio 후보
+DANGER_RATIO_CANDIDATES = (1.0, 1.1, 1.2, 1.3, 1.5, 2.0, 2.5, 3.0)
+# --check 통과 기준: 현재 규칙 일치율이 CSV로 다시 산출한 규칙의 일치율보다 이 값 이상 낮으면 실패
+# (폐쇄시간처럼 같은 배율에 주의/위험 라벨이 섞인 도메인은 최선의 규칙도 일치율이 낮으므로 절대 기준 대신 사용)
+AGREEMENT_TOLERANCE = 0.01
+
+# 타겟 문장 심각도 라벨 (지침서 분류: 위험/이상, 주의/예보, 정상/관찰)
+#   명시적 판단 표현(위급/주의 상황/정상 범위 등) -> 초과/조치 표현 -> 예보/점검 표현 순으로 판정, 관찰만 안내하면 양호
+#   "정상 기준 6분", "허용 범위" 같은 기준 이름은 판단 표현이 아니므로 먼저 제거
+BASELINE_NAME = re.compile(r'(?:정상|안전|일반|운영|허용)\s*(?:기준|범위)\S*')
+LABEL_PATTERNS = (
+    (re.compile(r'위급|중대|긴급|위험 (?:상황|상태)|위험한 (?:상황|상태)|위험이 감지|위험 요소|위험합니다|비정상|이상 행동|정렬 (?:문제|이상)'), "위험"),
+    (re.compile(r'(?:주의|점검|확인|관찰)\s*필요\s*상황|주의 상황|경고 (?:상황|상태)|주의가 (?:요구|필요)|경계가 필요'), "주의"),
+    (re.compile(r'양호|(?<!비)정상|적정|범위 내|내에서|부합|기준 충족|안전한 (?:수준|상황)|특별한 (?:위험|조치)|(?<!더 )적(?:어|은|게)|미달|짧'), "양호"),
+    (re.compile(r'초과|넘어|넘겨|웃돌|상회|많은|길게|즉시|즉각|119|대피|출동|응급|필수'), "위험"),
+    (re.compile(r'주의|경계|우려|예상|가능성|재발|점검|확인|강화|통제'), "주의"),
+)
+
+# 심각도별 권장 조치 분류
+ACTION_CLASSES = {
+    "양호": "관찰 유지",
+    "주의": "모니터링 강화",
+    "위험": "현장 확인",
+}
+EMERGENCY_ACTION = "긴급 대응"
+
+def classify_severity(domain, parsed):
+    """파싱 결과와 도메인 규칙으로 (심각도, 권장 조치) 결정"""
+    rule = SEVERITY_RULES.get(domain, DEFAULT_SEVERITY_RULE)
+    if not parsed["has_baseline"] or parsed["measured"] is None:
+        severity = rule["no_baseline"]
+        return severity, ACTION_CLASSES[severity]
+
+    measured, baseline = to_number(parsed["measured"]), to_number(parsed["baseline"])
+    if measured < baseline:
+        return "양호", ACTION_CLASSES["양호"]
+    if measured == baseline:
+        severity = rule.get("at_baseline", "양호")
+        return severity, ACTION_CLASSES[severity]
+
+    ratio = measured / baseline if baseline else float("inf")
+    if ratio < rule["danger_ratio"]:
+        return "주의", ACTION_CLASSES["주의"]
+    if rule["emergency_ratio"] is not None and ratio >= rule["emergency_ratio"]:
+        return "위험", EMERGENCY_ACTION
+    return "위험", ACTION_CLASSES["위험"]
+
+def build_record(domain, input_text):
+    """입력 문장의 구조화 레코드 생성 (JSON 직렬화 가능)"""
+    parsed = parse_input(input_text)
+    severity, action = classify_severity(domain, parsed)
+    has_baseline = parsed["has_baseline"]
+
+    return {
+        "domain": domain,
+        "location": parsed["location"],
+        "time": parsed["times"][0] if parsed["times"] else None,
+        "measured": to_number(parsed["measured"]) if parsed["measured"] is not None else None,
+        "baseline": to_number(parsed["baseline"]) if has_baseline else None,
+        "unit": parsed["unit"],
+        "difference": parsed["difference"] if has_baseline else None,
+        "count": parsed["count"],
+        "severity": severity,
+        "action": action,
+    }
+
+def label_output(output_text):
+    """학습 타겟 문장의 심각도 라벨 (양호/주의/위험)"""
+    text = BASELINE_NAME.sub('', output_text)
+    for pattern, severity in LABEL_PATTERNS:
+        if pattern.search(text):
+            return severity
+    return "양호"  # 관찰/모니터링만 안내
+
+def _labelled_cases(domain_df):
+    """(경우, 배율, 타겟 라벨) 목록 (경우: no_baseline / under / at_baseline / over)"""
+    cases = []
+    for input_text, output_text in zip(domain_df['Input'], domain_df['Output']):
+        parsed = parse_input(input_text)
+        label = label_output(output_text)
+        if not parsed["has_baseline"] or parsed["measured"] is None:
+            cases.append(("no_baseline", None, label))
+            continue
+        measured, baseline = to_number(parsed["measured"]), to_number(parsed["baseline"])
+        if measured < baseline:
+            cases.append(("under", None, label))
+        elif measured == baseline:
+            cases.append(("at_baseline", None, label))
+        else:
+            cases.append(("over", measured / baseline if baseline else float("inf"), label))
+    return cases
+
+def _majority(labels, default):
+    return Counter(labels).most_common(1)[0][0] if labels else default
+
+def fit_severity_rules(df):
+    """도메인별 no_baseline/at_baseline(다수 라벨)과 danger_ratio(초과 구간 일치율 최대) 산출"""
+    rules = {}
+    for domain, domain_df in df.groupby('Domain'):
+        cases = _labelled_cases(domain_df)
+        over = [(ratio, label) for case, ratio, label in cases if case == "over"]
+        rule = dict(SEVERITY_RULES.get(domain, DEFAULT_SEVERITY_RULE))
+        rule["no_baseline"] = _majority([label for case, _, label in cases if case == "no_baseline"], rule["no_baseline"])
+        rule["at_baseline"] = _majority([label for case, _, label in cases if case == "at_baseline"], "양호")
+        if over:
+            rule["danger_ratio"] = max(
+                DANGER_RATIO_CANDIDATES,
+                key=lambda t: sum(label == ("주의" if ratio < t else "위험") for ratio, label in over)
+            )
+        rules[domain] = rule
+    return rules
+
+def severity_agreement(df, rules=None):
+    """도메인별 규칙 심각도와 타겟 라벨 일치율"""
+    rules = SEVERITY_RULES if rules is None else rules
+    result = {}
+    for domain, domain_df in df.groupby('Domain'):
+        rule = rules.get(domain, DEFAULT_SEVERITY_RULE)
+        agree = 0
+        for case, ratio, label in _labelled_cases(domain_df):
+            if case == "over":
+                predicted = "주의" if ratio < rule["danger_ratio"] else "위험"
+            else:
+                predicted = {"no_baseline": rule["no_baseline"], "under": "양호"}.get(case, rule.get("at_baseline", "양호"))
+            agree += predicted == label
+        result[domain] = agree / len(domain_df)
+    return result
+
+def _load_domain_csvs():
+    import pandas as pd
+    from slm_training.config import default_csv_files
+
+    all_data = [pd.read_csv(f, encoding='utf-8') for f in default_csv_files() if os.path.exists(f)]
+    if len(all_data) == 0:
+        raise ValueError("로드된 CSV 파일이 없습니다.")
+    return pd.concat(all_data, ignore_index=True).dropna(subset=['Domain', 'Input', 'Output'])
+
+def check_rules(fit=False):
+    """--fit: 산출한 규칙 출력, --check: 현재 규칙 일치율을 산출 규칙과 비교 (반환: 종료 코드)"""
+    df = _load_domain_csvs()
+    fitted = fit_severity_rules(df)
+    best = severity_agreement(df, fitted)
+    if fit:
+        for domain, rule in fitted.items():
+            print(f"{domain}: 일치율 {best[domain]:.1%} {json.dumps(rule, ensure_ascii=False)}")
+        return 0
+
+    failed = []
+    for domain, agreement in severity_agreement(df).items():
+        print(f"{domain}: 일치율 {agreement:.1%} (산출 규칙 {best[domain]:.1%})")
+        if domain not in SEVERITY_RULES or agreement < best[domain] - AGREEMENT_TOLERANCE:
+            failed.append(domain)
+    if failed:
+        print(f"규칙이 없거나 산출 규칙보다 일치율이 낮은 도메인: {failed} (python structured_output.py --fit)")
+    return 1 if failed else 0
+
+def main():
+    """명령행/표준입력의 "도메인, 입력" 문장별 구조화 레코드 출력"""
+    if sys.argv[1:2] in (["--fit"], ["--check"]):
+        return check_rules(fit=sys.argv[1] == "--fit")
+    for line in sys.argv[1:] or sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        domain, _, input_text = line.partition(", ")
+        if domain not in SEVERITY_RULES:
+            domain, input_text = None, line
+        print(json.dumps(build_record(domain, input_text), ensure_ascii=False))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,16 +5,79 @@ MPS 오류 방지 및 안전한 테스트
 """
 
 import os
+import math
 import torch
 import pandas as pd
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import logging
 
+from constrained_decoding import generate_constrained
+from encoder_cache import EncoderOutputCache, generate_with_encoder_cache
+from length_budget import load_length_budgets, apply_length_budget
+from instrumentation import Instrumentation, maybe_phase
+from korean_normalizer import input_normalization, normalize_input
+from domain_classifier import load_domain_classifier, resolve_domain
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 CSV_PATH = "/Users/yunseong/Desktop/SLM_Model/csv/domain_example.csv"
 
+# 대화형 입력에 붙는 기본 도메인
+DEFAULT_DOMAIN = "군중 밀집 및 체류 감지"
+
+# 수치 제약 + 탐욕적 디코딩 사용 여부 (빔 3개 대비 수 배 빠름)
+USE_CONSTRAINED_DECODING = False
+
+# 최근 입력의 인코더 출력 재사용 (같은 입력을 다른 빔 수로 재실행하거나 재시도할 때)
+USE_ENCODER_CACHE = True
+
+# 도메인별 길이 예산 + 문장 수 조기 종료 사용 여부 (length_budget.py로 length_budgets.json 생성)
+USE_LENGTH_BUDGETS = True
+
+# 대화형 입력의 도메인을 분류기로 추정 (python domain_classifier.py로 domain_classifier.npz 생성, 없으면 기본 도메인)
+USE_DOMAIN_CLASSIFIER = True
+
+# 호출자가 덮어쓸 수 있는 생성 옵션과 허용 범위 (서버 요청의 generation_kwargs도 같은 검사를 거침)
+GENERATION_KWARGS_LIMITS = {
+    "max_length": (int, 1, 512),
+    "max_new_tokens": (int, 1, 512),
+    "min_length": (int, 0, 512),
+    "num_beams": (int, 1, 8),
+    "no_repeat_ngram_size": (int, 0, 10),
+    "top_k": (int, 0, 100),
+    "top_p": (float, 0.0, 1.0),
+    "temperature": (float, 0.1, 2.0),
+    "repetition_penalty": (float, 1.0, 2.0),
+    "length_penalty": (float, 0.0, 2.0),
+    "early_stopping": (bool, None, None),
+    "do_sample": (bool, None, None),
+}
+
+def sanitize_generation_kwargs(generation_kwargs):
+    """허용된 생성 옵션만 타입 변환 후 범위로 제한 (알 수 없는 키, 변환 실패, NaN/무한대는 ValueError)"""
+    sanitized = {}
+    for key, value in (generation_kwargs or {}).items():
+        if key not in GENERATION_KWARGS_LIMITS:
+            raise ValueError(f"허용되지 않는 생성 옵션: {key} (허용: {sorted(GENERATION_KWARGS_LIMITS)})")
+        kind, low, high = GENERATION_KWARGS_LIMITS[key]
+        if kind is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"{key}는 true/false여야 합니다: {value!r}")
+            sanitized[key] = value
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) \
+                or (kind is int and value != int(value)):
+            raise ValueError(f"{key}는 {kind.__name__} 값이어야 합니다: {value!r}")
+        sanitized[key] = min(max(kind(value), low), high)
+    return sanitized
+
+def format_input(domain, input_text, model=None):
+    """학습 데이터와 같은 "도메인, 입력" 형식의 모델 입력 문장 (모델 config에 기록된 정규화 설정 적용)"""
+    if model is not None:
+        input_text = normalize_input(input_text, input_normalization(model))
+    return f"{domain}, {input_text}"
+
 def load_model_safe():
     try:
         device = "cpu"
@@ -31,33 +94,52 @@ def load_model_safe():
         logger.error(f"모델 로드 실패: {e}")
         return None, None, None
 
-def generate_text_safe(model, tokenizer, device, input_text):
+def generate_text_safe(model, tokenizer, device, input_text, constrained=False,
+                       encoder_cache=None, generation_kwargs=None, length_budgets=None, instrumentation=None):
     try:
+        if constrained:
+            return generate_constrained(
+                model, tokenizer, device, input_text,
+                encoder_cache=encoder_cache, length_budgets=length_budgets
+            )
+        
         input_with_prefix = "분석: " + input_text
         
-        inputs = tokenizer(
-            input_with_prefix,
-            return_tensors="pt",
-            max_length=256,
-            truncation=True,
-            padding=True
-        )
+        with maybe_phase(instrumentation, "tokenization"):
+            inputs = tokenizer(
+                input_with_prefix,
+                return_tensors="pt",
+                max_length=256,
+                truncation=True,
+                padding=True
+            )
         
         inputs = {k: v.to(device) for k, v in inputs.items()}
         
+        # 기본 생성 설정 (generation_kwargs로 빔 수 등 덮어쓰기 가능)
+        gen_kwargs = dict(
+            max_length=512,
+            num_beams=3,
+            early_stopping=True,
+            no_repeat_ngram_size=2,
+            do_sample=False,
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+            temperature=1.0
+        )
+        # 도메인 길이 예산이 있으면 max_new_tokens + 문장 수 조기 종료로 대체
+        apply_length_budget(gen_kwargs, tokenizer, length_budgets, input_text)
+        gen_kwargs.update(sanitize_generation_kwargs(generation_kwargs))
+        
         model.eval()
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_length=512,
-                num_beams=3,
-                early_stopping=True,
-                no_repeat_ngram_size=2,
-                do_sample=False,
-                pad_token_id=tokenizer.pad_token_id,
-                eos_token_id=tokenizer.eos_token_id,
-                temperature=1.0
-            )
+        with maybe_phase(instrumentation, "generate"):
+            if encoder_cache is not None:
+                outputs = generate_with_encoder_cache(model, inputs, encoder_cache, **gen_kwargs)
+            else:
+                with torch.no_grad():
+                    outputs = model.generate(**inputs, **gen_kwargs)
+        if instrumentation is not None:
+            instrumentation.add_tokens("generate", outputs.shape[-1] - 1)
         
         generated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
         return generated_text
@@ -88,15 +170,23 @@ def test_model():
     
     test_samples = df.head(10)
     successful_tests = 0
+    encoder_cache = EncoderOutputCache() if USE_ENCODER_CACHE else None
+    length_budgets = load_length_budgets() if USE_LENGTH_BUDGETS else None
+    domain_classifier = load_domain_classifier() if USE_DOMAIN_CLASSIFIER else None
+    instrumentation = Instrumentation("inference")
     
     for idx, row in test_samples.iterrows():
         try:
             domain = row['Domain']
             input_text = row['Input']
             
-            combined_input = f"{domain}, {input_text}"
+            combined_input = format_input(domain, input_text, model)
             
-            generated_output = generate_text_safe(model, tokenizer, device, combined_input)
+            generated_output = generate_text_safe(
+                model, tokenizer, device, combined_input,
+                constrained=USE_CONSTRAINED_DECODING, encoder_cache=encoder_cache,
+                length_budgets=length_budgets, instrumentation=instrumentation
+            )
             
             successful_tests += 1
             
@@ -128,8 +218,15 @@ def test_model():
             if not user_input:
                 continue
             
-            full_input = f"군중 밀집 및 체류 감지, {user_input}"
-            generated = generate_text_safe(model, tokenizer, device, full_input)
+            resolution = resolve_domain(domain_classifier, user_input, default=DEFAULT_DOMAIN)
+            if resolution["confidence"] is not None:
+                print(f"추정 도메인: {resolution['domain']} (신뢰도 {resolution['confidence']:.2f})")
+            full_input = format_input(resolution["domain"], user_input, model)
+            generated = generate_text_safe(
+                model, tokenizer, device, full_input,
+                constrained=USE_CONSTRAINED_DECODING, encoder_cache=encoder_cache,
+                length_budgets=length_budgets, instrumentation=instrumentation
+            )
             
             print(f"생성된 분석: {generated}")
             
@@ -138,6 +235,10 @@ def test_model():
         except Exception as e:
             print(f"오류: {e}")
     
+    if encoder_cache is not None:
+        logger.info(f"인코더 캐시 통계: {encoder_cache.stats()}")
+    instrumentation.log_summary()
+    
     print("\n테스트 완료!")
 
 if __name__ == "__main__":
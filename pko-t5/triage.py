@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+심각도 사전 분류 (생성 모델 호출 전 단계)
+- 입력 파싱 결과의 측정값/기준값을 도메인 규칙으로 비교해 양호/주의/위험 분류 (structured_output과 같은 규칙)
+- 측정값이 기준보다 확실히 낮은 양호 이벤트는 모델을 거치지 않고 정형 응답(canned) 또는 응답 생략(suppress)
+  정형 응답은 입력의 이벤트 종류(연기/불꽃/화염)와 도메인 후속 조치 문장을 포함하지만 모델 출력만큼 다양하지 않으므로
+  기본값은 off (분류만), 서버/일괄 추론에서 --triage canned로 선택
+- 기준과 같은 값은 도메인에 따라 위급으로 서술되기도 하므로(예: 쓰러짐 임계값 도달) 생성으로 보냄
+- 주의/위험, 기준 없는 입력은 항상 전체 생성
+  python triage.py "군중 밀집 및 체류 감지, 8:29 구청 309명 계측, 기준 인원 401명"
+"""
+
+import re
+import sys
+import json
+import threading
+
+from input_parser import parse_input, to_number, format_number
+from structured_output import SEVERITY_RULES, classify_severity
+from number_rules import load_number_rules
+
+# off: 분류만 하고 모두 생성, canned: 양호는 정형 응답, suppress: 양호는 응답 생략
+TRIAGE_MODES = ("off", "canned", "suppress")
+TRIAGE_MODE = "off"
+
+# 연기/화염 입력의 이벤트 종류 (없으면 DEFAULT_EVENT)
+EVENT_PATTERN = re.compile(r'연기|불꽃|화염')
+DEFAULT_EVENT = "연기 또는 화염"
+# 후속 점검 기준 "이후 N초 이상 감지 시" = 측정값 + 수치 규칙의 가장 작은 양의 측정값 오프셋 (규칙이 없으면 1)
+DEFAULT_FOLLOW_UP_OFFSET = 1
+
+# 양호 이벤트 정형 응답 (학습 데이터의 양호 출력 문형을 따름)
+#   {where}: "장소에서 ", {when}: "시각 ", {measured}/{baseline}/{difference}/{follow_up}: 단위 포함 수치,
+#   {event}: 조사 포함 이벤트 종류 ("연기가", "불꽃이")
+CANNED_TEMPLATES = {
+    "군중 밀집 및 체류 감지": (
+        "{where}{when}기준 {baseline} 범위 내에서 {measured}이 감지되었습니다. "
+        "현재 인원 분포는 적정 수준으로 양호합니다. 시간대별 인원 변화를 지속 관찰하겠습니다."
+    ),
+    "쓰러짐 및 장기 정지 감지": (
+        "{where}{when}{measured}간 지속된 상태가 감지되었습니다. 허용치 {baseline}보다 {difference} 적어 "
+        "허용 범위로 판단됩니다. 안전한 수준이므로 정기적인 점검을 지속해주세요."
+    ),
+    "연기 및 화염 감지": (
+        "{where}{when}{event} {measured}간 감지되어 기준 {baseline}보다 {difference} 적은 정상 범위입니다. "
+        "추후 감지 시 안전 점검을 실시하세요. 현장 관리자는 즉시 상황을 재확인해 주세요. "
+        "이후 {follow_up} 이상 감지 시 전기 안전 점검을 실시하세요."
+    ),
+    "이상 이동 패턴 감지": (
+        "{where}{when}측정값 {measured}로 기준 {baseline}에 부합하여 정상 범위로 평가됩니다. "
+        "향후 관찰이 필요합니다."
+    ),
+    "줄 서기 및 대기열 정렬 상태 감지": (
+        "{where}{when}측정값 {measured}로 기준치 {baseline} 내에서 양호한 정렬을 유지하고 있습니다. "
+        "향후 반복 발생 시 점검이 권장됩니다."
+    ),
+    "폐쇄시간 무단 출입 감지": (
+        "{where}{when}{measured}간 출입이 감지되었습니다. 기준 {baseline} 내에서 정상적인 출입 활동으로 평가됩니다. "
+        "특별한 조치는 필요하지 않습니다."
+    ),
+}
+DEFAULT_CANNED_TEMPLATE = (
+    "{where}{when}측정값 {measured}로 기준 {baseline} 범위 내의 양호한 상태입니다. 현재 상태를 유지하며 관찰하겠습니다."
+)
+
+def _subject(word):
+    """주격 조사 (받침이 있으면 "이", 없으면 "가")"""
+    last = ord(word[-1]) - 0xAC00
+    return f"{word}이" if 0 <= last < 11172 and last % 28 else f"{word}가"
+
+def _follow_up_offset(domain):
+    offsets = [k for k in load_number_rules().get(domain, {}).get("measured_offsets", []) if k > 0]
+    return min(offsets) if offsets else DEFAULT_FOLLOW_UP_OFFSET
+
+def canned_response(domain, parsed, input_text=""):
+    """양호 이벤트의 정형 응답 (입력 수치/차이, 이벤트 종류, 도메인 후속 점검 기준 사용)"""
+    unit = parsed["unit"] or ""
+    template = CANNED_TEMPLATES.get(domain, DEFAULT_CANNED_TEMPLATE)
+    event = EVENT_PATTERN.search(input_text)
+    follow_up = ""
+    if "{follow_up}" in template:
+        decimals = len(parsed["measured"].split(".")[1]) if "." in parsed["measured"] else 0
+        follow_up = f"{format_number(to_number(parsed['measured']) + _follow_up_offset(domain), decimals)}{unit}"
+    return template.format(
+        where=f"{parsed['location']}에서 " if parsed["location"] else "",
+        when=f"{parsed['times'][0]} " if parsed["times"] else "",
+        event=_subject(event.group() if event else DEFAULT_EVENT),
+        measured=f"{parsed['measured']}{unit}",
+        baseline=f"{parsed['baseline']}{unit}",
+        difference=f"{parsed['difference_text']}{unit}",
+        follow_up=follow_up,
+    )
+
+def _classify(domain, input_text):
+    parsed = parse_input(input_text)
+    severity, action = classify_severity(domain, parsed)
+    # 기준보다 낮은 경우만 (기준과 같으면 difference == 0)
+    clearly_normal = severity == "양호" and parsed["difference"] is not None and parsed["difference"] < 0
+    canned = canned_response(domain, parsed, input_text) if clearly_normal else None
+    return severity, action, canned
+
+def triage(domain, input_text, mode=TRIAGE_MODE):
+    """(반환: {"severity", "action", "generate": 모델 생성 필요 여부, "text": 정형 응답 또는 None})"""
+    severity, action, canned = _classify(domain, input_text)
+    skip = mode != "off" and canned is not None
+    return {
+        "severity": severity,
+        "action": action,
+        "generate": not skip,
+        "text": canned if skip and mode == "canned" else None,
+    }
+
+class TriageStats:
+    """심각도별 건수와 생략한 모델 호출 비율 (서버 요청 스레드 간 공유)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.skipped = 0
+        self.total = 0
+
+    def record(self, decision):
+        with self.lock:
+            self.counts[decision["severity"]] = self.counts.get(decision["severity"], 0) + 1
+            self.total += 1
+            self.skipped += not decision["generate"]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "total": self.total,
+                "skipped": self.skipped,
+                "skipped_ratio": self.skipped / self.total if self.total else 0.0,
+                "severity": dict(self.counts),
+            }
+
+def main():
+    """명령행/표준입력의 "도메인, 입력" 문장별 분류 결과 출력 (마지막에 생략 비율)"""
+    stats = TriageStats()
+    for line in sys.argv[1:] or sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        domain, _, input_text = line.partition(", ")
+        if domain not in SEVERITY_RULES:
+            domain, input_text = None, line
+        # 정형 응답까지 확인할 수 있도록 canned로 분류
+        decision = triage(domain, input_text, "canned")
+        stats.record(decision)
+        print(json.dumps(decision, ensure_ascii=False))
+    print(json.dumps(stats.stats(), ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
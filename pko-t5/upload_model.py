@@ -1,67 +1,55 @@
 #!/usr/bin/env python3
 """
-PKO-T5 기반 SLM 모델을 Hugging Face Hub에 업로드
+PKO-T5 기반 SLM 모델을 Hugging Face Hub(또는 로컬 대체 허브)에 게시
+- 체크포인트는 평가 지표(eval_loss)가 가장 좋은 것을 자동 선택 (--checkpoint로 직접 지정 가능)
+- 파일 sha256을 원격과 비교해 바뀐 파일만 업로드 (로컬 해시는 크기/수정 시각 기준으로 캐시)
+- Hub: 바뀐 파일을 커밋 하나로 병렬 업로드 (LFS 파일은 멀티파트, 이미 올라간 LFS 객체는 재전송하지 않음)
+- 로컬 허브: 큰 파일을 청크로 나눠 병렬 업로드, 실패한 청크는 재시도하고 중단 후 다시 실행하면 받은 청크는 건너뜀
+  python upload_model.py                                   # Hugging Face Hub
+  python upload_model.py --endpoint http://127.0.0.1:8900  # 로컬 대체 허브 (python local_hub.py)
+  python upload_model.py --checkpoint /Volumes/Data/slm_model/checkpoint-2300 --dry-run
 """
 
 import os
-from huggingface_hub import HfApi, create_repo
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
-def upload_model_to_hf():
-    # 설정
-    MODEL_PATH = "/Volumes/Data/slm_model/checkpoint-2300"  # 최신 체크포인트
-    HF_USERNAME = "BBoDDoGood"  # 여기에 허깅페이스 사용자명 입력
-    MODEL_NAME = "SLM_pko-t5"  # 원하는 모델명
-    REPO_ID = f"{HF_USERNAME}/{MODEL_NAME}"
-    
-    print("🚀 PKO-T5 SLM 모델 업로드 시작")
-    print(f"모델 경로: {MODEL_PATH}")
-    print(f"업로드 대상: {REPO_ID}")
-    
-    # API 초기화
-    api = HfApi()
-    
-    try:
-        # 1. 레포지토리 생성
-        print("\n1️⃣ Hugging Face 레포지토리 생성 중...")
-        create_repo(
-            repo_id=REPO_ID,
-            repo_type="model",
-            exist_ok=True,
-            private=False  # 공개 모델로 설정 (원하면 True로 변경)
-        )
-        print(f"✅ 레포지토리 생성 완료: https://huggingface.co/{REPO_ID}")
-        
-        # 2. 모델 파일 업로드
-        print("\n2️⃣ 모델 파일 업로드 중...")
-        
-        # 업로드할 파일들
-        files_to_upload = [
-            "model.safetensors",      # 메인 모델 (1.0GB)
-            "config.json",            # 모델 설정
-            "generation_config.json", # 생성 설정
-            "tokenizer.json",         # 토크나이저 (4.2MB)
-            "tokenizer_config.json",  # 토크나이저 설정
-            "special_tokens_map.json" # 특수 토큰 매핑
-        ]
-        
-        for file_name in files_to_upload:
-            file_path = os.path.join(MODEL_PATH, file_name)
-            if os.path.exists(file_path):
-                print(f"  📤 {file_name} 업로드 중...")
-                api.upload_file(
-                    path_or_fileobj=file_path,
-                    path_in_repo=file_name,
-                    repo_id=REPO_ID,
-                    repo_type="model"
-                )
-                print(f"  ✅ {file_name} 업로드 완료")
-            else:
-                print(f"  ⚠️  {file_name} 파일 없음")
-        
-        # 3. README.md 생성 및 업로드
-        print("\n3️⃣ README.md 생성 중...")
-        readme_content = f"""---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_ROOT = "/Volumes/Data/slm_model"
+HF_USERNAME = "BBoDDoGood"
+MODEL_NAME = "SLM_pko-t5"
+REPO_ID = f"{HF_USERNAME}/{MODEL_NAME}"
+BEST_METRIC = "eval_loss"
+
+# 게시할 파일 (옵티마이저/스케줄러 등 학습 재개용 파일은 제외)
+UPLOAD_FILES = [
+    "model.safetensors",
+    "config.json",
+    "generation_config.json",
+    "tokenizer.json",
+    "tokenizer_config.json",
+    "special_tokens_map.json",
+    "spiece.model",
+]
+
+HASH_CACHE_FILE = ".upload_hashes.json"
+HASH_BUFFER = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_WORKERS = 4
+MAX_RETRIES = 3
+RETRY_DELAY = 2.0
+
+def build_model_card(repo_id):
+    return f"""---
 language:
 - ko
 license: mit
@@ -90,7 +78,7 @@ pipeline_tag: text2text-generation
 ## 지원 도메인
 
 1. **군중 밀집 및 체류 감지**
-2. **쓰러짐 및 장기 정지 감지**  
+2. **쓰러짐 및 장기 정지 감지**
 3. **연기 및 화염 감지**
 4. **작업자 안전장비 미착용 감지**
 5. **폐쇄시간 무단 출입 감지**
@@ -106,8 +94,8 @@ pipeline_tag: text2text-generation
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 
 # 모델 로드
-tokenizer = AutoTokenizer.from_pretrained("{REPO_ID}")
-model = AutoModelForSeq2SeqLM.from_pretrained("{REPO_ID}")
+tokenizer = AutoTokenizer.from_pretrained("{repo_id}")
+model = AutoModelForSeq2SeqLM.from_pretrained("{repo_id}")
 
 # 입력 예시
 input_text = "군중 밀집 및 체류 감지, 오후 2시 30분에 지하철 2호선 강남역에서 50명이 5분간 체류했습니다, 기준: 30명"
@@ -138,34 +126,274 @@ MIT License
   title={{PKO-T5 SLM: Korean Crowd Monitoring Specialized Model}},
   author={{SLM Development Team}},
   year={{2025}},
-  url={{https://huggingface.co/{REPO_ID}}}
+  url={{https://huggingface.co/{repo_id}}}
 }}
 ```
 """
-        
-        # README.md 임시 파일 생성
-        readme_path = "/tmp/README.md"
-        with open(readme_path, "w", encoding="utf-8") as f:
-            f.write(readme_content)
-        
-        # README.md 업로드
-        api.upload_file(
-            path_or_fileobj=readme_path,
-            path_in_repo="README.md",
-            repo_id=REPO_ID,
-            repo_type="model"
-        )
-        print("✅ README.md 업로드 완료")
-        
-        print("\n🎉 모델 업로드 완료!")
-        print(f"📱 모델 페이지: https://huggingface.co/{REPO_ID}")
-        print(f"💻 사용법: transformers.AutoModel.from_pretrained('{REPO_ID}')")
-        
+
+def select_checkpoint(model_root, metric=BEST_METRIC, greater_is_better=False):
+    """완전한 체크포인트 중 지표가 가장 좋은 것 (반환: 경로, 지표 값)
+
+    지표는 가장 최근 체크포인트의 trainer_state.json 로그 기록에서 찾고, 평가 기록이 없으면 최신 체크포인트
+    """
+    from slm_training.checkpointing import list_complete_checkpoints, checkpoint_step
+
+    checkpoints = list_complete_checkpoints(model_root)
+    if not checkpoints:
+        # 체크포인트 없이 최종 모델만 있는 디렉토리
+        return (model_root, None) if os.path.exists(os.path.join(model_root, "config.json")) else (None, None)
+
+    with open(os.path.join(checkpoints[-1], "trainer_state.json"), encoding='utf-8') as f:
+        log_history = json.load(f).get("log_history", [])
+    scores = {entry["step"]: entry[metric] for entry in log_history if metric in entry}
+    candidates = [
+        (scores[checkpoint_step(os.path.basename(path))], path) for path in checkpoints
+        if checkpoint_step(os.path.basename(path)) in scores
+    ]
+    if not candidates:
+        logger.warning(f"{metric} 기록이 없어 최신 체크포인트를 사용합니다.")
+        return checkpoints[-1], None
+    value, path = (max if greater_is_better else min)(candidates)
+    return path, value
+
+def file_sha256(path, cache):
+    """파일 sha256 (크기/수정 시각이 같으면 캐시 값 사용)"""
+    stat = os.stat(path)
+    key = os.path.basename(path)
+    cached = cache.get(key)
+    if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+        return cached["sha256"]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(HASH_BUFFER)
+            if not block:
+                break
+            digest.update(block)
+    cache[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+    return cache[key]["sha256"]
+
+def collect_artifacts(model_dir, repo_id):
+    """게시할 파일 목록 [{path_in_repo, path 또는 data, size, sha256}] (모델 카드 포함)"""
+    cache_path = os.path.join(model_dir, HASH_CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+
+    artifacts = []
+    for name in UPLOAD_FILES:
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path):
+            continue
+        artifacts.append({"path_in_repo": name, "path": path, "size": os.path.getsize(path), "sha256": file_sha256(path, cache)})
+    card = build_model_card(repo_id).encode("utf-8")
+    artifacts.append({"path_in_repo": "README.md", "data": card, "size": len(card), "sha256": hashlib.sha256(card).hexdigest()})
+
+    try:
+        with open(cache_path, "w", encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        logger.warning(f"해시 캐시 저장 실패: {e}")
+    return artifacts
+
+def _git_blob_sha1(artifact):
+    """Hub의 일반(LFS가 아닌) 파일 비교용 git blob 해시"""
+    if "data" in artifact:
+        data = artifact["data"]
+    else:
+        with open(artifact["path"], "rb") as f:
+            data = f.read()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _read_range(artifact, offset, length):
+    if "data" in artifact:
+        return artifact["data"][offset:offset + length]
+    with open(artifact["path"], "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+def _with_retries(description, func, *args):
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                raise
+            logger.warning(f"  ⚠️ {description} 실패 ({attempt}/{MAX_RETRIES}): {e}, 재시도")
+            time.sleep(RETRY_DELAY * attempt)
+
+class HubPublisher:
+    """Hugging Face Hub 게시 (LFS 파일은 sha256, 일반 파일은 git blob 해시로 비교)
+
+    저장소는 실제 업로드할 때 생성 (--dry-run은 원격을 바꾸지 않고, 없는 저장소는 원격 파일이 없는 것으로 비교)
+    """
+
+    def __init__(self, repo_id, private=False):
+        from huggingface_hub import HfApi
+
+        self.api = HfApi()
+        self.repo_id = repo_id
+        self.private = private
+
+    def is_unchanged(self, artifact, remote):
+        info = remote.get(artifact["path_in_repo"])
+        if info is None:
+            return False
+        if info.lfs is not None:
+            return info.lfs.sha256 == artifact["sha256"]
+        return info.blob_id == _git_blob_sha1(artifact)
+
+    def remote_files(self):
+        from huggingface_hub.utils import RepositoryNotFoundError
+
+        if not self.api.repo_exists(self.repo_id, repo_type="model"):
+            logger.info(f"원격 저장소가 아직 없습니다: {self.repo_id} (업로드 시 생성)")
+            return {}
+        try:
+            return {
+                entry.path: entry for entry in self.api.list_repo_tree(self.repo_id, repo_type="model", recursive=True)
+                if hasattr(entry, "blob_id")
+            }
+        except RepositoryNotFoundError:
+            return {}
+
+    def upload(self, artifacts, message):
+        from huggingface_hub import CommitOperationAdd
+
+        self.api.create_repo(repo_id=self.repo_id, repo_type="model", exist_ok=True, private=self.private)
+
+        operations = [
+            CommitOperationAdd(path_in_repo=a["path_in_repo"], path_or_fileobj=a.get("data") or a["path"])
+            for a in artifacts
+        ]
+        # 중간에 실패해도 이미 올라간 LFS 객체는 다음 시도에서 건너뜀 (내용 주소 기반)
+        _with_retries("커밋", lambda: self.api.create_commit(
+            repo_id=self.repo_id, repo_type="model", operations=operations,
+            commit_message=message, num_threads=UPLOAD_WORKERS
+        ))
+
+class LocalHubPublisher:
+    """로컬 대체 허브(local_hub.py) 게시: 청크 병렬 업로드 + 받은 청크 건너뛰기로 재개"""
+
+    def __init__(self, endpoint, repo_id, chunk_size=CHUNK_SIZE):
+        self.endpoint = endpoint.rstrip("/")
+        self.repo_id = repo_id
+        self.chunk_size = chunk_size
+
+    def _request(self, method, path, data=None, payload=None):
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(f"{self.endpoint}{path}", data=data, method=method)
+        request.add_header("Content-Type", "application/json" if payload is not None else "application/octet-stream")
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                return json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"{method} {path}: {e.code} {e.read().decode('utf-8', 'replace')}") from None
+
+    def is_unchanged(self, artifact, remote):
+        info = remote.get(artifact["path_in_repo"])
+        return info is not None and info["sha256"] == artifact["sha256"]
+
+    def remote_files(self):
+        return self._request("GET", f"/api/repos/{self.repo_id}/files")["files"]
+
+    def _put_chunk(self, artifact, index):
+        data = _read_range(artifact, index * self.chunk_size, self.chunk_size)
+        self._request("PUT", f"/api/objects/{artifact['sha256']}/chunks/{index}", data=data)
+
+    def upload(self, artifacts, message):
+        pending = []
+        for artifact in artifacts:
+            num_chunks = max(1, -(-artifact["size"] // self.chunk_size))
+            status = self._request("GET", f"/api/objects/{artifact['sha256']}/chunks")
+            if status["complete"]:
+                logger.info(f"  ♻️ {artifact['path_in_repo']}: 같은 내용이 이미 허브에 있음")
+                continue
+            missing = sorted(set(range(num_chunks)) - set(status["chunks"]))
+            if len(missing) < num_chunks:
+                logger.info(f"  🔄 {artifact['path_in_repo']}: 청크 {num_chunks - len(missing)}/{num_chunks}개 받은 상태에서 재개")
+            pending.append((artifact, num_chunks, missing))
+
+        # 모든 파일의 남은 청크를 한 스레드 풀에서 병렬 업로드
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    _with_retries, f"{artifact['path_in_repo']} 청크 {index}", self._put_chunk, artifact, index
+                )
+                for artifact, _, missing in pending for index in missing
+            ]
+            for future in futures:
+                future.result()
+
+        for artifact, num_chunks, _ in pending:
+            self._request("POST", f"/api/objects/{artifact['sha256']}/complete", payload={"num_chunks": num_chunks})
+        self._request("POST", f"/api/repos/{self.repo_id}/commit", payload={
+            "message": message,
+            "files": {a["path_in_repo"]: {"sha256": a["sha256"], "size": a["size"]} for a in artifacts},
+        })
+
+def publish(publisher, artifacts, message, dry_run=False):
+    """원격과 해시가 다른 파일만 업로드 (반환: 업로드한 파일 수)"""
+    remote = publisher.remote_files()
+    changed = []
+    for artifact in artifacts:
+        if publisher.is_unchanged(artifact, remote):
+            logger.info(f"  ⏭️ {artifact['path_in_repo']}: 변경 없음")
+        else:
+            logger.info(f"  📤 {artifact['path_in_repo']}: {artifact['size'] / 1024 ** 2:.1f}MB 업로드 대상")
+            changed.append(artifact)
+    if not changed or dry_run:
+        return len(changed)
+
+    start_time = time.perf_counter()
+    publisher.upload(changed, message)
+    total = sum(a["size"] for a in changed)
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"✅ {len(changed)}개 파일 {total / 1024 ** 2:.1f}MB 업로드 ({elapsed:.1f}초, {total / 1024 ** 2 / max(elapsed, 1e-9):.1f}MB/s)")
+    return len(changed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PKO-T5 SLM 모델 게시")
+    parser.add_argument("--model-root", default=MODEL_ROOT, help="체크포인트를 고를 학습 출력 디렉토리")
+    parser.add_argument("--checkpoint", help="게시할 체크포인트 직접 지정 (지정 시 지표 선택 생략)")
+    parser.add_argument("--metric", default=BEST_METRIC)
+    parser.add_argument("--greater-is-better", action="store_true")
+    parser.add_argument("--repo-id", default=REPO_ID)
+    parser.add_argument("--endpoint", help="로컬 대체 허브 주소 (지정하지 않으면 Hugging Face Hub)")
+    parser.add_argument("--private", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="업로드 대상만 출력")
+    args = parser.parse_args(argv)
+
+    print("🚀 PKO-T5 SLM 모델 게시 시작")
+    if args.checkpoint:
+        model_dir, value = args.checkpoint, None
+    else:
+        model_dir, value = select_checkpoint(args.model_root, args.metric, args.greater_is_better)
+        if model_dir is None:
+            logger.error(f"게시할 체크포인트가 없습니다: {args.model_root}")
+            return 1
+    logger.info(f"모델 경로: {model_dir}" + (f" ({args.metric} {value:.4f})" if value is not None else ""))
+    logger.info(f"업로드 대상: {args.repo_id} ({args.endpoint or 'Hugging Face Hub'})")
+
+    try:
+        artifacts = collect_artifacts(model_dir, args.repo_id)
+        if args.endpoint:
+            publisher = LocalHubPublisher(args.endpoint, args.repo_id)
+        else:
+            publisher = HubPublisher(args.repo_id, private=args.private)
+        message = f"Upload {os.path.basename(os.path.normpath(model_dir))}"
+        uploaded = publish(publisher, artifacts, message, dry_run=args.dry_run)
     except Exception as e:
-        print(f"❌ 업로드 중 오류 발생: {e}")
-        return False
-    
-    return True
+        logger.error(f"❌ 업로드 중 오류 발생: {e}")
+        return 1
+
+    if uploaded == 0:
+        print("\n🎉 변경된 파일이 없습니다.")
+    elif not args.dry_run and not args.endpoint:
+        print(f"\n🎉 모델 업로드 완료! 📱 https://huggingface.co/{args.repo_id}")
+    return 0
 
 if __name__ == "__main__":
-    upload_model_to_hf()
\ No newline at end of file
+    sys.exit(main())